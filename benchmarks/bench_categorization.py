@@ -0,0 +1,99 @@
+"""
+Benchmark: master categorization.
+Compares the per-product pipeline (get_scored_keywords, calculate_category_scores and
+select_top_categories for each product) with CategorizationEngine (one sparse matrix product per
+batch) on N names drawn from the sample invoices' product names, with a synthetic category
+dictionary over their tokens (or the active dictionary rules and the product catalog: --catalog,
+needs the database), and checks that both give the same categories and ratios for every name.
+
+Usage: python -m benchmarks.bench_categorization [--catalog] [--products 100000] [--legacy-products 10000]
+"""
+import argparse
+import random
+import time
+import uuid
+from src.constants.enums import KeywordType
+from src.schemas.category_dictionary import CategoryDictionary
+from src.services.categorization import (
+    prepare_frequency_map,
+    get_scored_keywords,
+    prepare_category_rules_map,
+    calculate_category_scores,
+    select_top_categories
+)
+from src.services.categorization_engine import CategorizationEngine
+from src.utils.text_helpers import normalize_product_name
+from benchmarks.bench_normalizer import load_names
+
+def synthetic_dictionary(names: list[str], categories: int, seed: int) -> list[CategoryDictionary]:
+    # Half of the tokens, each in 1 to 3 categories
+    rng = random.Random(seed)
+    tokens = sorted({token for name in names for token in name.split()})
+    codes = [f"CAT_{i}" for i in range(categories)]
+    return [
+        CategoryDictionary(
+            id=uuid.uuid4(), category_code=code, category_name=code, keyword=keyword,
+            weight=rng.choice([0.3, 0.5, 0.8, 1.0]), keyword_type=KeywordType.PRIMARY, is_active=True,
+        )
+        for keyword in rng.sample(tokens, len(tokens) // 2)
+        for code in rng.sample(codes, rng.randint(1, 3))
+    ]
+
+def legacy_categorize(product_ids: list, names: list[str], dictionary_rules: list) -> list:
+    frequency_map = prepare_frequency_map(dictionary_rules)
+    rules_map = prepare_category_rules_map(dictionary_rules)
+    return [
+        select_top_categories(product_id, calculate_category_scores(
+            get_scored_keywords(product_id, name, frequency_map), rules_map
+        ))
+        for product_id, name in zip(product_ids, names)
+    ]
+
+def comparable(result) -> dict | None:
+    return result.model_dump(exclude={"id"}) if result else None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalog", action="store_true")
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--legacy-products", type=int, default=10_000)
+    parser.add_argument("--categories", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    names = [normalize_product_name(name) for name in load_names(args.catalog)]
+    if args.catalog:
+        from src.repositories.category_dictionary import get_all_active_dictionary_rules
+        dictionary_rules = get_all_active_dictionary_rules()
+    else:
+        dictionary_rules = synthetic_dictionary(names, args.categories, args.seed)
+    print(f"📚 {len(dictionary_rules)} dictionary rules, {len(set(names))} distinct names")
+
+    start = time.perf_counter()
+    engine = CategorizationEngine(dictionary_rules)
+    print(f"⚙️ Dictionary compiled in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # Same output for every distinct name
+    distinct = sorted(set(names))
+    ids = [uuid.uuid4() for _ in distinct]
+    legacy = [comparable(r) for r in legacy_categorize(ids, distinct, dictionary_rules)]
+    batched = [comparable(r) for r in engine.categorize(ids, distinct)]
+    mismatches = sum(a != b for a, b in zip(legacy, batched))
+    print(f"✅ {len(distinct) - mismatches}/{len(distinct)} names categorized identically")
+
+    rng = random.Random(args.seed)
+    sample = [rng.choice(names) for _ in range(args.products)]
+    sample_ids = [uuid.uuid4() for _ in sample]
+
+    start = time.perf_counter()
+    legacy_categorize(sample_ids[:args.legacy_products], sample[:args.legacy_products], dictionary_rules)
+    legacy_s = (time.perf_counter() - start) / args.legacy_products * args.products
+
+    start = time.perf_counter()
+    engine.categorize(sample_ids, sample)
+    engine_s = time.perf_counter() - start
+
+    print(f"⚡ {args.products} products: legacy {legacy_s:.2f} s (extrapolated from {args.legacy_products}), engine {engine_s:.2f} s")
+
+if __name__ == "__main__":
+    main()
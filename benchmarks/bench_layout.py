@@ -0,0 +1,101 @@
+"""
+Benchmark: OCR line reconstruction (TSV -> text lines).
+Compares the pandas DataFrame/groupby implementation previously used by
+extract_text_with_layout with the single-sort-pass assemble_lines.
+The pandas variant only runs if pandas is installed (it is no longer a dependency).
+
+Usage: python -m benchmarks.bench_layout [--pages 20] [--lines 80] [--words 12]
+"""
+import argparse
+import random
+import subprocess
+import sys
+import time
+from io import StringIO
+from csv import QUOTE_NONE
+from src.services.pdf_reader import parse_tesseract_tsv, assemble_lines
+from src.services.ocr_engine import TSV_HEADER
+
+WORDS = ["BORGO-", "SALAMI", "Pepperoni", "r/w", "1.2kg", "2.640", "kg", "34.55000", "0.00", "0%", "$", "91.21"]
+
+def make_page_tsv(lines: int, words_per_line: int, seed: int) -> str:
+    """
+    Build a dense invoice-like page in tesseract TSV format.
+    Blocks are emitted out of order, like tesseract does for multi-column layouts.
+    """
+    rng = random.Random(seed)
+    rows = [TSV_HEADER, "1\t1\t0\t0\t0\t0\t0\t0\t2480\t3508\t-1\t"]
+    block_count = max(1, lines // 10)
+    for block_num in rng.sample(range(1, block_count + 1), block_count):
+        rows.append(f"2\t1\t{block_num}\t0\t0\t0\t0\t0\t2400\t300\t-1\t")
+        for line_num in range(1, 11):
+            top = block_num * 300 + line_num * 28
+            rows.append(f"4\t1\t{block_num}\t1\t{line_num}\t0\t40\t{top}\t2400\t26\t-1\t")
+            lefts = rng.sample(range(40, 2400, 20), words_per_line)
+            for word_num, left in enumerate(lefts, 1):
+                text = rng.choice(WORDS)
+                conf = round(rng.uniform(60, 96), 6)
+                rows.append(
+                    f"5\t1\t{block_num}\t1\t{line_num}\t{word_num}\t{left}\t{top}\t80\t26\t{conf}\t{text}"
+                )
+    return "\n".join(rows) + "\n"
+
+def legacy_extract_lines(tsv: str, pd) -> str:
+    """
+    Previous implementation (pytesseract Output.DATAFRAME + groupby).
+    """
+    data = pd.read_csv(StringIO(tsv), quoting=QUOTE_NONE, sep="\t")
+    data = data[data.text.notna() & (data.text.str.strip() != "")]
+    if data.empty:
+        return ""
+    lines = []
+    for _, line_df in data.groupby(["block_num", "line_num"]):
+        sorted_line = line_df.sort_values("left")
+        lines.append(" ".join(sorted_line["text"].astype(str)))
+    return "\n".join(lines)
+
+def measure_import_ms(module: str) -> float:
+    """
+    Cold import time of a module, measured in a fresh interpreter.
+    """
+    def run(code: str) -> float:
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        return time.perf_counter() - start
+    return max(0.0, run(f"import {module}") - run("pass")) * 1000
+
+def time_per_page(func, pages: list[str]) -> float:
+    start = time.perf_counter()
+    for tsv in pages:
+        func(tsv)
+    return (time.perf_counter() - start) / len(pages) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=80)
+    parser.add_argument("--words", type=int, default=12)
+    args = parser.parse_args()
+
+    pages = [make_page_tsv(args.lines, args.words, seed) for seed in range(args.pages)]
+    print(f"📄 {args.pages} pages x {args.lines} lines x {args.words} words")
+
+    new_ms = time_per_page(lambda tsv: assemble_lines(parse_tesseract_tsv(tsv)), pages)
+    print(f"⚡ assemble_lines: {new_ms:.2f} ms/page")
+
+    try:
+        import pandas as pd
+        import_ms = measure_import_ms("pandas")
+    except ImportError:
+        print("ℹ️ pandas not installed, skipping the legacy comparison")
+        return
+
+    for tsv in pages:
+        assert legacy_extract_lines(tsv, pd) == assemble_lines(parse_tesseract_tsv(tsv)), "Output mismatch"
+
+    old_ms = time_per_page(lambda tsv: legacy_extract_lines(tsv, pd), pages)
+    print(f"🐼 pandas groupby: {old_ms:.2f} ms/page (+ {import_ms:.0f} ms one-off import)")
+    print(f"📈 Speedup: {old_ms / new_ms:.1f}x per page, identical output on {len(pages)} pages")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: line-item extraction on pathological OCR lines.
+Builds MAYERS-like lines of N tokens full of stray numbers and unit words that never complete
+a record (no line total at the end), and times the template regex against the column parser.
+The regex's lazy groups backtrack over every (description end, price) pair, so its time per
+line grows quadratically with N; the parser's stays linear.
+Also checks that both find the same records on the bundled sample invoices.
+
+Usage: python -m benchmarks.bench_line_items [--tokens 50 100 200 400] [--lines 20]
+"""
+import argparse
+import pathlib
+import re
+import time
+from pypdf import PdfReader
+from src.constants.invoice_template import InvoiceTemplate, TEMPLATE_CONFIGS
+from src.services.line_item_parser import LineItemParser
+
+INVOICES_DIR = pathlib.Path(__file__).parent.parent / "data/invoices"
+
+def pathological_line(tokens: int) -> str:
+    # "<qty> CTN <price>" runs look like the end of a record, but the line ends with a word
+    noise = " ".join(("1.00", "CTN", "25.00", "0.00")[i % 4] for i in range(tokens))
+    return f"1 1CTN AU036 HAPPY COW {noise} SMUDGE"
+
+def time_extraction(finditer, text: str, repeat: int) -> tuple[float, int]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        count = sum(1 for _ in finditer(text))
+    return (time.perf_counter() - start) / repeat * 1000, count
+
+def check_samples():
+    for template, folder in ((InvoiceTemplate.GULLI, "gulli"), (InvoiceTemplate.MAYERS, "mayers")):
+        config = TEMPLATE_CONFIGS[template]
+        pattern = re.compile(config["pattern"], flags=re.MULTILINE)
+        parser = LineItemParser(config["columns"])
+        for pdf_path in sorted((INVOICES_DIR / folder).glob("*.pdf")):
+            text = "\n".join(page.extract_text() or "" for page in PdfReader(str(pdf_path)).pages)
+            expected = [m.groupdict() for m in pattern.finditer(text)]
+            found = [m.groupdict() for m in parser.finditer(text)]
+            status = "✅" if found == expected else "❌"
+            print(f"{status} {pdf_path.name}: regex {len(expected)} items, parser {len(found)} items")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, nargs="+", default=[50, 100, 200, 400])
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    check_samples()
+
+    config = TEMPLATE_CONFIGS[InvoiceTemplate.MAYERS]
+    pattern = re.compile(config["pattern"], flags=re.MULTILINE)
+    line_parser = LineItemParser(config["columns"])
+    for tokens in args.tokens:
+        text = "\n".join(pathological_line(tokens) for _ in range(args.lines))
+        regex_ms, regex_count = time_extraction(pattern.finditer, text, args.repeat)
+        parser_ms, parser_count = time_extraction(line_parser.finditer, text, args.repeat)
+        print(
+            f"⚡ {args.lines} lines x {tokens} tokens: regex {regex_ms:.2f} ms ({regex_count} items), "
+            f"parser {parser_ms:.2f} ms ({parser_count} items)"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: product-name normalization.
+Compares the sequential normalizer (one re.sub per unit mapping, per non-meaningful word and
+for special characters) with normalize_product_name (single combined pass + LRU memo) on the
+product catalog (--catalog, needs the database) or the product names of the sample invoices,
+and checks that both give exactly the same output for every name.
+
+Usage: python -m benchmarks.bench_normalizer [--catalog] [--repeat 5]
+"""
+import argparse
+import pathlib
+import re
+import time
+import uuid
+from pypdf import PdfReader
+from src.constants.normalization import UNIT_MAPPING, NON_MEANINGFUL_WORDS, SPECIAL_CHARS_PATTERN
+from src.services.extract_product import extract_products_from_text
+from src.services.validate_invoice_template import validate_invoice_template
+from src.utils.text_helpers import normalize_product_name
+
+INVOICES_DIR = pathlib.Path(__file__).parent.parent / "data/invoices"
+
+def legacy_normalize_product_name(text: str) -> str:
+    # Reference: the normalizer before the combined pass
+    if not text: return ""
+    text = text.lower().strip()
+    for pattern, replacement in UNIT_MAPPING.items():
+        text = re.sub(pattern, replacement, text)
+    for word_pattern in NON_MEANINGFUL_WORDS:
+        text = re.sub(word_pattern, '', text)
+    text = re.sub(SPECIAL_CHARS_PATTERN, ' ', text)
+    return " ".join(text.split())
+
+def load_names(use_catalog: bool) -> list[str]:
+    if use_catalog:
+        from src.repositories.product import get_all_products
+        return [product.name for product in get_all_products()]
+
+    names = []
+    for pdf_path in sorted(INVOICES_DIR.glob("[!e]*/*.pdf")):
+        text = "\n".join(page.extract_text() or "" for page in PdfReader(str(pdf_path)).pages)
+        template = validate_invoice_template(text)
+        names += [p.raw_product_name for p in extract_products_from_text(text, template, uuid.uuid4())]
+    return names
+
+def time_names(normalize, names: list[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for name in names:
+            normalize(name)
+    return (time.perf_counter() - start) / (repeat * len(names)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalog", action="store_true", help="Use the product table instead of the sample invoices")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    names = load_names(args.catalog)
+    if not names:
+        print("❌ No product names")
+        return
+
+    mismatches = [n for n in names if normalize_product_name(n) != legacy_normalize_product_name(n)]
+    status = "✅" if not mismatches else f"❌ {len(mismatches)} mismatches, e.g. {mismatches[0]!r}"
+    print(f"{status} {len(names)} names ({len(set(names))} distinct)")
+
+    legacy_us = time_names(legacy_normalize_product_name, names, args.repeat)
+    normalize_product_name.cache_clear()
+    single_pass_us = time_names(normalize_product_name.__wrapped__, names, args.repeat)
+    memo_us = time_names(normalize_product_name, names, args.repeat)
+    print(
+        f"⚡ Per name: sequential {legacy_us:.1f} µs, single pass {single_pass_us:.1f} µs, "
+        f"single pass + memo {memo_us:.1f} µs"
+    )
+
+if __name__ == "__main__":
+    main()
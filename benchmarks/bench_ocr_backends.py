@@ -0,0 +1,66 @@
+"""
+Benchmark: OCR backends on the bundled sample invoices.
+Rasterizes every page of the PDFs in data/invoices once, then OCRs each page with every
+available backend (pytesseract: one tesseract process per page, tesserocr: persistent
+in-process engine) and reports the mean time per page and the line count produced.
+
+Requires poppler and tesseract; tesserocr is optional (pip install tesserocr).
+Usage: python -m benchmarks.bench_ocr_backends [--dpi 300] [--repeat 1]
+"""
+import argparse
+import pathlib
+import time
+from pdf2image import convert_from_path
+from src.services.ocr_engine import OCR_BACKENDS, create_ocr_backend
+from src.services.pdf_reader import OCR_DPI, OCR_LANG, parse_tesseract_tsv, assemble_lines
+
+INVOICES_DIR = pathlib.Path(__file__).parent.parent / "data/invoices"
+
+def load_sample_pages(dpi: int) -> list:
+    pages = []
+    for pdf_path in sorted(INVOICES_DIR.glob("*/*.pdf")):
+        try:
+            pages.extend(convert_from_path(str(pdf_path), dpi=dpi))
+        except Exception as e:
+            print(f"⚠️ Skipping {pdf_path.name}: {e}")
+    return pages
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dpi", type=int, default=OCR_DPI)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    pages = load_sample_pages(args.dpi)
+    if not pages:
+        print("❌ No sample pages could be rasterized (is poppler installed?)")
+        return
+    print(f"📄 {len(pages)} pages at {args.dpi} DPI")
+
+    results = {}
+    for name in OCR_BACKENDS:
+        try:
+            backend = create_ocr_backend(name)
+            # Warm-up page: loads the model for persistent engines
+            backend.image_to_tsv(pages[0], OCR_LANG)
+        except Exception as e:
+            print(f"⚠️ {name}: unavailable ({e})")
+            continue
+
+        line_count = 0
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for img in pages:
+                text = assemble_lines(parse_tesseract_tsv(backend.image_to_tsv(img, OCR_LANG)))
+                line_count += len(text.splitlines())
+        ms_per_page = (time.perf_counter() - start) / (len(pages) * args.repeat) * 1000
+        results[name] = ms_per_page
+        print(f"⚡ {name} ({backend.version()}): {ms_per_page:.0f} ms/page, {line_count // args.repeat} lines")
+
+    if len(results) > 1:
+        fastest = min(results, key=results.get)
+        slowest = max(results, key=results.get)
+        print(f"📈 {fastest} is {results[slowest] / results[fastest]:.2f}x faster than {slowest}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: text layer backends on the bundled sample invoices.
+Extracts every page of the PDFs in data/invoices with each available backend, reports the
+mean time per page, and checks that extract_products_from_text finds the same products
+(code, quantity, price) as with the pypdf text. A backend is only a candidate for a
+template's "text_backend" if every invoice of that template matches.
+
+pdftotext requires poppler (POPPLER_PATH or on PATH).
+Usage: python -m benchmarks.bench_text_layer [--repeat 5]
+"""
+import argparse
+import os
+import pathlib
+import time
+import uuid
+from pypdf import PdfReader
+from src.services.extract_product import extract_products_from_text
+from src.services.validate_invoice_template import validate_invoice_template
+from src.services.pdf_reader import TEXT_LAYER_BACKENDS, create_text_layer_backend
+from src.services.template_registry import template_name
+from src.constants.invoice_template import InvoiceTemplate
+
+INVOICES_DIR = pathlib.Path(__file__).parent.parent / "data/invoices"
+
+def load_sample_invoices() -> list[tuple[str, list]]:
+    invoices = []
+    for pdf_path in sorted(INVOICES_DIR.glob("*/*.pdf")):
+        try:
+            invoices.append((str(pdf_path), PdfReader(str(pdf_path)).pages))
+        except Exception as e:
+            print(f"⚠️ Skipping {pdf_path.name}: {e}")
+    return invoices
+
+def product_keys(pages_text: list[str], template: InvoiceTemplate | str) -> list[tuple]:
+    products = extract_products_from_text("\n".join(pages_text), template, uuid.uuid4())
+    return [(p.product_code, p.quantity, p.cost_price) for p in products]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    invoices = load_sample_invoices()
+    page_count = sum(len(pages) for _, pages in invoices)
+    print(f"📄 {len(invoices)} invoices, {page_count} pages")
+
+    baseline: dict[str, list[tuple]] = {}
+    templates: dict[str, InvoiceTemplate | str] = {}
+    for name in TEXT_LAYER_BACKENDS:
+        try:
+            backend = create_text_layer_backend(name, os.getenv("POPPLER_PATH"))
+        except Exception as e:
+            print(f"⚠️ {name}: unavailable ({e})")
+            continue
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            texts = {path: backend.extract_pages(path, pages, 1, len(pages)) for path, pages in invoices}
+        ms_per_page = (time.perf_counter() - start) / (page_count * args.repeat) * 1000
+        print(f"⚡ {name}: {ms_per_page:.1f} ms/page")
+
+        for path, pages_text in texts.items():
+            # Template from the reference (pypdf) text, so both backends parse with the same pattern
+            template = templates.setdefault(path, validate_invoice_template(pages_text[0]))
+            products = product_keys(pages_text, template)
+            expected = baseline.setdefault(path, products)
+            status = "✅" if products == expected else "❌"
+            print(f"   {status} {pathlib.Path(path).name} [{template_name(template)}]: {len(products)} products (pypdf: {len(expected)})")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 from enum import Enum
 
-# class FileType(str, Enum):
-#     PDF = "pdf"
-#     XML = "xml"
-#     IMAGE = "image"
-#     CSV = "csv"
+class FileType(str, Enum):
+    PDF = "pdf"
+    XML = "xml"
+    IMAGE = "image"
+    CSV = "csv"
+    XLSX = "xlsx"
     
 class InvoiceStatus(str, Enum):
     PENDING = "PENDING"
@@ -5,6 +5,17 @@ class InvoiceTemplate(str, Enum):
     MAYERS = "MAYERS"
     UNKNOWN = "UNKNOWN"
 
+# OCR presets (tesseract options)
+# - oem 1: LSTM engine only; psm: page segmentation mode
+# - tessdata "fast": integer models from tessdata_fast (directory set by TESSDATA_FAST_DIR)
+# - dpi: full resolution rasterization DPI
+OCR_PROFILES = {
+    "speed": {"oem": 1, "psm": 6, "tessdata": "fast", "dpi": 200},
+    "accuracy": {"oem": 1, "psm": 3, "dpi": 300},
+}
+
+# Line-item columns (see src/services/line_item_parser.py); "pattern" is used when a
+# template has no "columns"
 TEMPLATE_CONFIGS = {
     InvoiceTemplate.GULLI: {
         "keywords": [
@@ -16,8 +27,22 @@ TEMPLATE_CONFIGS = {
             "PRODUCT CODE", "DESCRIPTION", "QUANTITY", 
             "UNIT PRICE", "DISC.%", "GST", "AMOUNT"
         ],
+        # First lines below the line-item table (totals / terms)
+        "table_footers": ["Untaxed Amount", "Payment terms"],
+        # Totals line after the last line item: later pages are not read
+        "end_of_items_markers": ["Untaxed Amount"],
+        # Mixed-case descriptions over several lines: keep full accuracy, single column segmentation
+        "ocr_profile": {"preset": "accuracy", "psm": 4},
         "currency": "AUD",
-        "pattern": r"^\s*(?P<code>\S+)\s+(?P<desc>.+?)\s+(?P<qty>[\d,.]+)\s+(?P<uom>Box|kg|each|unit|Unit)\s+(?P<price>[\d,.]+)"
+        "pattern": r"^\s*(?P<code>\S+)\s+(?P<desc>.+?)\s+(?P<qty>[\d,.]+)\s+(?P<uom>Box|kg|each|unit|Unit)\s+(?P<price>[\d,.]+)",
+        # Code, description, quantity, unit and price each on their own line
+        "columns": [
+            {"name": "code", "type": "token"},
+            {"name": "desc", "type": "text"},
+            {"name": "qty", "type": "number"},
+            {"name": "uom", "type": "unit", "values": ["Box", "kg", "each", "unit", "Unit"]},
+            {"name": "price", "type": "number"},
+        ],
     },
     InvoiceTemplate.MAYERS: {
         "keywords": [
@@ -29,7 +54,26 @@ TEMPLATE_CONFIGS = {
             "Ordere", "Picked", "Item Code", "Item Description", 
             "Shipped Qty", "Unit Price", "Disc", "CD", "Net Price", "Line Total"
         ],
+        "table_footers": ["Please Note", "Ex Tax"],
+        "end_of_items_markers": ["Ex Tax:"],
+        # Fixed upper-case table: restricted character set inside the table. Full accuracy by
+        # default; OCR_PROFILE=speed (one uniform text block, 200 DPI) is opt-in
+        "ocr_profile": {
+            "preset": "accuracy",
+            "table_whitelist": "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.,%+-/()&*#:",
+        },
         "currency": "AUD",
-        "pattern": r"^\s*(?P<ordered>\d+)\s+(?P<picked>\S+)\s+(?P<code>\S+)\s+(?P<desc>.+?)\s+(?P<qty>[\d,.]+)\s+(?P<uom>CTN|KG|EACH|PKT|UNIT|ctn|kg)\s+(?P<price>[\d,.]+)(?:.+?)\s+(?P<amount>[\d,.]+)$"
+        "pattern": r"^\s*(?P<ordered>\d+)\s+(?P<picked>\S+)\s+(?P<code>\S+)\s+(?P<desc>.+?)\s+(?P<qty>[\d,.]+)\s+(?P<uom>CTN|KG|EACH|PKT|UNIT|ctn|kg)\s+(?P<price>[\d,.]+)(?:.+?)\s+(?P<amount>[\d,.]+)$",
+        # One line per item; discount / CD / net price between the price and the line total
+        "columns": [
+            {"name": "ordered", "type": "int"},
+            {"name": "picked", "type": "token"},
+            {"name": "code", "type": "token"},
+            {"name": "desc", "type": "text"},
+            {"name": "qty", "type": "number"},
+            {"name": "uom", "type": "unit", "values": ["CTN", "KG", "EACH", "PKT", "UNIT", "ctn", "kg"]},
+            {"name": "price", "type": "number"},
+            {"name": "amount", "type": "number", "line_end": True},
+        ],
     }
 }
\ No newline at end of file
@@ -1,3 +1,8 @@
+# Version of the normalization rules below, stored with the catalog's precomputed names.
+# Bump it on any rule change: stored names of an older version are recomputed by
+# src/services/product_normalization.py and ignored until then.
+NORMALIZER_VERSION = 2
+
 UNIT_MAPPING = {
     r'\b(kilograms?|kgs?|kg)\b': 'kg',
     r'\b(grams?|grs?|g)\b': 'g',
@@ -14,5 +19,16 @@ NON_MEANINGFUL_WORDS = [
     r'\bvat\b', r'\btax\b', r'\bwith\b', r'\band\b', r'\bfor\b'
 ]
 
+# Pack size units (canonical unit from UNIT_MAPPING) -> (base unit, factor)
+PACK_SIZE_UNITS = {
+    'kg': ('g', 1000),
+    'g': ('g', 1),
+    'l': ('ml', 1000),
+    'ml': ('ml', 1),
+}
+
+# Relative difference under which two pack sizes are the same (rounding, 1.5kg vs 1500g)
+PACK_SIZE_TOLERANCE = 0.05
+
 # Includes: - / _ , . * ( ) [ ] { } + | & ! # : ; @ ^
 SPECIAL_CHARS_PATTERN = r'[-/_,\.\*\(\)\[\]\{\}\+\|&!#:;@\^]'
\ No newline at end of file
@@ -0,0 +1,34 @@
+-- Precomputed normalized names and pack sizes on the product catalog
+-- (filled by src/services/product_normalization.py, see NORMALIZER_VERSION).
+-- Idempotent: safe to run again.
+
+ALTER TABLE product
+    ADD COLUMN IF NOT EXISTS normalized_name TEXT,
+    ADD COLUMN IF NOT EXISTS normalizer_version INTEGER,
+    ADD COLUMN IF NOT EXISTS pack_count INTEGER,
+    ADD COLUMN IF NOT EXISTS pack_size NUMERIC,
+    ADD COLUMN IF NOT EXISTS pack_unit TEXT;
+
+-- Products waiting for normalization (new, renamed, or from an older normalizer version):
+-- normalizer_version < current OR normalizer_version IS NULL, both answered by this index
+CREATE INDEX IF NOT EXISTS product_normalizer_version_idx ON product (normalizer_version);
+
+-- A new or renamed product drops its stored values, so they are never used for the old name;
+-- the worker recomputes them at the start of its next batch (refresh_product_normalized_names)
+CREATE OR REPLACE FUNCTION reset_product_normalized_name() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' OR NEW.name IS DISTINCT FROM OLD.name THEN
+        NEW.normalized_name := NULL;
+        NEW.normalizer_version := NULL;
+        NEW.pack_count := NULL;
+        NEW.pack_size := NULL;
+        NEW.pack_unit := NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS product_normalized_name_reset ON product;
+CREATE TRIGGER product_normalized_name_reset
+    BEFORE INSERT OR UPDATE OF name ON product
+    FOR EACH ROW EXECUTE FUNCTION reset_product_normalized_name();
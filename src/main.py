@@ -1,6 +1,9 @@
-from src.services.pdf_reader import read_pdf_file
-from src.services.extract_product import extract_products_from_text
+from src.services.pdf_reader import PdfPageStream
+from src.services.extract_product import extract_products_from_pages
 from src.services.matching import run_matching_process
+from src.services.product_normalization import refresh_product_normalized_names
+from src.services.prefetch import InvoicePrefetcher, get_invoice_prefetcher
+from src.services.structured_invoice import get_file_type, is_structured_file_type, read_structured_invoice
 from src.repositories.invoice import get_oldest_pending_invoice, update_invoice_status
 from src.repositories.product_extract import save_extracted_products, save_matching
 from src.repositories.category_dictionary import get_all_active_dictionary_rules
@@ -13,6 +16,7 @@ from src.db.config import get_db_connection, get_listen_connection
 from src.db.supabase_client import get_supabase_client
 import os
 import time
+import itertools
 
 CHANNEL = "invoice_inserted"
 
@@ -26,7 +30,11 @@ def process_queue(conn):
         return False
     
     print("🔍 [Worker] Checking for pending invoices...")
+    # Catalog products created or renamed since the last batch, normalized once for the batch
+    refresh_product_normalized_names()
     processed_count = 0
+    # Downloads the next pending invoices in the background (None when disabled)
+    prefetcher = get_invoice_prefetcher()
     while True:
         # Get oldest pending invoice
         invoice = get_oldest_pending_invoice(conn=conn)
@@ -35,16 +43,18 @@ def process_queue(conn):
                 print(f"🏁 [Worker] Processed {processed_count} invoice(s). Queue is now empty.")
             break
         
-        execute_core_logic(invoice, conn)
+        execute_core_logic(invoice, conn, prefetcher)
         processed_count += 1
     
     return processed_count > 0
         
-def execute_core_logic(invoice: InvoiceBase, conn):
+def execute_core_logic(invoice: InvoiceBase, conn, prefetcher: InvoicePrefetcher | None = None):
     """
     Execute core logic for a given invoice.
-    1. Read file
-    2. Extract products from text & save extracted products
+    With a prefetcher, the file is read from its staging area when it was prefetched,
+    and the next pending invoices are prefetched while this one is processed.
+    1. Read file (structured CSV / XLSX / XML invoices: read the line items directly)
+    2. Extract products from text & save extracted products, page by page as pages are read
     3. Run matching process & save matching results
     """
     try: 
@@ -60,27 +70,59 @@ def execute_core_logic(invoice: InvoiceBase, conn):
             return
         full_url = base_url + str(invoice.invoice_url)
         
-        read_file = read_pdf_file(
-            full_url,
-            is_extract_all=True,
-            is_check_invoice_template=True,
-        )
+        local_path = None
+        if prefetcher:
+            local_path = prefetcher.take(invoice)
+            # This invoice is PROCESSING now, so the look-ahead starts with the next one
+            prefetcher.refresh()
         
-        if not (read_file.success and read_file.full_text and read_file.invoice_template):
-            raise Exception(f"Read File Failed: {read_file.error_message}")
-        
-        # 2. Extract products from text & save extracted products
-        raw_products = extract_products_from_text(
-            full_text=read_file.full_text,
-            invoice_template=read_file.invoice_template,
-            invoice_id=invoice.invoice_id,
-        )
-        if not raw_products:
+        file_type = get_file_type(invoice.file_type, invoice.original_file_name)
+        if is_structured_file_type(file_type):
+            # 1-2. Structured e-invoice: line items without PDF text extraction or OCR
+            raw_products = read_structured_invoice(
+                local_path or full_url, file_type, invoice.invoice_id
+            )
+            if not raw_products:
+                raise Exception("No products extracted from the invoice")
+            save_extract_products = save_extracted_products(raw_products, conn=conn)
+        else:
+            # Pages are read (and OCR'd) in the background while earlier pages are parsed and saved
+            # Leaving the block (also on an error) stops the read
+            with PdfPageStream(
+                local_path or full_url,
+                is_extract_all=True,
+                is_check_invoice_template=True,
+            ) as page_stream:
+                pages = iter(page_stream)
+                first_page = next(pages, None)
+
+                # 2. Extract products from text & save extracted products
+                save_extract_products = []
+                if first_page and first_page.invoice_template:
+                    page_texts = itertools.chain([first_page.text], (page.text for page in pages))
+                    for page_products in extract_products_from_pages(
+                        page_texts, first_page.invoice_template, invoice.invoice_id
+                    ):
+                        if not page_products:
+                            continue
+                        saved_products = save_extracted_products(page_products, conn=conn)
+                        if not saved_products:
+                            # The transaction is aborted: fail the invoice (rolled back below)
+                            # rather than keep the pages saved so far
+                            raise Exception("Failed to save extracted products")
+                        save_extract_products.extend(saved_products)
+                # Drain the stream so the read has finished and its response is set
+                for _ in pages:
+                    pass
+
+            read_file = page_stream.response
+            if not (read_file.success and read_file.full_text and read_file.invoice_template):
+                raise Exception(f"Read File Failed: {read_file.error_message}")
+        if not save_extract_products:
             raise Exception("No products extracted from the invoice")
         
-        # print_extracted_products(raw_products)
+        # print_extracted_products(save_extract_products)
         
-        save_extract_products = save_extracted_products(raw_products, conn=conn)
         update_invoice_status(invoice.invoice_id, InvoiceStatus.EXTRACTED, conn=conn)
         conn.commit()
         
@@ -116,6 +158,9 @@ def execute_core_logic(invoice: InvoiceBase, conn):
         print(f"❌ Error processing invoice ID {invoice.invoice_id}: {repr(e)}")
         update_invoice_status(invoice.invoice_id, InvoiceStatus.FAILED, error_message=str(e), conn=conn)
         conn.commit()
+    finally:
+        if prefetcher:
+            prefetcher.release(invoice.invoice_id)
         
         
 def main_worker(mode="realtime", poll_interval=5):
@@ -35,6 +35,36 @@ def get_oldest_pending_invoice(conn=None) -> Optional[InvoiceBase]:
         if is_local_conn and conn:
             conn.close()
 
+def get_next_pending_invoices(limit: int, conn=None) -> list[InvoiceBase]:
+    """
+    Peek at the next pending invoices (oldest first) without locking or claiming them.
+    Meant for a separate connection, so the worker's transaction is not touched.
+    """
+    is_local_conn = False
+    if conn is None:
+        conn = get_db_connection(autocommit=True)
+        is_local_conn = True
+        if conn is None:
+            return []
+
+    try:
+        with conn.cursor() as cur:
+            query = """
+                SELECT * FROM invoice 
+                WHERE status = %s 
+                ORDER BY created_at ASC 
+                LIMIT %s
+            """
+            cur.execute(query, (InvoiceStatus.PENDING.value, limit))
+            return [InvoiceBase.model_validate(row) for row in cur.fetchall()]
+
+    except Exception as e:
+        print(f"Error: {e}")
+        return []
+    finally:
+        if is_local_conn and conn:
+            conn.close()
+
 def update_invoice_status(invoice_id: UUID, status: InvoiceStatus, error_message: str | None = None, conn=None) -> bool:
     is_local_conn = False
     if conn is None:
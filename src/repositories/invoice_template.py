@@ -0,0 +1,21 @@
+from src.db.config import get_db_connection
+
+def get_active_invoice_templates() -> dict[str, dict]:
+    """
+    Query active supplier templates (invoice_template table: name, config JSONB, is_active).
+    Returns {name: config} in name order, or an empty dict if not found.
+    """
+    conn = get_db_connection()
+    if conn is None:
+        return {}
+
+    try:
+        with conn.cursor() as cur:
+            query = "SELECT name, config FROM invoice_template WHERE is_active = TRUE ORDER BY name"
+            cur.execute(query)
+            return {row["name"]: row["config"] for row in cur.fetchall()}
+    except Exception as e:
+        print(f"Error querying invoice templates: {e}")
+        return {}
+    finally:
+        conn.close()
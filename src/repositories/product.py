@@ -1,6 +1,7 @@
+from psycopg import errors
 from src.db.config import get_db_connection
 from typing import List
-from src.schemas.product import ProductBase, ProductFuzzyCandidate
+from src.schemas.product import ProductBase, ProductFuzzyCandidate, ProductNormalizedName
 
 def get_all_products() -> List[ProductBase]:
     """
@@ -57,27 +58,42 @@ def get_products_by_identifiers(
     return products
 
 
+# Product columns of fuzzy candidates, with and without the normalization columns
+# (src/db/migrations/001_product_normalized_name.sql)
+FUZZY_CANDIDATE_COLUMNS = """p.id, p.name, p.normalized_name, p.normalizer_version,
+    p.pack_count, p.pack_size, p.pack_unit"""
+LEGACY_FUZZY_CANDIDATE_COLUMNS = "p.id, p.name"
+
 def get_products_by_categories(search_categories: List[str]) -> List[ProductFuzzyCandidate]:
     """
-    Query products that belong to any of the specified categories.
+    Query products that belong to any of the specified categories,
+    with their precomputed normalized names and pack sizes.
+    On a database without the normalization columns, only id and name are read
+    (names are then normalized on the fly).
     """
     conn = get_db_connection()
     if conn is None:
         return []
 
     query = """
-        SELECT DISTINCT p.id, p.name
+        SELECT DISTINCT {columns}
         FROM product p
         JOIN product_category pc ON p.id = pc.product_id
         WHERE pc.main_category = ANY(%s)
            OR pc.second_category = ANY(%s)
            OR pc.third_category = ANY(%s)
     """
+    params = (search_categories, search_categories, search_categories)
     
     products = []
     try:
         with conn.cursor() as cursor:
-            cursor.execute(query, (search_categories, search_categories, search_categories))
+            try:
+                cursor.execute(query.format(columns=FUZZY_CANDIDATE_COLUMNS), params)
+            except errors.UndefinedColumn as e:
+                print(f"⚠️ Warning: product normalization columns missing, run the migration ({e})")
+                conn.rollback()
+                cursor.execute(query.format(columns=LEGACY_FUZZY_CANDIDATE_COLUMNS), params)
             rows = cursor.fetchall()
             for row in rows:
                 products.append(ProductFuzzyCandidate.model_validate(row))
@@ -86,4 +102,66 @@ def get_products_by_categories(search_categories: List[str]) -> List[ProductFuzz
     finally:
         conn.close()
         
-    return products
\ No newline at end of file
+    return products
+
+def get_products_to_normalize(normalizer_version: int) -> List[ProductBase]:
+    """
+    Products without normalized values from this normalizer version
+    (new or renamed products: see the product_normalized_name_reset trigger).
+    Both conditions can use product_normalizer_version_idx, unlike IS DISTINCT FROM.
+    """
+    conn = get_db_connection()
+    if conn is None:
+        return []
+
+    products = []
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT * FROM product WHERE normalizer_version < %s OR normalizer_version IS NULL",
+                (normalizer_version,),
+            )
+            for row in cur.fetchall():
+                products.append(ProductBase.model_validate(row))
+    except Exception as e:
+        print(f"Error retrieving products to normalize: {e}")
+    finally:
+        conn.close()
+    return products
+
+
+def bulk_save_product_normalized_names(results: List[ProductNormalizedName]) -> bool:
+    """
+    Store precomputed normalized names and pack sizes on the product table
+    (normalized_name TEXT, normalizer_version INTEGER,
+    pack_count INTEGER, pack_size NUMERIC, pack_unit TEXT).
+    """
+    conn = get_db_connection()
+    if conn is None:
+        return False
+
+    query = """
+        UPDATE product
+        SET normalized_name = %s, normalizer_version = %s,
+            pack_count = %s, pack_size = %s, pack_unit = %s
+        WHERE id = %s
+    """
+    values = [
+        (
+            r.normalized_name, r.normalizer_version,
+            r.pack_count, r.pack_size, r.pack_unit, str(r.product_id),
+        )
+        for r in results
+    ]
+
+    try:
+        with conn.cursor() as cur:
+            cur.executemany(query, values)
+        conn.commit()
+        return True
+    except Exception as e:
+        print(f"❌ Error saving normalized product names: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
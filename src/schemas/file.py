@@ -11,4 +11,29 @@ class FileReadResponse(BaseModel):
     # first_line: Optional[str] = None
     full_text: Optional[str] = None
     error_message: Optional[str] = None
-    invoice_template: Optional[InvoiceTemplate] = InvoiceTemplate.UNKNOWN
\ No newline at end of file
+    # Built-in templates are InvoiceTemplate members, registry-only templates plain names
+    invoice_template: Optional[InvoiceTemplate | str] = InvoiceTemplate.UNKNOWN
+    # Scanned pages re-OCR'd at full DPI after a low-confidence first pass (adaptive DPI mode)
+    ocr_escalations: Optional[int] = None
+    # Pages after the end-of-items marker that were not read (early stop)
+    skipped_pages: Optional[int] = None
+
+class CachedReadResult(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    page_count: int
+    full_text: Optional[str] = None
+    invoice_template: InvoiceTemplate | str = InvoiceTemplate.UNKNOWN
+    skipped_pages: int = 0
+
+
+class DownloadResult(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    url: str
+    path: Optional[str] = None
+    size: int = 0
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    not_modified: bool = False
+    resumed: bool = False
@@ -4,6 +4,15 @@ from src.constants.enums import ProductStatus
 from uuid import UUID
 from datetime import datetime
 
+class PackSize(BaseModel):
+    """
+    Pack size parsed from a product name, e.g. "12 x 500ml": count=12, size=500, unit="ml".
+    size is per item, in the base unit (g or ml).
+    """
+    count: int = Field(1, ge=1)
+    size: float = Field(..., gt=0)
+    unit: str
+
 class ProductBase(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -19,9 +28,28 @@ class ProductBase(BaseModel):
     unit_cost: Optional[float] = Field(None, ge=0)
     status: ProductStatus = ProductStatus.ACTIVE
     # supplier_id: Optional[UUID] = None
+    # Precomputed by the normalization job (see NORMALIZER_VERSION)
+    normalized_name: Optional[str] = None
+    normalizer_version: Optional[int] = None
+    pack_count: Optional[int] = None
+    pack_size: Optional[float] = None
+    pack_unit: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     
 class ProductFuzzyCandidate(BaseModel):
     id: UUID
-    name: str
\ No newline at end of file
+    name: str
+    normalized_name: Optional[str] = None
+    normalizer_version: Optional[int] = None
+    pack_count: Optional[int] = None
+    pack_size: Optional[float] = None
+    pack_unit: Optional[str] = None
+
+class ProductNormalizedName(BaseModel):
+    product_id: UUID
+    normalized_name: str
+    normalizer_version: int
+    pack_count: Optional[int] = None
+    pack_size: Optional[float] = None
+    pack_unit: Optional[str] = None
\ No newline at end of file
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from src.constants.enums import MatchType, ExtractionStatus
+from src.schemas.product import PackSize
 from uuid import UUID
 
 class ProductExtract(BaseModel):
@@ -30,4 +31,6 @@ class ProductExtractMatching(ProductExtractCategorization):
     matched_product_id: Optional[UUID] = None 
     match_type: MatchType = MatchType.NONE
     confidence: Optional[float] = Field(0.0, ge=0.0, le=1.0)
-    match_reason: Optional[str] = None
\ No newline at end of file
+    match_reason: Optional[str] = None
+    # Parsed from raw_product_name for matching, not saved
+    pack_size: Optional[PackSize] = None
\ No newline at end of file
@@ -136,6 +136,17 @@ def select_top_categories(
     # Calculate total score of all categories
     total_score = sum(item[1]["score"] for item in sorted_items)
 
+    return build_top_categories(product_id, sorted_items, total_score)
+
+def build_top_categories(
+    product_id: uuid.UUID,
+    sorted_items: list,
+    total_score: float
+) -> ProductCategory:
+    """
+    Top 3 categories and their ratios from categories sorted by score descending
+    (only the first 3 are used) and the total score of all categories
+    """
     main_category, main_ratio = get_tier_info(0, sorted_items, total_score)
     second_category, second_ratio = get_tier_info(1, sorted_items, total_score)
     third_category, third_ratio = get_tier_info(2, sorted_items, total_score)
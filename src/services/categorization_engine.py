@@ -0,0 +1,179 @@
+"""
+Batched categorization with sparse matrices.
+The category dictionary is compiled once into a sparse term x category matrix, a batch of
+normalized names into a sparse names x term matrix of counts, and all category scores come
+from one sparse matrix product; the top-3 selection and ratios are select_top_categories'.
+
+A term is a (dictionary keyword, token position) pair: the keyword score of get_scored_keywords
+only depends on the position (capped at 9, where it bottoms out) and the keyword's dictionary
+frequency, so each matrix entry holds the rounded contribution round(keyword score * weight, 2).
+That is calculate_category_scores' score for a category with one contribution; the scores it
+rounds at each addition (round(score + contribution, 2)) are recomputed that way.
+"""
+import numpy as np
+from itertools import chain
+from scipy import sparse
+from typing import List, Optional, Sequence
+from uuid import UUID
+from src.schemas.category_dictionary import CategoryDictionary
+from src.schemas.product_category import ProductCategory
+from src.services.categorization import prepare_frequency_map, build_top_categories
+
+# Names per sparse product
+CATEGORIZATION_BATCH_SIZE = 20_000
+
+# Token positions with their own keyword score (get_scored_keywords: 1.0 - 0.1 * position, min 0.1)
+SCORED_POSITIONS = 10
+
+class CategorizationEngine:
+    """
+    Category dictionary compiled for batch scoring.
+    """
+
+    def __init__(self, dictionary_rules: List[CategoryDictionary]):
+        frequency_map = prepare_frequency_map(dictionary_rules)
+        self.keywords: dict[str, int] = {}
+        self.category_codes: list[str] = []
+        category_index: dict[str, int] = {}
+        # (category, weight) of each keyword's rules in rule order (the order calculate_category_scores meets them)
+        keyword_rules: list[list[tuple[int, float]]] = []
+        # get_scored_keywords score of each keyword at each scored position
+        keyword_scores: list[list[float]] = []
+        rule_terms, rule_categories, rule_contributions = [], [], []
+
+        for rule in dictionary_rules:
+            keyword = rule.keyword.lower()
+            if keyword not in self.keywords:
+                self.keywords[keyword] = len(self.keywords)
+                keyword_rules.append([])
+                num_appearances = frequency_map[keyword]
+                dictionary_score = 1.0 / num_appearances if num_appearances > 0 else 0.3
+                keyword_scores.append([
+                    round(max(0.1, 1.0 - (position * 0.1)) * dictionary_score, 2)
+                    for position in range(SCORED_POSITIONS)
+                ])
+            if rule.category_code not in category_index:
+                category_index[rule.category_code] = len(self.category_codes)
+                self.category_codes.append(rule.category_code)
+            keyword_id = self.keywords[keyword]
+            category = category_index[rule.category_code]
+            keyword_rules[keyword_id].append((category, rule.weight))
+
+            for position, keyword_score in enumerate(keyword_scores[keyword_id]):
+                rule_terms.append(keyword_id * SCORED_POSITIONS + position)
+                rule_categories.append(category)
+                rule_contributions.append(round(keyword_score * rule.weight, 2))
+
+        # term x category contributions
+        self.weights = sparse.csr_matrix(
+            (rule_contributions, (rule_terms, rule_categories)),
+            shape=(len(self.keywords) * SCORED_POSITIONS, len(self.category_codes)),
+        )
+        # keyword -> rules (category, weight) in rule order, as CSR-style arrays
+        self._rule_ptr = np.zeros(len(keyword_rules) + 1, dtype=np.int64)
+        np.cumsum([len(rules) for rules in keyword_rules], out=self._rule_ptr[1:])
+        self._rule_categories = np.fromiter(
+            (category for category, _ in chain.from_iterable(keyword_rules)), dtype=np.int64, count=int(self._rule_ptr[-1])
+        )
+        self._rule_weights = np.fromiter(
+            (weight for _, weight in chain.from_iterable(keyword_rules)), dtype=np.float64, count=int(self._rule_ptr[-1])
+        )
+        self._keyword_scores = np.asarray(keyword_scores, dtype=np.float64).reshape(-1, SCORED_POSITIONS)
+
+    def _keyword_occurrences(self, normalized_names: Sequence[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (row, keyword, token position) of every dictionary keyword in the names, in token order.
+        """
+        token_lists = [(name or "").split() for name in normalized_names]
+        lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+        keywords = self.keywords
+        keyword_ids = np.fromiter(
+            (keywords.get(token, -1) for token in chain.from_iterable(token_lists)),
+            dtype=np.int64, count=int(lengths.sum()),
+        )
+        rows = np.repeat(np.arange(len(token_lists)), lengths)
+        positions = np.arange(len(keyword_ids)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+        in_dictionary = keyword_ids >= 0
+        return rows[in_dictionary], keyword_ids[in_dictionary], positions[in_dictionary]
+
+    def categorize_batch(
+        self, product_ids: Sequence[UUID], normalized_names: Sequence[str]
+    ) -> List[Optional[ProductCategory]]:
+        """
+        Top categories of each name (None when no dictionary keyword is in it).
+        """
+        name_count = len(normalized_names)
+        category_count = len(self.category_codes)
+        rows, keyword_ids, positions = self._keyword_occurrences(normalized_names)
+        if len(rows) == 0:
+            return [None] * name_count
+
+        # names x term occurrence counts, then every category score in one product
+        positions = np.minimum(positions, SCORED_POSITIONS - 1)
+        terms = keyword_ids * SCORED_POSITIONS + positions
+        term_counts = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, terms)), shape=(name_count, self.weights.shape[0])
+        )
+        category_scores = (term_counts @ self.weights).tocsr()
+
+        # Every keyword occurrence expanded into its rules, in the order calculate_category_scores
+        # adds them (token order, then rule order)
+        counts = self._rule_ptr[keyword_ids + 1] - self._rule_ptr[keyword_ids]
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        expanded_rules = np.repeat(self._rule_ptr[keyword_ids], counts) + offsets
+        pairs = np.repeat(rows, counts) * category_count + self._rule_categories[expanded_rules]
+        unique_pairs, first_seen, contribution_counts = np.unique(pairs, return_index=True, return_counts=True)
+        pair_rows, pair_categories = np.divmod(unique_pairs, category_count)
+
+        # One contribution: the matrix entry (rounding only removes float noise)
+        scores = np.round(np.asarray(category_scores[pair_rows, pair_categories]).ravel(), 2)
+
+        # Several: rounded at each addition, in order, as calculate_category_scores does
+        repeated = np.flatnonzero(contribution_counts > 1)
+        if len(repeated):
+            contributions = (
+                np.repeat(self._keyword_scores[keyword_ids, positions], counts) * self._rule_weights[expanded_rules]
+            )
+            by_pair = np.argsort(pairs, kind="stable")
+            pair_starts = np.cumsum(contribution_counts) - contribution_counts
+            for pair in repeated.tolist():
+                score = 0.0
+                start = pair_starts[pair]
+                for contribution in contributions[by_pair[start:start + contribution_counts[pair]]].tolist():
+                    score = round(score + contribution, 2)
+                scores[pair] = score
+
+        # Score descending, ties in first-met order (the stable sort of select_top_categories)
+        order = np.lexsort((first_seen, -scores, pair_rows))
+        row_starts = np.searchsorted(pair_rows[order], np.arange(name_count + 1)).tolist()
+        top_categories = [self.category_codes[c] for c in pair_categories[order].tolist()]
+        top_scores = scores[order].tolist()
+
+        results: List[Optional[ProductCategory]] = []
+        for row, product_id in enumerate(product_ids):
+            start, end = row_starts[row], row_starts[row + 1]
+            if start == end:
+                results.append(None)
+                continue
+            sorted_items = [(top_categories[i], {"score": top_scores[i]}) for i in range(start, min(start + 3, end))]
+            # Summed in sorted order, as select_top_categories does
+            total_score = sum(top_scores[start:end])
+            results.append(build_top_categories(product_id, sorted_items, total_score))
+        return results
+
+    def categorize(
+        self,
+        product_ids: Sequence[UUID],
+        normalized_names: Sequence[str],
+        batch_size: int = CATEGORIZATION_BATCH_SIZE,
+    ) -> List[Optional[ProductCategory]]:
+        """
+        Top categories of each name, by batches of batch_size names.
+        """
+        results: List[Optional[ProductCategory]] = []
+        for start in range(0, len(product_ids), batch_size):
+            results.extend(self.categorize_batch(
+                product_ids[start:start + batch_size], normalized_names[start:start + batch_size]
+            ))
+        return results
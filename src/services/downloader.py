@@ -0,0 +1,164 @@
+"""
+HTTP downloader for invoice files.
+Uses one shared keep-alive session (connection pool) and streams bodies to disk in chunks.
+"""
+import os
+import time
+import tempfile
+import requests
+from typing import Optional, BinaryIO
+from requests.adapters import HTTPAdapter
+from src.schemas.file import DownloadResult
+
+# (connect, read) timeouts in seconds
+DOWNLOAD_TIMEOUT = (10, 30)
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_http_session: requests.Session | None = None
+
+def get_download_retries() -> int:
+    return int(os.getenv("DOWNLOAD_MAX_RETRIES", "3"))
+
+def get_download_backoff() -> float:
+    return float(os.getenv("DOWNLOAD_BACKOFF_SECONDS", "0.5"))
+
+def get_http_session() -> requests.Session:
+    """
+    Get or create the shared HTTP session.
+    Connections to the storage host are kept alive and reused across downloads.
+    Pool size: DOWNLOAD_POOL_SIZE (default 10).
+    The adapter does not retry: download_to_stream owns the single retry budget.
+    """
+    global _http_session
+
+    if _http_session is not None:
+        return _http_session
+
+    pool_size = int(os.getenv("DOWNLOAD_POOL_SIZE", "10"))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    _http_session = session
+    return _http_session
+
+def download_file(
+    url: str,
+    dest_path: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+) -> DownloadResult:
+    """
+    Stream a file to dest_path without buffering the whole body in memory.
+    The body goes to a temporary file next to dest_path, which replaces dest_path only once
+    complete: on 304 Not Modified or an error, an existing dest_path is left untouched.
+    See download_to_stream for conditional requests and resume behaviour.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dest_path)), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            result = download_to_stream(url, f, etag, last_modified, chunk_size)
+        if not result.not_modified:
+            os.replace(temp_path, dest_path)
+            result.path = dest_path
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return result
+
+def download_to_stream(
+    url: str,
+    stream: BinaryIO,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+) -> DownloadResult:
+    """
+    Stream the body into a seekable binary stream (a file or io.BytesIO), chunk by chunk.
+    - etag / last_modified: send a conditional request; a 304 returns not_modified=True
+      and leaves the stream empty (the caller keeps its existing copy).
+    - Connection errors, timeouts and 429/5xx responses are retried with exponential backoff:
+      DOWNLOAD_MAX_RETRIES (default 3) attempts in total, DOWNLOAD_BACKOFF_SECONDS (default 0.5).
+    - If the connection drops mid-body, the download resumes with a Range request
+      (bounded by DOWNLOAD_MAX_RETRIES) made conditional on the first response's ETag or
+      Last-Modified (If-Range); a full 200 reply (object changed, or Range ignored) and a
+      first response without a validator restart from zero.
+    Raises requests exceptions (e.g. HTTPError) on failure.
+    """
+    session = get_http_session()
+    max_retries = get_download_retries()
+    backoff = get_download_backoff()
+
+    conditional_headers = {}
+    if etag:
+        conditional_headers["If-None-Match"] = etag
+    if last_modified:
+        conditional_headers["If-Modified-Since"] = last_modified
+
+    written = 0
+    attempts = 0
+    resumed = False
+    # If-Range validator of the response being resumed (strong ETag, else Last-Modified)
+    resume_validator = None
+
+    while True:
+        headers = conditional_headers
+        if written and resume_validator:
+            headers = {"Range": f"bytes={written}-", "If-Range": resume_validator}
+        try:
+            with session.get(
+                url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT
+            ) as response:
+                if response.status_code == 304:
+                    return DownloadResult(
+                        url=url,
+                        etag=etag,
+                        last_modified=last_modified,
+                        not_modified=True,
+                    )
+                if response.status_code in RETRY_STATUS_CODES and attempts < max_retries:
+                    attempts += 1
+                    print(f"⚠️ Warning: Download got HTTP {response.status_code}, retrying...")
+                    time.sleep(backoff * (2 ** (attempts - 1)))
+                    continue
+                response.raise_for_status()
+
+                if written and response.status_code != 206:
+                    # Object changed since the first attempt, Range not supported or no validator:
+                    # start over
+                    stream.seek(0)
+                    stream.truncate()
+                    written = 0
+                elif written:
+                    resumed = True
+                if not written:
+                    response_etag = response.headers.get("ETag")
+                    if response_etag and not response_etag.startswith("W/"):
+                        resume_validator = response_etag
+                    else:
+                        resume_validator = response.headers.get("Last-Modified")
+
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    stream.write(chunk)
+                    written += len(chunk)
+
+                return DownloadResult(
+                    url=url,
+                    size=written,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    resumed=resumed,
+                )
+        except (
+            requests.exceptions.ChunkedEncodingError,
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+        ) as e:
+            attempts += 1
+            if attempts > max_retries:
+                raise
+            print(f"⚠️ Warning: Download interrupted after {written} bytes ({e}), retrying...")
+            time.sleep(backoff * (2 ** (attempts - 1)))
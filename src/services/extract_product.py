@@ -1,50 +1,94 @@
 from src.schemas.product_extract import ProductExtract
-from typing import List
-from src.constants.invoice_template import TEMPLATE_CONFIGS, InvoiceTemplate
-import re
+from typing import Iterable, Iterator, List
+from src.constants.invoice_template import InvoiceTemplate
+from src.services.template_registry import get_template_registry
 from uuid import UUID
 
-def extract_products_from_text(
-    full_text: str, 
-    invoice_template: InvoiceTemplate, 
+# Lines kept back at the end of the streamed text: a record may continue on the next page
+EXTRACT_HOLD_LINES = 16
+
+def _match_to_product(match, invoice_id: UUID, currency: str) -> ProductExtract | None:
+    try:
+        group_dict = match.groupdict()
+        raw_name = group_dict.get('desc', '').strip()
+        
+        return ProductExtract(
+            invoice_id=invoice_id,
+            raw_product_name=raw_name,
+            product_code=group_dict.get('code'),
+            quantity=float(group_dict.get('qty', 0)),
+            cost_price=float(group_dict.get('price', 0)),
+            currency=currency,
+        )
+    except (ValueError, KeyError) as e:
+        print(f"❌ Error extracting products: {e}")
+        return None
+
+def extract_products_from_pages(
+    page_texts: Iterable[str],
+    invoice_template: InvoiceTemplate | str,
     invoice_id: UUID
-) -> List[ProductExtract]:
+) -> Iterator[List[ProductExtract]]:
     """
-    Extract products from the given full text based on the invoice template.
-    1. Use regex patterns defined in TEMPLATE_CONFIGS to find products.
-    2. Create ProductExtract objects for each matched product line.
+    Extract products page by page, yielding the products completed by each page.
+    Pages are joined with newlines as in read_pdf_file's full text. Matches ending in the last
+    EXTRACT_HOLD_LINES lines are held back until the next page (or the end), so a record split
+    across a page break is matched whole; records longer than that are not supported.
     """
-    products: List[ProductExtract] = []
-    
-    config = TEMPLATE_CONFIGS.get(invoice_template)
+    registry = get_template_registry()
+    config = registry.get(invoice_template)
     if not config:
         print(f"⚠️ No configuration found for template: {invoice_template}")
-        return products
+        return
     
-    pattern = config.get("pattern")
+    pattern = registry.line_parser(invoice_template)
     if not pattern:
-        print(f"⚠️ No regex pattern defined for template: {invoice_template}")
-        return products
+        print(f"⚠️ No line-item columns or regex pattern defined for template: {invoice_template}")
+        return
     
-    matches = re.finditer(pattern, full_text, flags=re.MULTILINE)
     currency = config.get("currency", "AUD")
-    
-    for match in matches:
-        try:
-            group_dict = match.groupdict()
-            raw_name = group_dict.get('desc', '').strip()
-            
-            product = ProductExtract(
-                invoice_id=invoice_id,
-                raw_product_name=raw_name,
-                product_code=group_dict.get('code'),
-                quantity=float(group_dict.get('qty', 0)),
-                cost_price=float(group_dict.get('price', 0)),
-                currency=currency,
-            )
-            products.append(product)
-        except (ValueError, KeyError) as e:
-            print(f"❌ Error extracting products: {e}")
-            continue
-    
-    return products
\ No newline at end of file
+    # Unmatched text, starting at a line start; matching resumes at pos
+    buffer = ""
+    pos = 0
+
+    def take_matches(limit: int | None) -> List[ProductExtract]:
+        nonlocal buffer, pos
+        products: List[ProductExtract] = []
+        for match in pattern.finditer(buffer, pos):
+            if limit is not None and match.end() > limit:
+                break
+            pos = match.end()
+            product = _match_to_product(match, invoice_id, currency)
+            if product:
+                products.append(product)
+        # Drop the matched lines (keeping the line the last match ended on, for ^ / lookbehinds)
+        cut = buffer.rfind("\n", 0, pos) + 1
+        buffer, pos = buffer[cut:], pos - cut
+        return products
+
+    for index, page_text in enumerate(page_texts):
+        buffer = buffer + "\n" + page_text if index else page_text
+        # Start of the held-back lines
+        limit = len(buffer)
+        for _ in range(EXTRACT_HOLD_LINES):
+            limit = buffer.rfind("\n", 0, limit)
+            if limit < 0:
+                break
+        if limit > pos:
+            yield take_matches(limit)
+    yield take_matches(None)
+
+def extract_products_from_text(
+    full_text: str, 
+    invoice_template: InvoiceTemplate | str, 
+    invoice_id: UUID
+) -> List[ProductExtract]:
+    """
+    Extract products from the given full text based on the invoice template.
+    1. Use the template's line-item parser (columns, else regex pattern) to find products.
+    2. Create ProductExtract objects for each matched product line.
+    """
+    products: List[ProductExtract] = []
+    for page_products in extract_products_from_pages([full_text], invoice_template, invoice_id):
+        products.extend(page_products)
+    return products
@@ -0,0 +1,145 @@
+import os
+import time
+import numpy as np
+from PIL import Image
+
+# Steps run in this order, whatever order OCR_PREPROCESS lists them in
+PREPROCESS_STEPS = ("grayscale", "downscale", "binarize", "deskew")
+# Long side of an A4 page at 300 DPI: larger scans are reduced to about this size
+PREPROCESS_MAX_SIDE = 3508
+# Deskew: candidate angles (degrees) and the long side of the image used to score them
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_ANGLE_STEP = 0.25
+DESKEW_SAMPLE_SIDE = 1000
+# ITU-R BT.601 luma weights (same as PIL's convert("L"))
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+def get_preprocess_steps(steps: str | None = None) -> tuple[str, ...]:
+    """
+    Preprocessing steps to run before OCR: argument, else OCR_PREPROCESS
+    (comma separated, e.g. "grayscale,binarize" or "all"). Empty means no preprocessing.
+    """
+    value = steps if steps is not None else os.getenv("OCR_PREPROCESS", "")
+    requested = {step.strip().lower() for step in value.split(",") if step.strip()}
+    if "all" in requested:
+        return PREPROCESS_STEPS
+
+    unknown = requested.difference(PREPROCESS_STEPS)
+    if unknown:
+        print(f"⚠️ Unknown OCR_PREPROCESS steps ignored: {', '.join(sorted(unknown))}")
+    return tuple(step for step in PREPROCESS_STEPS if step in requested)
+
+# --- Steps (uint8 arrays in, uint8 arrays out) ---
+
+def to_grayscale(pixels: np.ndarray) -> np.ndarray:
+    """
+    RGB(A) -> 8-bit luma. Grayscale input is returned as is.
+    """
+    if pixels.ndim == 2:
+        return pixels
+    luma = pixels[..., :3].astype(np.float32) @ LUMA_WEIGHTS
+    return np.clip(luma + 0.5, 0, 255).astype(np.uint8)
+
+def downscale(pixels: np.ndarray, max_side: int = PREPROCESS_MAX_SIDE) -> np.ndarray:
+    """
+    Reduce oversized scans by an integer factor, averaging each factor x factor block.
+    """
+    factor = -(-max(pixels.shape[:2]) // max_side)
+    if factor <= 1:
+        return pixels
+
+    height = pixels.shape[0] // factor * factor
+    width = pixels.shape[1] // factor * factor
+    blocks = pixels[:height, :width].reshape(
+        height // factor, factor, width // factor, factor, *pixels.shape[2:]
+    )
+    return blocks.mean(axis=(1, 3)).round().astype(np.uint8)
+
+def otsu_threshold(gray: np.ndarray) -> int | None:
+    """
+    Otsu's threshold: the gray level maximizing the between-class variance of the histogram.
+    None for a uniform image (a single gray level, e.g. a blank page): there is nothing to separate.
+    """
+    histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    if np.count_nonzero(histogram) < 2:
+        return None
+    weight_dark = np.cumsum(histogram)
+    weight_light = weight_dark[-1] - weight_dark
+    cumulative_mean = np.cumsum(histogram * np.arange(256))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_dark = cumulative_mean / weight_dark
+        mean_light = (cumulative_mean[-1] - cumulative_mean) / weight_light
+        between = weight_dark * weight_light * (mean_dark - mean_light) ** 2
+    return int(np.nanargmax(between))
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    """
+    Black text (0) on white (255), thresholded with Otsu's method (uniform images are left as is).
+    """
+    threshold = otsu_threshold(gray)
+    if threshold is None:
+        return gray
+    return np.where(gray > threshold, 255, 0).astype(np.uint8)
+
+def estimate_skew(gray: np.ndarray) -> float:
+    """
+    Skew angle (degrees) of the text lines: the angle whose projection of the dark pixels
+    onto the vertical axis gives the sharpest row profile (highest sum of squares).
+    """
+    step = max(1, -(-max(gray.shape) // DESKEW_SAMPLE_SIDE))
+    sample = gray[::step, ::step]
+    threshold = otsu_threshold(sample)
+    if threshold is None:
+        return 0.0
+    rows, cols = np.nonzero(sample <= threshold)
+    if rows.size == 0:
+        return 0.0
+
+    angles = np.arange(-DESKEW_MAX_ANGLE, DESKEW_MAX_ANGLE + DESKEW_ANGLE_STEP / 2, DESKEW_ANGLE_STEP)
+    radians = np.deg2rad(angles)
+    # One row per candidate angle: projected row index of every dark pixel
+    projected = rows[None, :] * np.cos(radians)[:, None] - cols[None, :] * np.sin(radians)[:, None]
+    projected = np.round(projected - projected.min(axis=1, keepdims=True)).astype(np.int64)
+
+    scores = [np.square(np.bincount(row)).sum() for row in projected]
+    return float(angles[int(np.argmax(scores))])
+
+def deskew(gray: np.ndarray) -> np.ndarray:
+    """
+    Rotate the page so text lines are horizontal (white fill at the corners).
+    """
+    angle = estimate_skew(gray)
+    if angle == 0.0:
+        return gray
+    rotated = Image.fromarray(gray).rotate(
+        angle, resample=Image.Resampling.BILINEAR, fillcolor=255
+    )
+    return np.asarray(rotated)
+
+# --- Pipeline ---
+
+def preprocess_image(img: Image.Image, steps: tuple[str, ...]) -> tuple[Image.Image, dict[str, float]]:
+    """
+    Run the preprocessing steps on a page image.
+    Returns (image for OCR, elapsed milliseconds per step).
+    Binarize and deskew work on grayscale, so they convert the image first if needed.
+    """
+    timings: dict[str, float] = {}
+    if not steps:
+        return img, timings
+
+    pixels = np.asarray(img)
+    for step in steps:
+        start = time.perf_counter()
+        if step == "grayscale":
+            pixels = to_grayscale(pixels)
+        elif step == "downscale":
+            pixels = downscale(pixels)
+        elif step == "binarize":
+            pixels = binarize(to_grayscale(pixels))
+        elif step == "deskew":
+            pixels = deskew(to_grayscale(pixels))
+        timings[step] = (time.perf_counter() - start) * 1000
+
+    return Image.fromarray(pixels), timings
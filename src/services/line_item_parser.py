@@ -0,0 +1,166 @@
+"""
+Template-driven line-item parser.
+The text is split into whitespace tokens once; a record is a run of tokens assigned to the
+template's columns ("columns" in the template config) by position and type, instead of a
+regex with lazy groups. Each record attempt costs at most (tokens on the description line)
+x (number of columns), so extraction time stays linear in the text size whatever the OCR noise.
+
+Column types:
+- "token": any token
+- "int": digits only
+- "number": digits, "," and "." only
+- "unit": one of the column's "values" (exact match)
+- "text": one or more tokens on a single line, ending where the following columns match
+  (at most one per template, like a lazy .+? group)
+A column with "line_end": true is the last token of the line of the previous column; the tokens
+in between are skipped.
+
+A record starts on the first token of a line, and its columns may continue on the following
+lines (except "text" and "line_end" columns, see above).
+"""
+import re
+from typing import Iterator
+
+COLUMN_TYPES = ("token", "int", "number", "unit", "text")
+
+_TOKEN = re.compile(r"\S+")
+_NUMBER_CHARS = frozenset("0123456789,.")
+
+class LineItemMatch:
+    """
+    One parsed record, with the same accessors as a regex match (groupdict, start, end).
+    """
+
+    def __init__(self, fields: dict[str, str], start: int, end: int):
+        self._fields = fields
+        self._start = start
+        self._end = end
+
+    def groupdict(self) -> dict[str, str]:
+        return dict(self._fields)
+
+    def start(self) -> int:
+        return self._start
+
+    def end(self) -> int:
+        return self._end
+
+class LineItemParser:
+    """
+    Parser for one template's column spec. finditer(text, pos) yields LineItemMatch objects
+    in text order, like re.Pattern.finditer with ^ in MULTILINE mode.
+    """
+
+    def __init__(self, columns: list[dict]):
+        if not columns:
+            raise ValueError("No columns defined")
+        for column in columns:
+            if column.get("type") not in COLUMN_TYPES:
+                raise ValueError(f"Unknown column type: {column.get('type')}")
+        text_columns = [i for i, column in enumerate(columns) if column["type"] == "text"]
+        if len(text_columns) > 1:
+            raise ValueError("At most one text column is supported")
+        if text_columns and columns[text_columns[0]].get("line_end"):
+            raise ValueError("A text column cannot be a line_end column")
+        if columns[0].get("line_end"):
+            raise ValueError("The first column cannot be a line_end column")
+
+        self.columns = columns
+        # (name, type, line_end, unit values) per column
+        compiled = [
+            (column["name"], column["type"], bool(column.get("line_end")), frozenset(column.get("values", [])))
+            for column in columns
+        ]
+        # Columns before the text column, and after it
+        split = text_columns[0] if text_columns else len(columns)
+        self._head = compiled[:split]
+        self._tail = compiled[split + 1:]
+        self._text_name = columns[split]["name"] if text_columns else None
+        if self._text_name and not self._tail:
+            raise ValueError("A text column needs a column after it")
+
+    @staticmethod
+    def _accepts(kind: str, values: frozenset, value: str) -> bool:
+        if kind == "token":
+            return True
+        if kind == "int":
+            return value.isdecimal()
+        if kind == "number":
+            return all(char in _NUMBER_CHARS for char in value)
+        return value in values
+
+    def _match_columns(self, columns: list[tuple], tokens: list[tuple], line_last: list[int], index: int) -> list[int] | None:
+        """
+        Token index of each column, the first one at tokens[index]; None if they do not match.
+        """
+        positions = []
+        for _, kind, line_end, values in columns:
+            if line_end:
+                # Last token of the previous column's line, at least one token further
+                if index >= len(tokens) or line_last[tokens[index - 1][2]] <= index:
+                    return None
+                index = line_last[tokens[index - 1][2]]
+            if index >= len(tokens) or not self._accepts(kind, values, tokens[index][3]):
+                return None
+            positions.append(index)
+            index += 1
+        return positions
+
+    def _match_record(self, tokens: list[tuple], line_last: list[int], index: int):
+        """
+        (token index per head + tail column, (first, last) token of the text column)
+        of the record starting at tokens[index], or None.
+        """
+        head = self._match_columns(self._head, tokens, line_last, index)
+        if head is None:
+            return None
+        if self._text_name is None:
+            return head, None
+
+        text_start = index + len(self._head)
+        if text_start >= len(tokens):
+            return None
+        # Shortest text (like a lazy group), within its line
+        for text_end in range(text_start, line_last[tokens[text_start][2]] + 1):
+            tail = self._match_columns(self._tail, tokens, line_last, text_end + 1)
+            if tail is not None:
+                return head + tail, (text_start, text_end)
+        return None
+
+    def finditer(self, text: str, pos: int = 0) -> Iterator[LineItemMatch]:
+        # (start, end, line number, value, first token of a line) per token
+        tokens: list[tuple] = []
+        line = 0
+        previous_end = pos
+        # pos is a line start (like ^) only at the start of the text or after a newline
+        at_line_start = pos == 0 or text[pos - 1] == "\n"
+        for match in _TOKEN.finditer(text, pos):
+            newlines = text.count("\n", previous_end, match.start())
+            line += newlines
+            tokens.append((match.start(), match.end(), line, match.group(), at_line_start or newlines > 0))
+            at_line_start = False
+            previous_end = match.end()
+
+        # Index of the last token of each line
+        line_last = [0] * (line + 1)
+        for index, token in enumerate(tokens):
+            line_last[token[2]] = index
+
+        index = 0
+        while index < len(tokens):
+            record = self._match_record(tokens, line_last, index) if tokens[index][4] else None
+            if record is None:
+                index += 1
+                continue
+
+            positions, text_span = record
+            fields = {
+                column[0]: tokens[position][3]
+                for column, position in zip(self._head + self._tail, positions)
+            }
+            last = positions[-1]
+            if text_span:
+                fields[self._text_name] = text[tokens[text_span[0]][0]:tokens[text_span[1]][1]]
+                last = max(last, text_span[1])
+            yield LineItemMatch(fields, tokens[index][0], tokens[last][1])
+            index = last + 1
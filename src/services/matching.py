@@ -1,3 +1,4 @@
+import os
 from typing import List, Optional, Tuple
 from rapidfuzz import process, fuzz
 from src.schemas.product import ProductBase
@@ -10,7 +11,13 @@ from src.repositories.product import (
     get_products_by_identifiers,
     get_products_by_categories,
 )
-from src.utils.text_helpers import normalize_product_name
+from src.utils.text_helpers import (
+    normalize_product_name,
+    get_product_normalized_name,
+    get_product_pack_size,
+    is_pack_size_compatible,
+    parse_pack_size,
+)
 from src.services.categorization import (
     get_scored_keywords,
     prepare_frequency_map,
@@ -27,7 +34,7 @@ def run_matching_process(
     1. Exact Matching: by product_code, sku, barcode
     2. Fuzzy Matching: by normalized product name
     2.1 Categorization: by scored keywords
-    2.2. Fuzzy Matching: by category similarity (RapidFuzz)
+    2.2. Fuzzy Matching: by category similarity (RapidFuzz), among candidates with a compatible pack size
     """
 
     # Exact Matching Preparation
@@ -41,6 +48,9 @@ def run_matching_process(
     db_by_barcode = {p.bar_code: p for p in db_products if p.bar_code}
     db_by_sku = {p.sku: p for p in db_products if p.sku}
 
+    # Fuzzy Matching: candidates must have a compatible pack size (MATCH_PACK_SIZE_BLOCKING, default true)
+    use_pack_size_blocking = os.getenv("MATCH_PACK_SIZE_BLOCKING", "true").lower() == "true"
+
     # Fuzzy Matching: Categorization Preparation
     keywords_frequency_map = prepare_frequency_map(dictionary_rules)
     category_rules_map = prepare_category_rules_map(dictionary_rules)
@@ -60,6 +70,7 @@ def run_matching_process(
         match_result.normalized_product_name = normalize_product_name(
             item.raw_product_name
         )
+        match_result.pack_size = parse_pack_size(item.raw_product_name)
 
         match_found: Optional[ProductBase] = None
 
@@ -120,10 +131,16 @@ def run_matching_process(
                     match_result.third_category,
                 ]
                 products_from_categories = get_products_by_categories(search_categories)
+                if use_pack_size_blocking:
+                    # Blocking: only candidates with a compatible pack size are scored
+                    products_from_categories = [
+                        p for p in products_from_categories
+                        if is_pack_size_compatible(match_result.pack_size, get_product_pack_size(p))
+                    ]
 
                 if products_from_categories:
                     norm_db_map = {
-                        normalize_product_name(p.name): p
+                        get_product_normalized_name(p): p
                         for p in products_from_categories
                     }
                     choices = list(norm_db_map.keys())
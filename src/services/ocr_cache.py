@@ -0,0 +1,136 @@
+"""
+Content-addressed on-disk cache for PDF text/OCR results.
+Entries are keyed by the SHA-256 of the PDF bytes plus the OCR settings,
+so a retried or re-uploaded invoice skips rasterization and tesseract.
+"""
+import os
+import json
+import hashlib
+import tempfile
+from typing import Optional
+from src.schemas.file import CachedReadResult
+
+CACHE_FILE_SUFFIX = ".json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_ocr_cache: "OcrResultCache | None" = None
+
+def hash_pdf_file(path: str) -> str:
+    """
+    SHA-256 of the file content, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_pdf_bytes(data) -> str:
+    """
+    SHA-256 of an in-memory PDF (bytes, memoryview or mmap), without copying it.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+class OcrResultCache:
+    """
+    Directory of JSON entries (one file per key) with a total size cap.
+    Least recently used entries are evicted first; a hit refreshes the entry's mtime.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(pdf_hash: str, settings: dict) -> str:
+        """
+        Combine the PDF hash with the settings that affect the extracted text.
+        """
+        settings_json = json.dumps(settings, sort_keys=True, default=str)
+        return hashlib.sha256(f"{pdf_hash}:{settings_json}".encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + CACHE_FILE_SUFFIX)
+
+    def get(self, key: str) -> Optional[CachedReadResult]:
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = CachedReadResult.model_validate_json(f.read())
+            # Mark as recently used
+            os.utime(path)
+            return result
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Warning: Dropping unreadable OCR cache entry {path}: {e}")
+            self._remove(path)
+            return None
+
+    def put(self, key: str, result: CachedReadResult):
+        temp_path = None
+        try:
+            # Write to a temp file first so readers never see a partial entry
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(result.model_dump_json())
+            os.replace(temp_path, self._entry_path(key))
+            temp_path = None
+            self._evict()
+        except Exception as e:
+            print(f"⚠️ Warning: Could not write OCR cache entry: {e}")
+            if temp_path:
+                self._remove(temp_path)
+
+    def _evict(self):
+        """
+        Remove least recently used entries until the cache fits in max_bytes.
+        """
+        entries = []
+        total_size = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(CACHE_FILE_SUFFIX):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_bytes:
+                break
+            self._remove(path)
+            total_size -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def get_ocr_cache() -> Optional[OcrResultCache]:
+    """
+    Get the OCR result cache configured by OCR_CACHE_DIR and OCR_CACHE_MAX_MB (default 512 MB).
+    Returns None when caching is disabled (OCR_CACHE_DIR not set).
+    """
+    global _ocr_cache
+
+    cache_dir = os.getenv("OCR_CACHE_DIR")
+    if not cache_dir:
+        return None
+
+    max_bytes = int(os.getenv("OCR_CACHE_MAX_MB", "512")) * 1024 * 1024
+    if (
+        _ocr_cache is None
+        or _ocr_cache.cache_dir != cache_dir
+        or _ocr_cache.max_bytes != max_bytes
+    ):
+        try:
+            _ocr_cache = OcrResultCache(cache_dir, max_bytes)
+        except OSError as e:
+            print(f"⚠️ Warning: OCR cache disabled, cannot use {cache_dir}: {e}")
+            return None
+    return _ocr_cache
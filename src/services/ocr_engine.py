@@ -0,0 +1,151 @@
+"""
+Pluggable OCR backends behind extract_text_with_layout.
+Every backend returns tesseract's TSV output (header line included),
+which pdf_reader parses into words and lines.
+"""
+import os
+import shlex
+import pytesseract
+from abc import ABC, abstractmethod
+
+TSV_HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"
+
+_ocr_backend: "OcrBackend | None" = None
+# OCR_BACKEND value _ocr_backend was created for (it may be the pytesseract fallback)
+_ocr_backend_requested: str | None = None
+
+class OcrBackend(ABC):
+    """
+    OCR engine interface.
+    """
+    name: str = ""
+
+    @abstractmethod
+    def image_to_tsv(self, img, lang: str, config: str = "") -> str:
+        """
+        OCR a PIL image and return tesseract TSV output.
+        config: tesseract command line style options (e.g. "--psm 6 -c key=value").
+        """
+
+    @abstractmethod
+    def version(self) -> str:
+        """
+        Engine version, part of the OCR cache key.
+        """
+
+class PytesseractBackend(OcrBackend):
+    """
+    Default backend: runs the tesseract CLI once per image (new process, model loaded every call).
+    """
+    name = "pytesseract"
+
+    def image_to_tsv(self, img, lang: str, config: str = "") -> str:
+        return pytesseract.image_to_data(
+            img, lang=lang, config=config, output_type=pytesseract.Output.STRING
+        )
+
+    def version(self) -> str:
+        try:
+            return f"{self.name}-{pytesseract.get_tesseract_version()}"
+        except Exception:
+            return f"{self.name}-unavailable"
+
+def parse_tesseract_config(config: str) -> dict:
+    """
+    Split tesseract CLI style options into psm, oem, tessdata_dir and -c variables.
+    """
+    options: dict = {"variables": {}}
+    tokens = shlex.split(config or "")
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        value = tokens[i + 1] if i + 1 < len(tokens) else ""
+        if token == "--psm":
+            options["psm"] = int(value)
+        elif token == "--oem":
+            options["oem"] = int(value)
+        elif token == "--tessdata-dir":
+            options["tessdata_dir"] = value
+        elif token == "-c" and "=" in value:
+            key, var_value = value.split("=", 1)
+            options["variables"][key] = var_value
+        else:
+            i += 1
+            continue
+        i += 2
+    return options
+
+class TesserocrBackend(OcrBackend):
+    """
+    Persistent in-process engine (tesserocr, libtesseract bindings).
+    The traineddata model is loaded once per (lang, config) and reused for every page
+    handled by this process, with no subprocess, temp image file or TSV round trip through disk.
+    Not thread-safe: use one instance per process (OCR pool workers are single-threaded).
+    """
+    name = "tesserocr"
+
+    def __init__(self):
+        import tesserocr  # Optional dependency: pip install tesserocr
+        self._tesserocr = tesserocr
+        self._apis: dict = {}
+
+    def _get_api(self, lang: str, config: str):
+        key = (lang, config)
+        api = self._apis.get(key)
+        if api is None:
+            options = parse_tesseract_config(config)
+            api_kwargs = {"lang": lang}
+            if "psm" in options:
+                api_kwargs["psm"] = options["psm"]
+            if "oem" in options:
+                api_kwargs["oem"] = options["oem"]
+            if "tessdata_dir" in options:
+                api_kwargs["path"] = options["tessdata_dir"]
+            api = self._tesserocr.PyTessBaseAPI(**api_kwargs)
+            for name, value in options["variables"].items():
+                api.SetVariable(name, value)
+            self._apis[key] = api
+        return api
+
+    def image_to_tsv(self, img, lang: str, config: str = "") -> str:
+        api = self._get_api(lang, config)
+        api.SetImage(img)
+        try:
+            # GetTSVText has no header line
+            return TSV_HEADER + "\n" + api.GetTSVText(0)
+        finally:
+            api.Clear()
+
+    def version(self) -> str:
+        return f"{self.name}-{self._tesserocr.tesseract_version().splitlines()[0]}"
+
+OCR_BACKENDS = {
+    PytesseractBackend.name: PytesseractBackend,
+    TesserocrBackend.name: TesserocrBackend,
+}
+
+def create_ocr_backend(name: str) -> OcrBackend:
+    backend_class = OCR_BACKENDS.get(name)
+    if backend_class is None:
+        raise ValueError(f"Unknown OCR backend: {name}")
+    return backend_class()
+
+def get_ocr_backend() -> OcrBackend:
+    """
+    Get this process's OCR backend, selected by OCR_BACKEND (default "pytesseract").
+    Created once per process, so a persistent engine keeps its model loaded between pages.
+    Falls back to pytesseract if the selected backend is unavailable.
+    """
+    global _ocr_backend, _ocr_backend_requested
+
+    name = os.getenv("OCR_BACKEND", PytesseractBackend.name)
+    if _ocr_backend is not None and _ocr_backend_requested == name:
+        return _ocr_backend
+
+    try:
+        _ocr_backend = create_ocr_backend(name)
+    except Exception as e:
+        print(f"⚠️ Warning: OCR backend '{name}' unavailable ({e}), using pytesseract")
+        _ocr_backend = PytesseractBackend()
+    _ocr_backend_requested = name
+    return _ocr_backend
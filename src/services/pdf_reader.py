@@ -1,52 +1,965 @@
+import io
 import os
+import math
+import mmap
+import subprocess
+import atexit
+import shutil
 import requests
+import queue
 import tempfile
-import pandas as pd
-import pytesseract
+import threading
+import numpy as np
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker, shared_memory
+from operator import attrgetter
+from typing import Callable, Iterator, NamedTuple
 from pdf2image import convert_from_path
+from pdf2image.parsers import parse_buffer_to_ppm
+from PIL import Image
 from pypdf.errors import PdfReadError
-from pypdf import PdfReader
-from src.schemas.file import FileReadResponse
+from pypdf import PdfReader, __version__ as pypdf_version
+from src.schemas.file import FileReadResponse, CachedReadResult
 from src.utils.file_helpers import create_error_response, create_success_response
 from src.services.validate_invoice_template import validate_invoice_template
-from src.constants.invoice_template import InvoiceTemplate
+from src.services.ocr_engine import get_ocr_backend
+from src.services.image_preprocessing import get_preprocess_steps, preprocess_image
+from src.services.downloader import download_file, download_to_stream
+from src.services.ocr_cache import get_ocr_cache, hash_pdf_file, hash_pdf_bytes
+from src.constants.invoice_template import InvoiceTemplate, OCR_PROFILES
+from src.services.template_registry import get_template_config, get_template_registry
 
-def extract_text_with_layout(img) -> str:
+OCR_DPI = 300
+OCR_LANG = "eng"
+# Lowest DPI the memory ceiling may push rasterization down to
+OCR_MIN_DPI = 150
+# Raw PPM buffer from poppler + decoded RGB image are alive at the same time
+RASTER_BYTES_PER_PIXEL = 3 * 2
+# Table region mode: the table is located on a page image reduced by this factor
+TABLE_LOCATE_REDUCE = 3
+# Table region mode: a line is the table header if it contains at least this many column headers
+TABLE_HEADER_MIN_MATCHES = 2
+# Table region mode: padding kept around the table, as a fraction of the page height
+TABLE_REGION_MARGIN = 0.005
+# Page triage: long side of the darkest-pixel thumbnail pages are classified from
+TRIAGE_THUMBNAIL_SIDE = 256
+# Page triage: a thumbnail pixel is ink if it is this much darker than the paper
+TRIAGE_INK_CONTRAST = 40
+# Page triage: share of the thumbnail in runs of 3+ ink pixels (text, not scanner specks)
+# below which a page is blank / text-sparse
+TRIAGE_BLANK_INK = 0.00005
+TRIAGE_SPARSE_INK = 0.01
+
+# A PDF to read: file path, or in-memory bytes (a memoryview avoids copying a downloaded PDF)
+PdfSource = str | bytes | memoryview
+
+# Shared OCR process pool, created lazily and reused across invoices
+_ocr_pool: ProcessPoolExecutor | None = None
+_ocr_pool_workers = 0
+
+class OcrWord(NamedTuple):
     """
-    Use image_to_data to get coordinates and restructure the correct line of text.
+    One recognized word from tesseract's TSV output (level 5 rows).
     """
-    # Get coordinates x, y, width, height, text
-    data = pytesseract.image_to_data(img, lang="eng", output_type=pytesseract.Output.DATAFRAME)
-    
-    # Remove rows with NaN or empty text
-    data = data[data.text.notna() & (data.text.str.strip() != "")]
-    
-    if data.empty:
-        return ""
+    block_num: int
+    line_num: int
+    left: int
+    top: int
+    width: int
+    height: int
+    conf: float
+    text: str
+
+# Words are grouped by (block_num, line_num) and ordered left to right inside a line
+_line_sort_key = attrgetter("block_num", "line_num", "left")
 
-    # Group by 'block_num' and 'line_num' (these are the actual lines Tesseract recognizes)
-    # Sort words in each line by 'left' coordinate (left to right)
+def parse_tesseract_tsv(tsv: str) -> list[OcrWord]:
+    """
+    Parse the TSV returned by image_to_data into words, skipping the header and rows without text.
+    Columns: level, page_num, block_num, par_num, line_num, word_num, left, top, width, height, conf, text
+    """
+    words = []
+    for row in tsv.splitlines()[1:]:
+        fields = row.split("\t")
+        if len(fields) < 12 or not fields[11].strip():
+            continue
+        words.append(
+            OcrWord(
+                block_num=int(fields[2]),
+                line_num=int(fields[4]),
+                left=int(fields[6]),
+                top=int(fields[7]),
+                width=int(fields[8]),
+                height=int(fields[9]),
+                conf=float(fields[10]),
+                text=fields[11],
+            )
+        )
+    return words
+
+def assemble_lines(words: list[OcrWord]) -> str:
+    """
+    Rebuild text lines from OCR words with a single (stable) sort pass:
+    lines in (block_num, line_num) order, words in each line left to right.
+    """
     lines = []
-    for _, line_df in data.groupby(['block_num', 'line_num']):
-        sorted_line = line_df.sort_values('left')
-        line_text = " ".join(sorted_line['text'].astype(str))
-        lines.append(line_text)
-        
+    current_key = None
+    current_words: list[str] = []
+    for word in sorted(words, key=_line_sort_key):
+        key = (word.block_num, word.line_num)
+        if key != current_key:
+            if current_words:
+                lines.append(" ".join(current_words))
+            current_key = key
+            current_words = []
+        current_words.append(word.text)
+    if current_words:
+        lines.append(" ".join(current_words))
+
     return "\n".join(lines)
 
+def mean_word_confidence(words: list[OcrWord]) -> float:
+    """
+    Average tesseract confidence (0-100) of the recognized words; 0 when nothing was recognized.
+    """
+    confidences = [word.conf for word in words if word.conf >= 0]
+    return sum(confidences) / len(confidences) if confidences else 0.0
+
+def extract_text_with_confidence(img, config: str = "") -> tuple[str, float]:
+    """
+    OCR an image and return (text with layout, mean word confidence).
+    config: tesseract options, see build_tesseract_config.
+    """
+    # Get coordinates x, y, width, height, conf, text as raw TSV
+    tsv = get_ocr_backend().image_to_tsv(img, OCR_LANG, config)
+    words = parse_tesseract_tsv(tsv)
+    return assemble_lines(words), mean_word_confidence(words)
+
+def extract_text_with_layout(img, config: str = "") -> str:
+    """
+    Use image_to_data to get coordinates and restructure the correct line of text.
+    """
+    return extract_text_with_confidence(img, config)[0]
+
+def get_ocr_profile(template: InvoiceTemplate | str | None) -> dict:
+    """
+    Resolve the OCR profile for a template: its preset from OCR_PROFILES overlaid with the
+    template's own "ocr_profile" settings. OCR_PROFILE (speed / accuracy) forces the preset.
+    Unknown template: empty profile (tesseract defaults).
+    """
+    config = get_template_config(template)
+    template_profile = dict(config.get("ocr_profile", {})) if config else {}
+    if not template_profile:
+        return {}
+
+    preset = os.getenv("OCR_PROFILE") or template_profile.pop("preset", None)
+    template_profile.pop("preset", None)
+    return {**OCR_PROFILES.get(preset, {}), **template_profile}
+
+def build_tesseract_config(profile: dict, for_table: bool = False) -> str:
+    """
+    Turn an OCR profile into tesseract options. The character whitelist only applies
+    to table crops (for_table), where every word is a code, quantity, unit or upper-case description.
+    """
+    options = []
+    if "oem" in profile:
+        options.append(f"--oem {profile['oem']}")
+    if "psm" in profile:
+        options.append(f"--psm {profile['psm']}")
+    if profile.get("tessdata") == "fast" and os.getenv("TESSDATA_FAST_DIR"):
+        options.append(f"--tessdata-dir {os.getenv('TESSDATA_FAST_DIR')}")
+    if for_table and profile.get("table_whitelist"):
+        options.append(f"-c tessedit_char_whitelist={profile['table_whitelist']}")
+    return " ".join(options)
+
+class OcrOptions(NamedTuple):
+    """
+    OCR settings for one document, sent to the OCR workers with every page task.
+    """
+    # Rasterization arguments for the final (full resolution) pass
+    convert_kwargs: dict
+    # Adaptive DPI: first pass resolution, None for a single full resolution pass
+    low_dpi: int | None = None
+    # Adaptive DPI: pages below this mean word confidence are re-rendered at full resolution
+    min_confidence: float = 0.0
+    # Table region mode: OCR only the line-item table of this template (None = whole page)
+    table_template: InvoiceTemplate | str | None = None
+    # Tesseract options from the template's OCR profile, for whole pages and for table crops
+    ocr_config: str = ""
+    table_ocr_config: str = ""
+    # Image preprocessing steps run before OCR (see image_preprocessing.PREPROCESS_STEPS)
+    preprocess_steps: tuple[str, ...] = ()
+    # Page triage: skip blank pages, OCR text-sparse pages once with sparse_ocr_config
+    triage: bool = False
+    sparse_ocr_config: str = ""
+    # Table region mode: end-of-items markers, checked on the footer line found below the table
+    # (the crop stops above it)
+    end_of_items_markers: tuple[str, ...] = ()
+
+class PageOcrResult(NamedTuple):
+    page_number: int
+    text: str
+    # True if the page was re-OCR'd at full resolution after a low confidence first pass
+    escalated: bool = False
+    # Milliseconds spent in each image preprocessing step
+    preprocess_ms: dict[str, float] | None = None
+    # Page triage class ("blank", "sparse", "dense"), None when triage is off
+    page_class: str | None = None
+    # Table region mode: the footer line below the table holds an end-of-items marker
+    end_of_items: bool = False
+
+class TableRegion(NamedTuple):
+    """
+    Line-item table band of a page, as fractions of the page height.
+    """
+    top: float
+    bottom: float
+    # Lowercase text of the footer line the table ends at (None: the table runs to the page bottom)
+    footer: str | None = None
+
+def _group_line_boxes(words: list[OcrWord]) -> list[tuple[int, int, str]]:
+    """
+    Group OCR words into lines: (top, bottom, lowercase text), ordered top to bottom.
+    """
+    lines: dict[tuple[int, int], list[OcrWord]] = {}
+    for word in sorted(words, key=_line_sort_key):
+        lines.setdefault((word.block_num, word.line_num), []).append(word)
+
+    return sorted(
+        (
+            min(w.top for w in line_words),
+            max(w.top + w.height for w in line_words),
+            " ".join(w.text for w in line_words).lower(),
+        )
+        for line_words in lines.values()
+    )
+
+def locate_table_region(img: "Image.Image", template: InvoiceTemplate | str) -> TableRegion | None:
+    """
+    Find the line-item table on a page image with a cheap OCR pass on a reduced copy.
+    The table starts at the line holding the template's table_headers and ends at the
+    first table_footers line below it (or at the page bottom).
+    Returns: the table band and its footer line, None if no table header was found.
+    """
+    config = get_template_config(template)
+    if not config:
+        return None
+    headers = [h.lower() for h in config["table_headers"]]
+    footers = [f.lower() for f in config.get("table_footers", [])]
+
+    small = img.reduce(TABLE_LOCATE_REDUCE)
+    try:
+        tsv = get_ocr_backend().image_to_tsv(small, OCR_LANG)
+        page_height = small.height
+    finally:
+        small.close()
+
+    table_top = None
+    table_bottom = page_height
+    footer = None
+    for top, bottom, line_text in _group_line_boxes(parse_tesseract_tsv(tsv)):
+        if table_top is None:
+            if sum(1 for h in headers if h in line_text) >= TABLE_HEADER_MIN_MATCHES:
+                table_top = top
+        elif any(f in line_text for f in footers):
+            table_bottom = top
+            footer = line_text
+            break
+
+    if table_top is None:
+        return None
+    return TableRegion(
+        max(0.0, table_top / page_height - TABLE_REGION_MARGIN),
+        min(1.0, table_bottom / page_height + TABLE_REGION_MARGIN),
+        footer,
+    )
+
+def crop_to_region(img: "Image.Image", region: TableRegion | None) -> "Image.Image":
+    """
+    Crop a page image to a (top, bottom) band given as fractions of its height (full width).
+    """
+    if region is None:
+        return img
+    return img.crop((0, int(region.top * img.height), img.width, int(region.bottom * img.height)))
+
+# --- Page triage ---
+
+def triage_page(img: "Image.Image") -> str:
+    """
+    Classify a rendered page from a small grayscale thumbnail:
+    "blank" (no text, e.g. blank backs), "sparse" (a few lines, separator sheets) or "dense" (tables).
+    Each thumbnail pixel keeps the darkest pixel of its block, so thin text lines survive the
+    reduction; only runs of 3+ ink pixels count, so isolated specks of a noisy scan do not.
+    The paper level is the most frequent gray level; ink is anything clearly darker.
+    """
+    gray = img.convert("L")
+    histogram = gray.histogram()
+    paper = max(range(256), key=histogram.__getitem__)
+
+    factor = max(1, max(gray.size) // TRIAGE_THUMBNAIL_SIDE)
+    pixels = np.asarray(gray)
+    height, width = pixels.shape[0] // factor * factor, pixels.shape[1] // factor * factor
+    thumbnail = pixels[:height, :width].reshape(
+        height // factor, factor, width // factor, factor
+    ).min(axis=(1, 3))
+    gray.close()
+
+    ink = thumbnail < paper - TRIAGE_INK_CONTRAST
+    ink = (ink[:, :-2] & ink[:, 1:-1] & ink[:, 2:]).mean() if ink.shape[1] > 2 else 0.0
+    if ink < TRIAGE_BLANK_INK:
+        return "blank"
+    if ink < TRIAGE_SPARSE_INK:
+        return "sparse"
+    return "dense"
+
+def get_page_triage_mode(page_triage: bool | None = None) -> bool:
+    """
+    Resolve whether rendered pages are triaged before OCR.
+    Falls back to the OCR_PAGE_TRIAGE environment variable (default true).
+    """
+    if page_triage is None:
+        page_triage = os.getenv("OCR_PAGE_TRIAGE", "true").lower() == "true"
+    return page_triage
+
+def get_precheck_dpi() -> int:
+    """
+    DPI of the template pre-check OCR pass (TEMPLATE_PRECHECK_DPI, default 150).
+    """
+    return int(os.getenv("TEMPLATE_PRECHECK_DPI", "150"))
+
+def precheck_invoice_template(
+    pdf_source: PdfSource,
+    poppler_path: str | None = None,
+    full_dpi: int = OCR_DPI,
+) -> InvoiceTemplate | str:
+    """
+    Detect the invoice template of a scanned PDF from a low resolution OCR of its first page.
+    Much cheaper than full resolution OCR, so unsupported suppliers are rejected early.
+    When the low resolution text matches no template, the first page is OCR'd once more at
+    full_dpi before the document is reported as UNKNOWN (small print, poor scans).
+    """
+    template = InvoiceTemplate.UNKNOWN
+    for dpi in dict.fromkeys((get_precheck_dpi(), full_dpi)):
+        convert_kwargs = {"dpi": dpi}
+        if poppler_path:
+            convert_kwargs["poppler_path"] = poppler_path
+
+        images = render_pages(pdf_source, 1, 1, convert_kwargs)
+        if not images:
+            return InvoiceTemplate.UNKNOWN
+        try:
+            template = validate_invoice_template(extract_text_with_layout(images[0]))
+        finally:
+            images[0].close()
+        if template != InvoiceTemplate.UNKNOWN or dpi >= full_dpi:
+            break
+    return template
+
+def get_table_region_mode(table_region_only: bool | None = None) -> bool:
+    """
+    Resolve whether scanned pages are OCR'd only inside the line-item table.
+    Falls back to the OCR_TABLE_REGION_ONLY environment variable (default false).
+    """
+    if table_region_only is None:
+        table_region_only = os.getenv("OCR_TABLE_REGION_ONLY", "false").lower() == "true"
+    return table_region_only
+
+def get_adaptive_dpi_settings(adaptive_dpi: bool | None = None) -> tuple[int | None, float]:
+    """
+    Resolve the adaptive DPI settings: (first pass DPI or None when disabled, confidence threshold).
+    Environment: OCR_ADAPTIVE_DPI (default false), OCR_LOW_DPI (default 200), OCR_MIN_CONFIDENCE (default 80).
+    """
+    if adaptive_dpi is None:
+        adaptive_dpi = os.getenv("OCR_ADAPTIVE_DPI", "false").lower() == "true"
+    if not adaptive_dpi:
+        return None, 0.0
+    return int(os.getenv("OCR_LOW_DPI", "200")), float(os.getenv("OCR_MIN_CONFIDENCE", "80"))
+
+def get_ocr_workers(ocr_workers: int | None = None) -> int:
+    """
+    Resolve the number of OCR worker processes.
+    Falls back to the OCR_WORKERS environment variable (default 1 = sequential),
+    capped at the number of available CPU cores.
+    """
+    if ocr_workers is None:
+        ocr_workers = int(os.getenv("OCR_WORKERS", "1"))
+    return max(1, min(ocr_workers, os.cpu_count() or 1))
+
+def _init_ocr_worker(thread_limit: int):
+    """
+    Pool initializer: cap tesseract's OpenMP threads so that
+    workers x threads does not oversubscribe the CPU cores.
+    """
+    os.environ["OMP_THREAD_LIMIT"] = str(thread_limit)
+    # Load the OCR engine once per worker; a persistent backend reuses it for every page
+    get_ocr_backend()
+
+def _shutdown_ocr_pool():
+    global _ocr_pool, _ocr_pool_workers
+    if _ocr_pool is not None:
+        _ocr_pool.shutdown(wait=False, cancel_futures=True)
+    _ocr_pool = None
+    _ocr_pool_workers = 0
+
+atexit.register(_shutdown_ocr_pool)
+
+def _get_ocr_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Get the shared OCR process pool, (re)creating it if the worker count changed.
+    """
+    global _ocr_pool, _ocr_pool_workers
+    if _ocr_pool is None or _ocr_pool_workers != workers:
+        _shutdown_ocr_pool()
+        thread_limit = max(1, (os.cpu_count() or 1) // workers)
+        # Workers must share the parent's resource tracker, or each one would unlink
+        # the shared PDF blocks it attached to when it exits
+        resource_tracker.ensure_running()
+        _ocr_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_ocr_worker,
+            initargs=(thread_limit,),
+        )
+        _ocr_pool_workers = workers
+    return _ocr_pool
+
+def is_pdf_in_memory(pdf_source: PdfSource) -> bool:
+    """
+    True for in-memory PDF bytes (bytes or memoryview), False for a file path.
+    """
+    return isinstance(pdf_source, (bytes, memoryview))
+
+def convert_from_memory(
+    pdf_bytes: bytes | memoryview,
+    first_page: int,
+    last_page: int,
+    dpi: int = OCR_DPI,
+    poppler_path: str | None = None,
+) -> list["Image.Image"]:
+    """
+    Rasterize pages of an in-memory PDF.
+    The bytes are piped to pdftoppm's stdin and the PPM images read back from stdout,
+    so no temporary file is written (pdf2image.convert_from_bytes writes one).
+    """
+    command = os.path.join(poppler_path, "pdftoppm") if poppler_path else "pdftoppm"
+    args = [command, "-r", str(dpi), "-f", str(first_page), "-l", str(last_page), "-"]
+    proc = subprocess.run(args, input=pdf_bytes, capture_output=True)
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"pdftoppm failed: {proc.stderr.decode('utf8', 'ignore').strip()}"
+        )
+    return parse_buffer_to_ppm(proc.stdout)
+
+def render_pages(
+    pdf_source: PdfSource,
+    first_page: int,
+    last_page: int,
+    convert_kwargs: dict,
+) -> list["Image.Image"]:
+    """
+    Rasterize a range of pages from a file path or from in-memory PDF bytes.
+    """
+    if is_pdf_in_memory(pdf_source):
+        return convert_from_memory(pdf_source, first_page, last_page, **convert_kwargs)
+    return convert_from_path(
+        pdf_source, first_page=first_page, last_page=last_page, **convert_kwargs
+    )
+
+# --- Text layer backends ---
+
+class TextLayerBackend(ABC):
+    """
+    Extracts the embedded text layer of PDF pages.
+    """
+    name: str = ""
+    # Pages extracted per call (None: all requested pages at once)
+    pages_per_call: int | None = 1
+
+    @abstractmethod
+    def extract_pages(self, pdf_source: PdfSource, pages, first_page: int, last_page: int) -> list[str]:
+        """
+        Text of pages first_page..last_page (1-based), one string per page.
+        pages: the PdfReader pages of the same document.
+        """
+
+class PypdfTextBackend(TextLayerBackend):
+    """
+    Default backend: pypdf's extract_text (pure Python, reads the already parsed document).
+    """
+    name = "pypdf"
+
+    def extract_pages(self, pdf_source, pages, first_page, last_page):
+        return [pages[n - 1].extract_text() or "" for n in range(first_page, last_page + 1)]
+
+class PdftotextBackend(TextLayerBackend):
+    """
+    poppler's pdftotext in layout mode, one process for a whole page range
+    (page texts are separated by form feeds). Bytes are piped through stdin.
+    """
+    name = "pdftotext"
+    pages_per_call = None
+
+    def __init__(self, poppler_path: str | None = None):
+        self.command = os.path.join(poppler_path, "pdftotext") if poppler_path else "pdftotext"
+        if not shutil.which(self.command):
+            raise RuntimeError(f"{self.command} not found")
+
+    def extract_pages(self, pdf_source, pages, first_page, last_page):
+        is_bytes = is_pdf_in_memory(pdf_source)
+        args = [
+            self.command, "-layout", "-enc", "UTF-8",
+            "-f", str(first_page), "-l", str(last_page),
+            "-" if is_bytes else pdf_source, "-",
+        ]
+        proc = subprocess.run(args, input=pdf_source if is_bytes else None, capture_output=True)
+        if proc.returncode != 0:
+            raise RuntimeError(
+                f"pdftotext failed: {proc.stderr.decode('utf8', 'ignore').strip()}"
+            )
+        texts = proc.stdout.decode("utf8", "ignore").split("\f")
+        page_count = last_page - first_page + 1
+        return (texts + [""] * page_count)[:page_count]
+
+TEXT_LAYER_BACKENDS = {
+    PypdfTextBackend.name: PypdfTextBackend,
+    PdftotextBackend.name: PdftotextBackend,
+}
+
+def create_text_layer_backend(name: str, poppler_path: str | None = None) -> TextLayerBackend:
+    backend_class = TEXT_LAYER_BACKENDS.get(name)
+    if backend_class is None:
+        raise ValueError(f"Unknown text layer backend: {name}")
+    if backend_class is PdftotextBackend:
+        return backend_class(poppler_path)
+    return backend_class()
+
+def get_text_layer_backend(
+    template: InvoiceTemplate | str | None = None,
+    poppler_path: str | None = None,
+) -> TextLayerBackend:
+    """
+    Text layer backend: TEXT_LAYER_BACKEND if set, else the template's "text_backend"
+    (chosen with benchmarks/bench_text_layer.py), else pypdf.
+    Falls back to pypdf if the selected backend is unavailable.
+    """
+    config = get_template_config(template)
+    name = os.getenv("TEXT_LAYER_BACKEND") or (config or {}).get("text_backend", PypdfTextBackend.name)
+    try:
+        return create_text_layer_backend(name, poppler_path)
+    except Exception as e:
+        print(f"⚠️ Warning: text layer backend '{name}' unavailable ({e}), using pypdf")
+        return PypdfTextBackend()
+
+def _is_adaptive(options: OcrOptions) -> bool:
+    """
+    Whether pages get a low DPI first pass. Not the case when the full resolution is already
+    at or below low_dpi (low DPI OCR profile, memory ceiling): escalating would OCR the page
+    twice at the same resolution.
+    """
+    return options.low_dpi is not None and options.low_dpi < options.convert_kwargs.get("dpi", OCR_DPI)
+
+def _first_pass_kwargs(options: OcrOptions) -> dict:
+    """
+    Rasterization arguments for the first OCR pass (low DPI in adaptive mode).
+    """
+    if not _is_adaptive(options):
+        return options.convert_kwargs
+    return {**options.convert_kwargs, "dpi": options.low_dpi}
+
+def _ocr_rendered_page(
+    pdf_source: PdfSource,
+    page_number: int,
+    img: "Image.Image",
+    options: OcrOptions,
+) -> PageOcrResult:
+    """
+    OCR a rendered page. In adaptive mode, a page whose mean word confidence is below
+    options.min_confidence is rendered again at full resolution and OCR'd once more.
+    In table region mode, only the located line-item table is OCR'd.
+    The page (or table crop) goes through the preprocessing steps before OCR.
+    With triage, blank pages are not OCR'd and text-sparse pages get a single pass, with
+    options.sparse_ocr_config unless a table crop is OCR'd.
+    """
+    page_class = triage_page(img) if options.triage else None
+    if page_class == "blank":
+        return PageOcrResult(page_number, "", page_class=page_class)
+
+    region = None
+    if options.table_template:
+        region = locate_table_region(img, options.table_template)
+
+    config = options.table_ocr_config if region else options.ocr_config
+    if page_class == "sparse" and not region and options.sparse_ocr_config:
+        config = options.sparse_ocr_config
+    # The footer line is not in the crop: markers are checked on its text from the region pass
+    end_of_items = bool(region and region.footer) and has_end_of_items_marker(
+        region.footer, options.end_of_items_markers
+    )
+
+    page_img, timings = preprocess_image(crop_to_region(img, region), options.preprocess_steps)
+    text, confidence = extract_text_with_confidence(page_img, config)
+    if not _is_adaptive(options) or confidence >= options.min_confidence or page_class == "sparse":
+        return PageOcrResult(
+            page_number, text, preprocess_ms=timings, page_class=page_class, end_of_items=end_of_items
+        )
+
+    images = render_pages(pdf_source, page_number, page_number, options.convert_kwargs)
+    if not images:
+        return PageOcrResult(
+            page_number, text, preprocess_ms=timings, page_class=page_class, end_of_items=end_of_items
+        )
+    try:
+        page_img, escalation_timings = preprocess_image(
+            crop_to_region(images[0], region), options.preprocess_steps
+        )
+        text = extract_text_with_layout(page_img, config)
+        for step, elapsed in escalation_timings.items():
+            timings[step] = timings.get(step, 0.0) + elapsed
+        return PageOcrResult(
+            page_number, text, escalated=True, preprocess_ms=timings, page_class=page_class,
+            end_of_items=end_of_items,
+        )
+    finally:
+        images[0].close()
+
+class SharedPdf(NamedTuple):
+    """
+    In-memory PDF handed to the OCR workers as a shared memory block.
+    """
+    name: str
+    size: int
+
+def _ocr_page(task: tuple) -> PageOcrResult:
+    """
+    Rasterize a single PDF page and OCR it.
+    Runs inside an OCR worker process, so only the page text crosses the process boundary.
+    """
+    pdf_source, page_number, options = task
+    if isinstance(pdf_source, SharedPdf):
+        block = shared_memory.SharedMemory(name=pdf_source.name)
+        view = block.buf[:pdf_source.size]
+        try:
+            return _ocr_page((view, page_number, options))
+        finally:
+            view.release()
+            block.close()
+
+    images = render_pages(pdf_source, page_number, page_number, _first_pass_kwargs(options))
+    if not images:
+        return PageOcrResult(page_number, "")
+    try:
+        return _ocr_rendered_page(pdf_source, page_number, images[0], options)
+    finally:
+        images[0].close()
+
+def ocr_pages_parallel(
+    pdf_source: PdfSource,
+    page_numbers: list[int],
+    options: OcrOptions,
+    workers: int,
+    batch_size: int | None = None,
+) -> Iterator[PageOcrResult]:
+    """
+    OCR the given pages in the shared process pool.
+    Results are yielded in the same order as page_numbers.
+    batch_size: submit pages in batches, so a consumer that stops early wastes at most one batch.
+    In-memory PDF bytes are copied once into a shared memory block that the workers attach to,
+    instead of being pickled into every page task. The block is unlinked when the pages are
+    done, also when OCR fails or the consumer stops early.
+    """
+    batch_size = batch_size or len(page_numbers)
+    pool = _get_ocr_pool(workers)
+    shared_block = None
+    try:
+        if is_pdf_in_memory(pdf_source):
+            size = memoryview(pdf_source).nbytes
+            shared_block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+            shared_block.buf[:size] = pdf_source
+            pdf_source = SharedPdf(shared_block.name, size)
+
+        for start in range(0, len(page_numbers), batch_size):
+            tasks = [
+                (pdf_source, page_number, options)
+                for page_number in page_numbers[start:start + batch_size]
+            ]
+            yield from pool.map(_ocr_page, tasks)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed by the OOM killer): drop the pool so the next call starts fresh
+        _shutdown_ocr_pool()
+        raise
+    finally:
+        if shared_block:
+            shared_block.close()
+            shared_block.unlink()
+
+def ocr_pages(
+    pdf_source: PdfSource,
+    page_numbers: list[int],
+    options: OcrOptions,
+    workers: int = 1,
+    window: int = 1,
+    batch_size: int | None = None,
+) -> Iterator[PageOcrResult]:
+    """
+    OCR pages in page order, in the process pool (workers > 1) or in this process,
+    rendering `window` pages at a time.
+    """
+    if workers > 1:
+        yield from ocr_pages_parallel(pdf_source, page_numbers, options, workers, batch_size)
+        return
+
+    for page_number, img in iter_page_images(
+        pdf_source, page_numbers, _first_pass_kwargs(options), window
+    ):
+        yield _ocr_rendered_page(pdf_source, page_number, img, options)
+
+def get_ocr_memory_limit(max_memory_mb: int | None = None) -> int:
+    """
+    Resolve the peak memory (in bytes) that rasterized page images may use.
+    Falls back to the OCR_MAX_MEMORY_MB environment variable (default 256 MB).
+    """
+    if max_memory_mb is None:
+        max_memory_mb = int(os.getenv("OCR_MAX_MEMORY_MB", "256"))
+    return max(1, max_memory_mb) * 1024 * 1024
+
+def estimate_page_image_bytes(page, dpi: int) -> int:
+    """
+    Estimate the memory needed to hold one rasterized page at the given DPI,
+    based on the page's media box (in points, 72 per inch).
+    """
+    width_px = math.ceil(float(page.mediabox.width) / 72 * dpi)
+    height_px = math.ceil(float(page.mediabox.height) / 72 * dpi)
+    return width_px * height_px * RASTER_BYTES_PER_PIXEL
+
+def plan_page_rendering(pages, page_numbers: list[int], dpi: int, memory_limit: int) -> tuple[int, int]:
+    """
+    Choose the DPI and the number of pages rendered at once (window) so that
+    the rendered images stay below memory_limit.
+    If a single page does not fit, the DPI is lowered (not below OCR_MIN_DPI).
+    Returns: (dpi, window)
+    """
+    largest_page = max(estimate_page_image_bytes(pages[n - 1], dpi) for n in page_numbers)
+
+    if largest_page > memory_limit and dpi > OCR_MIN_DPI:
+        # Image size grows with dpi^2
+        scaled_dpi = max(OCR_MIN_DPI, int(dpi * math.sqrt(memory_limit / largest_page)))
+        print(
+            f"⚠️ Warning: Page image at {dpi} DPI exceeds the OCR memory limit, rendering at {scaled_dpi} DPI"
+        )
+        dpi = scaled_dpi
+        largest_page = max(estimate_page_image_bytes(pages[n - 1], dpi) for n in page_numbers)
+
+    window = max(1, memory_limit // largest_page)
+    return dpi, window
+
+def _page_windows(page_numbers: list[int], window: int) -> Iterator[list[int]]:
+    """
+    Split page numbers into runs of consecutive pages, each at most `window` long,
+    so every run can be rendered with a single first_page/last_page call.
+    """
+    run: list[int] = []
+    for page_number in page_numbers:
+        if run and (page_number != run[-1] + 1 or len(run) >= window):
+            yield run
+            run = []
+        run.append(page_number)
+    if run:
+        yield run
+
+def iter_page_images(
+    pdf_source: PdfSource,
+    page_numbers: list[int],
+    convert_kwargs: dict,
+    window: int = 1,
+) -> Iterator[tuple[int, "Image.Image"]]:
+    """
+    Rasterize pages lazily, `window` pages at a time.
+    Each image is closed as soon as the consumer moves on to the next page,
+    so at most `window` page images are held in memory.
+    """
+    for run in _page_windows(page_numbers, window):
+        images = render_pages(pdf_source, run[0], run[-1], convert_kwargs)
+        for page_number in run:
+            if not images:
+                break
+            img = images.pop(0)
+            try:
+                yield page_number, img
+            finally:
+                img.close()
+
+@lru_cache(maxsize=None)
+def get_ocr_engine_version(backend_name: str) -> str:
+    """
+    OCR engine name and version, part of the OCR cache key.
+    """
+    return get_ocr_backend().version()
+
+def get_ocr_dpi_settings(max_memory_mb: int | None = None) -> dict:
+    """
+    Inputs of the DPI pages are actually rasterized at: the full resolution DPI of each template's
+    OCR profile (OCR_DPI without one) and the memory ceiling that may lower it (plan_page_rendering).
+    With the PDF itself (page sizes, detected template) they determine the effective DPI.
+    """
+    template_dpi = {
+        name: get_ocr_profile(name).get("dpi", OCR_DPI)
+        for name in get_template_registry().configs
+    }
+    return {
+        "dpi": OCR_DPI,
+        "template_dpi": template_dpi,
+        "min_dpi": OCR_MIN_DPI,
+        "max_memory": get_ocr_memory_limit(max_memory_mb),
+    }
+
+def get_ocr_cache_settings(is_extract_all: bool, max_memory_mb: int | None = None, **ocr_modes) -> dict:
+    """
+    Settings that change the extracted text; a change in any of them invalidates cached results.
+    max_memory_mb: OCR memory ceiling (see get_ocr_dpi_settings).
+    ocr_modes: resolved OCR mode settings (adaptive DPI, table region, ...).
+    """
+    return {
+        **get_ocr_dpi_settings(max_memory_mb),
+        "lang": OCR_LANG,
+        "engine": get_ocr_engine_version(get_ocr_backend().name),
+        "pypdf": pypdf_version,
+        "is_extract_all": is_extract_all,
+        **ocr_modes,
+    }
+
+def _build_read_response(
+    file_path: str,
+    page_count: int,
+    full_text: str | None,
+    detected_template: InvoiceTemplate | str,
+    is_check_invoice_template: bool,
+    ocr_escalations: int | None = None,
+    skipped_pages: int | None = None,
+) -> FileReadResponse:
+    """
+    Build the final response from extracted (or cached) results.
+    """
+    # --- Validate invoice template if required ---
+    invoice_template_type = InvoiceTemplate.UNKNOWN
+    if is_check_invoice_template:
+        invoice_template_type = detected_template
+        if invoice_template_type == InvoiceTemplate.UNKNOWN:
+            return create_error_response(
+                file_path=file_path, message="Unknown Invoice Template"
+            )
+
+    return create_success_response(
+        file_path=file_path,
+        page_count=page_count,
+        # first_line=first_line,
+        full_text=full_text,
+        invoice_template=invoice_template_type,
+        ocr_escalations=ocr_escalations,
+        skipped_pages=skipped_pages,
+    )
+
+def get_early_stop_mode(stop_at_end_of_items: bool | None = None) -> bool:
+    """
+    Stop reading pages after the template's end-of-items marker: argument, else
+    STOP_AT_END_OF_ITEMS (default off).
+    """
+    if stop_at_end_of_items is not None:
+        return stop_at_end_of_items
+    return os.getenv("STOP_AT_END_OF_ITEMS", "false").strip().lower() in ("1", "true", "yes", "on")
+
+def get_end_of_items_markers(template: InvoiceTemplate | str | None) -> list[str]:
+    """
+    Lines that follow the last line item of a template (totals), empty if the template is unknown.
+    """
+    config = get_template_config(template)
+    return config.get("end_of_items_markers", []) if config else []
+
+def has_end_of_items_marker(text: str, markers: list[str]) -> bool:
+    """
+    True if the page text contains one of the end-of-items markers (case-insensitive:
+    OCR'd totals lines are often upper case).
+    """
+    text = text.lower()
+    return any(marker.lower() in text for marker in markers)
+
+class PageText(NamedTuple):
+    """
+    Final text of one page, handed out in page order while the rest of the document is read.
+    """
+    page_number: int
+    text: str
+    # Template detected from page 1 (None if not detected yet)
+    invoice_template: InvoiceTemplate | str | None = None
+
+def get_in_memory_mode(in_memory: bool | None = None) -> bool:
+    """
+    Resolve whether PDFs are read without temporary files.
+    Falls back to the PDF_IN_MEMORY environment variable (default false).
+    """
+    if in_memory is None:
+        in_memory = os.getenv("PDF_IN_MEMORY", "false").lower() == "true"
+    return in_memory
+
 def read_pdf_file(
     file_path: str,
     is_extract_all: bool = False,
     is_check_invoice_template: bool = False,
+    ocr_workers: int | None = None,
+    max_memory_mb: int | None = None,
+    in_memory: bool | None = None,
+    adaptive_dpi: bool | None = None,
+    table_region_only: bool | None = None,
+    preprocess: str | None = None,
+    stop_at_end_of_items: bool | None = None,
+    page_triage: bool | None = None,
+    on_page: Callable[[PageText], None] | None = None,
 ) -> FileReadResponse:
     """
     Read a PDF file.
-    If it's a URL, downloads to a temporary file, processes it, and then deletes it.
+    If it's a URL, streams it to a temporary file (pooled connection), processes it, and then deletes it.
     Handle file extraction: text, image-based (OCR), invoice template validation.
+    Scanned pages are OCR'd in a process pool when ocr_workers (or OCR_WORKERS) > 1.
+    Pages are rasterized a few at a time so that images stay below max_memory_mb (or OCR_MAX_MEMORY_MB).
+    Results are cached by PDF content hash when OCR_CACHE_DIR is set.
+    In-memory mode (in_memory or PDF_IN_MEMORY): URLs are downloaded into memory and rasterized
+    from bytes, local files are memory-mapped, so no temporary file is written.
+    Adaptive DPI (adaptive_dpi or OCR_ADAPTIVE_DPI): pages are OCR'd at a low DPI first and only
+    low-confidence pages are re-rendered at full DPI; the count is reported as ocr_escalations.
+    Template check: the template is detected from page 1 before any full resolution OCR (a scanned
+    page 1 gets a low DPI OCR pass), so unknown templates are rejected without OCR'ing the document.
+    Table region mode (table_region_only or OCR_TABLE_REGION_ONLY): once the template is known,
+    scanned pages are OCR'd only inside the line-item table.
+    Once the template is known, scanned pages use its OCR profile (see get_ocr_profile).
+    Preprocessing (preprocess or OCR_PREPROCESS, e.g. "grayscale,binarize"): NumPy steps run on
+    page images before OCR; the time of each step is printed per document.
+    Early stop (stop_at_end_of_items or STOP_AT_END_OF_ITEMS, default off): with is_extract_all, pages
+    after the one holding the template's end-of-items marker (remittance slips, terms, customer
+    copies) are neither extracted nor OCR'd; their count is reported as skipped_pages. In table
+    region mode the marker is also looked for on the footer line the table ends at (outside the crop).
+    Page triage (page_triage or OCR_PAGE_TRIAGE, default on): rendered pages are classified from a
+    darkest-pixel thumbnail; blank pages are not OCR'd, text-sparse pages are OCR'd once with the
+    template's layout settings and fast models, dense pages go through the normal OCR pipeline.
+    Text layer: page 1 is read with the default backend to detect the template, then every page
+    (page 1 again if the backend differs) with the template's (see get_text_layer_backend).
+    Streaming (on_page): every page's final text is passed to on_page in page order as soon as it
+    and all pages before it are ready (cache hits: the whole text as page 1); see PdfPageStream.
     """
     is_url = file_path.startswith(("http://", "https://"))
     target_path = file_path
     temp_pdf = None
+    use_in_memory = get_in_memory_mode(in_memory)
+    # In-memory PDF (io.BytesIO for downloads, mmap for local files), None when reading from a path
+    pdf_stream = None
+    pdf_file = None
+    # View of the downloaded bytes handed to poppler (in-memory URL mode)
+    render_view = None
+    low_dpi, min_confidence = get_adaptive_dpi_settings(adaptive_dpi)
+    use_table_region = get_table_region_mode(table_region_only)
+    preprocess_steps = get_preprocess_steps(preprocess)
+    use_early_stop = is_extract_all and get_early_stop_mode(stop_at_end_of_items)
+    use_page_triage = get_page_triage_mode(page_triage)
     
     # Get Poppler path from environment variable (optional)
     # If not set, pdf2image will use system PATH
@@ -56,13 +969,15 @@ def read_pdf_file(
         # --- Download file if it's a URL ---
         if is_url:
             try:
-                response = requests.get(file_path, timeout=30)
-                response.raise_for_status()
-                # Create a temporary file to save the downloaded PDF
-                temp_pdf = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-                temp_pdf.write(response.content)
-                temp_pdf.close()
-                target_path = temp_pdf.name
+                if use_in_memory:
+                    pdf_stream = io.BytesIO()
+                    download_to_stream(file_path, pdf_stream)
+                else:
+                    # Create a temporary file and stream the downloaded PDF into it
+                    temp_pdf = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+                    temp_pdf.close()
+                    download_file(file_path, temp_pdf.name)
+                    target_path = temp_pdf.name
             except requests.exceptions.HTTPError as e:
                 return create_error_response(
                     file_path=file_path, message=f"HTTP error: {e}"
@@ -72,76 +987,269 @@ def read_pdf_file(
                     file_path=file_path, message=f"Download file error: {e}"
                 )
 
-        if not os.path.exists(target_path):
-            return create_error_response(file_path=file_path, message="File not found!")
+        if pdf_stream is None:
+            if not os.path.exists(target_path):
+                return create_error_response(file_path=file_path, message="File not found!")
+
+            if use_in_memory:
+                # Memory-map the local file instead of reading a copy of it
+                pdf_file = open(target_path, "rb")
+                pdf_stream = mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # --- Return cached result if this exact file was already read ---
+        ocr_cache = get_ocr_cache()
+        cache_key = None
+        if ocr_cache:
+            if isinstance(pdf_stream, io.BytesIO):
+                with pdf_stream.getbuffer() as pdf_view:
+                    pdf_hash = hash_pdf_bytes(pdf_view)
+            elif pdf_stream is not None:
+                pdf_hash = hash_pdf_bytes(pdf_stream)
+            else:
+                pdf_hash = hash_pdf_file(target_path)
+            cache_key = ocr_cache.make_key(
+                pdf_hash,
+                get_ocr_cache_settings(
+                    is_extract_all,
+                    max_memory_mb,
+                    low_dpi=low_dpi,
+                    min_confidence=min_confidence,
+                    table_region_only=use_table_region,
+                    ocr_profile=os.getenv("OCR_PROFILE"),
+                    preprocess=",".join(preprocess_steps),
+                    early_stop=use_early_stop,
+                    page_triage=use_page_triage,
+                    text_backend=os.getenv("TEXT_LAYER_BACKEND"),
+                ),
+            )
+            cached = ocr_cache.get(cache_key)
+            if cached:
+                response = _build_read_response(
+                    file_path=file_path,
+                    page_count=cached.page_count,
+                    full_text=cached.full_text,
+                    detected_template=cached.invoice_template,
+                    is_check_invoice_template=is_check_invoice_template,
+                    skipped_pages=cached.skipped_pages,
+                )
+                if on_page and response.success and cached.full_text:
+                    on_page(PageText(1, cached.full_text, cached.invoice_template))
+                return response
 
         # --- Read PDF file ---
-        reader = PdfReader(target_path)
+        reader = PdfReader(pdf_stream if pdf_stream is not None else target_path)
         pages = reader.pages
         if not pages:
             return create_error_response(file_path=file_path, message="PDF is empty")
 
-        # --- Check invoice file: If the first page has no text, it might be an image-based PDF requiring OCR ---
-        first_page_text = pages[0].extract_text() or ""
-        full_text = None
+        # --- Decide per page: use the embedded text layer where it exists, OCR only the pages without one ---
+        page_numbers = list(range(1, len(pages) + 1)) if is_extract_all else [1]
+        page_texts: dict[int, str] = {}
+        ocr_escalations = 0
 
-        # first_line = (
-        #         first_page_text.split("\n")[0].strip() if first_page_text else ""
-        #     )
+        # Downloaded bytes are piped to poppler through a view of the download buffer (no copy);
+        # files (incl. memory-mapped ones) are read from their path
+        if isinstance(pdf_stream, io.BytesIO):
+            render_view = pdf_stream.getbuffer()
+            render_source = render_view
+        else:
+            render_source = target_path
 
-        # --- Extract text ---
+        first_page_backend = get_text_layer_backend(None, poppler_path)
+        first_page_text = first_page_backend.extract_pages(render_source, pages, 1, 1)[0]
         if first_page_text.strip():
-            if is_extract_all:
-                full_text = "\n".join(
-                    page.extract_text() or "" for page in pages
-                ).strip()
-        
-        # --- Perform OCR if no text found ---
-        else:
+            page_texts[1] = first_page_text
+
+        # --- Detect the invoice template before any full resolution OCR ---
+        detected_template = None
+        if 1 in page_texts:
+            detected_template = validate_invoice_template(page_texts[1])
+        elif is_check_invoice_template or use_table_region:
+            try:
+                detected_template = precheck_invoice_template(render_source, poppler_path)
+            except Exception as ocr_err:
+                return create_error_response(
+                    file_path=file_path, message=f"OCR failed: {ocr_err}"
+                )
+
+        if is_check_invoice_template and detected_template == InvoiceTemplate.UNKNOWN:
+            # Fail fast: unsupported supplier or junk upload, the remaining pages are never OCR'd
+            return create_error_response(
+                file_path=file_path, message="Unknown Invoice Template"
+            )
+
+        # --- Text layer of the remaining pages, up to the end-of-items marker ---
+        text_backend = get_text_layer_backend(detected_template, poppler_path)
+        if 1 in page_texts and text_backend.name != first_page_backend.name:
+            # Page 1 was read before the template was known: read it again like the other pages
+            first_page_text = text_backend.extract_pages(render_source, pages, 1, 1)[0]
+            if first_page_text.strip():
+                page_texts[1] = first_page_text
+
+        end_markers = get_end_of_items_markers(detected_template) if use_early_stop else []
+        last_page = page_numbers[-1]
+        if has_end_of_items_marker(page_texts.get(1, ""), end_markers):
+            last_page = 1
+
+        # Streaming: first page not handed to on_page yet
+        next_page = 1
+
+        def emit_ready_pages():
+            """
+            Pass the ready pages following the last emitted one to on_page, stopping at
+            the first page still waiting for OCR and after the end-of-items page.
+            """
+            nonlocal next_page, last_page
+            while on_page and next_page <= last_page and next_page in page_texts:
+                page_text = page_texts[next_page]
+                on_page(PageText(next_page, page_text, detected_template))
+                if has_end_of_items_marker(page_text, end_markers):
+                    last_page = next_page
+                next_page += 1
+
+        emit_ready_pages()
+        remaining_pages = page_numbers[1:last_page]
+        for run in _page_windows(remaining_pages, text_backend.pages_per_call or len(remaining_pages)):
+            run_texts = text_backend.extract_pages(render_source, pages, run[0], run[-1])
+            for page_number, page_text in zip(run, run_texts):
+                if page_text.strip():
+                    page_texts[page_number] = page_text
+                    if has_end_of_items_marker(page_text, end_markers):
+                        last_page = page_number
+                    emit_ready_pages()
+                    if last_page <= page_number:
+                        break
+            if last_page <= run[-1]:
+                break
+        scanned_pages = [n for n in page_numbers[:last_page] if n not in page_texts]
+
+        # --- Perform OCR on pages with no text ---
+        if scanned_pages:
             try:
+                # OCR profile of the detected template (segmentation mode, models, DPI, whitelist)
+                ocr_profile = get_ocr_profile(detected_template)
+
                 # Convert PDF pages to images (high DPI for better OCR accuracy - DPI=300)
-                # Prepare convert_from_path arguments
-                convert_kwargs = {"dpi": 300}
+                dpi, window = plan_page_rendering(
+                    pages,
+                    scanned_pages,
+                    ocr_profile.get("dpi", OCR_DPI),
+                    get_ocr_memory_limit(max_memory_mb),
+                )
+
+                # Prepare rasterization arguments
+                convert_kwargs = {"dpi": dpi}
                 if poppler_path:
                     convert_kwargs["poppler_path"] = poppler_path
-                
-                images = (
-                    convert_from_path(target_path, **convert_kwargs)
-                    if is_extract_all
-                    else convert_from_path(
-                        target_path, first_page=1, last_page=1, **convert_kwargs
-                    )
+
+                # Every worker holds one page image, so the memory window also caps the pool size
+                workers = min(get_ocr_workers(ocr_workers), len(scanned_pages), window)
+                options = OcrOptions(
+                    convert_kwargs=convert_kwargs,
+                    low_dpi=low_dpi,
+                    min_confidence=min_confidence,
+                    ocr_config=build_tesseract_config(ocr_profile),
+                    table_ocr_config=build_tesseract_config(ocr_profile, for_table=True),
+                    preprocess_steps=preprocess_steps,
+                    triage=use_page_triage,
+                    # Same layout, fast models (with TESSDATA_FAST_DIR)
+                    sparse_ocr_config=build_tesseract_config({
+                        **ocr_profile,
+                        "oem": OCR_PROFILES["speed"]["oem"],
+                        "tessdata": OCR_PROFILES["speed"]["tessdata"],
+                    }),
                 )
-                ocr_results = []
-                # Perform OCR on each image
-                for i, img in enumerate(images):
-                    # page_text = pytesseract.image_to_string(img, lang="eng")
-                    page_text = extract_text_with_layout(img)
-                    ocr_results.append(page_text)
-                    if i == 0:
-                        first_page_text = page_text
-
-                full_text = "\n".join(ocr_results).strip()
+                if use_table_region and detected_template not in (None, InvoiceTemplate.UNKNOWN):
+                    # The template is already known, so every page only needs its line-item table
+                    options = options._replace(
+                        table_template=detected_template, end_of_items_markers=tuple(end_markers)
+                    )
+
+                # Pool: each worker rasterizes and OCRs its own page
+                # Sequential: render a small window of pages, OCR each one and free it before moving on
+                # Either way, text comes back in page order
+                # Early stop: pool pages are submitted one batch (of pool size) at a time
+                batch_size = workers if use_early_stop else None
+                preprocess_totals: dict[str, float] = {}
+                page_classes: dict[str, int] = {}
+                for page_result in ocr_pages(
+                    render_source, scanned_pages, options, workers, window, batch_size
+                ):
+                    page_texts[page_result.page_number] = page_result.text
+                    ocr_escalations += int(page_result.escalated)
+                    for step, elapsed in (page_result.preprocess_ms or {}).items():
+                        preprocess_totals[step] = preprocess_totals.get(step, 0.0) + elapsed
+                    if page_result.page_class:
+                        page_classes[page_result.page_class] = page_classes.get(page_result.page_class, 0) + 1
+
+                    if use_early_stop and page_result.page_number == 1 and detected_template is None:
+                        # Scanned page 1 without a pre-check: the template is known from its OCR text
+                        detected_template = validate_invoice_template(page_result.text)
+                        end_markers = get_end_of_items_markers(detected_template)
+                    if page_result.end_of_items or has_end_of_items_marker(page_result.text, end_markers):
+                        last_page = page_result.page_number
+                    emit_ready_pages()
+                    if last_page <= page_result.page_number:
+                        break
+
+                if preprocess_totals:
+                    step_times = ", ".join(f"{step} {ms:.1f} ms" for step, ms in preprocess_totals.items())
+                    print(f"🧪 Preprocessing ({len(scanned_pages)} pages): {step_times}")
+                if page_classes.get("blank") or page_classes.get("sparse"):
+                    triage_counts = ", ".join(f"{count} {name}" for name, count in page_classes.items())
+                    print(f"🗂️ Page triage: {triage_counts}")
+
             except Exception as ocr_err:
                 return create_error_response(
                     file_path=file_path, message=f"OCR failed: {ocr_err}"
                 )
 
-        # --- Validate invoice template if required ---
-        invoice_template_type = InvoiceTemplate.UNKNOWN
-        if is_check_invoice_template:
-            invoice_template_type = validate_invoice_template(first_page_text)
-            if invoice_template_type == InvoiceTemplate.UNKNOWN:
-                return create_error_response(
-                    file_path=file_path, message="Unknown Invoice Template"
-                )
+        # A scanned page may hold the marker before a text page that was already extracted
+        for page_number in page_numbers[:last_page]:
+            if has_end_of_items_marker(page_texts.get(page_number, ""), end_markers):
+                last_page = page_number
+                break
+        # Pages without text after OCR (e.g. blank) count as empty
+        for page_number in page_numbers[:last_page]:
+            page_texts.setdefault(page_number, "")
+        emit_ready_pages()
+        skipped_pages = len(page_numbers) - last_page
+        page_numbers = page_numbers[:last_page]
+        if skipped_pages:
+            print(f"⏭️ End of line items on page {last_page}, skipped {skipped_pages} page(s)")
+
+        first_page_text = page_texts.get(1, "")
+        # first_line = (
+        #         first_page_text.split("\n")[0].strip() if first_page_text else ""
+        #     )
+        full_text = None
+        if is_extract_all or scanned_pages:
+            full_text = "\n".join(page_texts.get(n, "") for n in page_numbers).strip()
+
+        if detected_template is None:
+            detected_template = InvoiceTemplate.UNKNOWN
+            if ocr_cache:
+                detected_template = validate_invoice_template(first_page_text)
 
-        return create_success_response(
+        if ocr_cache and cache_key:
+            ocr_cache.put(
+                cache_key,
+                CachedReadResult(
+                    page_count=len(pages),
+                    full_text=full_text,
+                    invoice_template=detected_template,
+                    skipped_pages=skipped_pages,
+                ),
+            )
+
+        return _build_read_response(
             file_path=file_path,
             page_count=len(pages),
-            # first_line=first_line,
             full_text=full_text,
-            invoice_template=invoice_template_type,
+            detected_template=detected_template,
+            is_check_invoice_template=is_check_invoice_template,
+            ocr_escalations=ocr_escalations,
+            skipped_pages=skipped_pages,
         )
 
     except PdfReadError as e:
@@ -154,6 +1262,19 @@ def read_pdf_file(
         )
 
     finally:
+        # --- Release the view of the download buffer ---
+        if render_view is not None:
+            render_view.release()
+
+        # --- Release memory-mapped file ---
+        if pdf_file:
+            try:
+                if isinstance(pdf_stream, mmap.mmap):
+                    pdf_stream.close()
+                pdf_file.close()
+            except Exception as e:
+                print(f"⚠️ Warning: Could not close memory-mapped file {target_path}: {e}")
+
         # --- Cleanup temporary file if created ---
         if temp_pdf and os.path.exists(temp_pdf.name):
             try:
@@ -162,3 +1283,55 @@ def read_pdf_file(
                 print(
                     f"⚠️ Warning: Could not delete temporary file {temp_pdf.name}: {e}"
                 )
+
+class PdfPageStream:
+    """
+    Iterable of PageText, filled by read_pdf_file running in a background thread, so the
+    consumer (line parsing, DB inserts) overlaps with reading / OCR of the following pages.
+    read_options: read_pdf_file arguments. The FileReadResponse is set in .response once
+    iteration is over.
+    Use it as a context manager (or call close()): a consumer that stops early, e.g. on an
+    error, also stops the background read instead of leaving it running on the file.
+    """
+
+    def __init__(self, file_path: str, **read_options):
+        self.response: FileReadResponse | None = None
+        self._pages: queue.Queue = queue.Queue()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(
+            target=self._read, args=(file_path, read_options), daemon=True, name="pdf-reader"
+        )
+        self._thread.start()
+
+    def _read(self, file_path: str, read_options: dict):
+        try:
+            self.response = read_pdf_file(file_path, on_page=self._put_page, **read_options)
+        except Exception as e:
+            self.response = create_error_response(file_path=file_path, message=f"Unexpected error: {e}")
+        finally:
+            # End of pages
+            self._pages.put(None)
+
+    def _put_page(self, page: PageText):
+        if self._closed.is_set():
+            # Aborts read_pdf_file at its next page
+            raise RuntimeError("Page stream closed")
+        self._pages.put(page)
+
+    def __iter__(self) -> Iterator[PageText]:
+        while not self._closed.is_set() and (page := self._pages.get()) is not None:
+            yield page
+        self._thread.join()
+
+    def close(self):
+        """
+        Stop the background read (after the page in progress) and wait for it to end.
+        """
+        self._closed.set()
+        self._thread.join()
+
+    def __enter__(self) -> "PdfPageStream":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,190 @@
+"""
+Prefetch the files of upcoming pending invoices.
+While the worker processes one invoice, the next ones are downloaded in background
+threads into a bounded local staging directory, so reading them starts from a local file.
+"""
+import os
+import atexit
+import shutil
+import tempfile
+import threading
+from uuid import UUID
+from concurrent.futures import Future, ThreadPoolExecutor
+from src.schemas.invoice import InvoiceBase
+from src.db.config import get_db_connection
+from src.services.downloader import download_file
+from src.repositories.invoice import get_next_pending_invoices
+
+_invoice_prefetcher: "InvoicePrefetcher | None" = None
+
+class InvoicePrefetcher:
+    """
+    Downloads the next `depth` pending invoices into staging_dir.
+    At most `depth` files and max_bytes (by the invoices' file_size) are staged or in flight.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        depth: int,
+        max_bytes: int,
+        workers: int = 2,
+        staging_dir: str | None = None,
+    ):
+        self.base_url = base_url
+        self.depth = depth
+        self.max_bytes = max_bytes
+        # A staging directory we created ourselves is removed on close
+        self._owns_staging_dir = staging_dir is None
+        self.staging_dir = staging_dir or tempfile.mkdtemp(prefix="invoice-prefetch-")
+        os.makedirs(self.staging_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        # invoice_id -> (download future, staged path, expected size)
+        self._entries: dict[UUID, tuple[Future, str, int]] = {}
+        # invoice_id -> staged path of files handed to the worker, until released
+        self._taken: dict[UUID, str] = {}
+        self._lock = threading.Lock()
+        # Look-ahead connection, kept open across invoices (reopened if it was lost)
+        self._conn = None
+
+    def _staged_path(self, invoice: InvoiceBase) -> str:
+        suffix = os.path.splitext(invoice.invoice_url)[1] or ".pdf"
+        return os.path.join(self.staging_dir, f"{invoice.invoice_id}{suffix}")
+
+    def _staged_bytes(self) -> int:
+        return sum(size for _, _, size in self._entries.values())
+
+    def schedule(self, invoices: list[InvoiceBase]):
+        """
+        Start downloading the given invoices (in order) that are not staged yet,
+        while the staging area has room. Staged files of invoices no longer listed
+        (taken by another worker, cancelled) are dropped.
+        """
+        upcoming = {invoice.invoice_id for invoice in invoices}
+        with self._lock:
+            for invoice_id in list(self._entries):
+                future, _, _ = self._entries[invoice_id]
+                if invoice_id not in upcoming and future.done():
+                    self._discard(invoice_id)
+
+            for invoice in invoices:
+                if invoice.invoice_id in self._entries:
+                    continue
+                if len(self._entries) >= self.depth:
+                    break
+                if self._entries and self._staged_bytes() + invoice.file_size > self.max_bytes:
+                    break
+                path = self._staged_path(invoice)
+                url = self.base_url + str(invoice.invoice_url)
+                future = self._executor.submit(download_file, url, path)
+                self._entries[invoice.invoice_id] = (future, path, invoice.file_size)
+
+    def refresh(self):
+        """
+        Look ahead at the next pending invoices (separate connection) and prefetch them.
+        """
+        if self._conn is None or self._conn.closed:
+            self._conn = get_db_connection(autocommit=True)
+            if self._conn is None:
+                return
+        self.schedule(get_next_pending_invoices(self.depth, conn=self._conn))
+
+    def take(self, invoice: InvoiceBase) -> str | None:
+        """
+        Local path of the invoice's prefetched file, waiting for an in-flight download.
+        None if it was not prefetched or the download failed (the caller downloads it itself).
+        The file leaves the look-ahead slots; the caller releases it once done with it.
+        """
+        with self._lock:
+            entry = self._entries.pop(invoice.invoice_id, None)
+        if entry is None:
+            return None
+
+        future, path, _ = entry
+        try:
+            future.result()
+        except Exception as e:
+            print(f"⚠️ Warning: prefetch failed for invoice {invoice.invoice_id}: {e}")
+            _remove_file(path)
+            return None
+
+        with self._lock:
+            self._taken[invoice.invoice_id] = path
+        return path
+
+    def release(self, invoice_id: UUID):
+        """
+        Delete an invoice's staged file (taken or still in a look-ahead slot).
+        """
+        with self._lock:
+            path = self._taken.pop(invoice_id, None)
+            if path:
+                _remove_file(path)
+            self._discard(invoice_id)
+
+    def _discard(self, invoice_id: UUID):
+        entry = self._entries.pop(invoice_id, None)
+        if entry is None:
+            return
+        future, path, _ = entry
+        if not future.cancel():
+            # Already running: remove the file once the download has finished
+            future.add_done_callback(lambda _: _remove_file(path))
+        _remove_file(path)
+
+    def close(self):
+        with self._lock:
+            for invoice_id in list(self._entries):
+                self._discard(invoice_id)
+            for path in self._taken.values():
+                _remove_file(path)
+            self._taken.clear()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._owns_staging_dir:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _close_invoice_prefetcher():
+    global _invoice_prefetcher
+    if _invoice_prefetcher is not None:
+        _invoice_prefetcher.close()
+        _invoice_prefetcher = None
+
+atexit.register(_close_invoice_prefetcher)
+
+def get_invoice_prefetcher() -> InvoicePrefetcher | None:
+    """
+    Get the worker's invoice prefetcher.
+    Environment: PREFETCH_DEPTH (invoices looked ahead, default 0 = disabled, e.g. 3),
+    PREFETCH_MAX_MB (staging area size, default 200), PREFETCH_WORKERS (download threads, default 2),
+    PREFETCH_DIR (staging directory, default: a temporary directory).
+    Returns None when disabled or BASE_URL is not set.
+    """
+    global _invoice_prefetcher
+
+    depth = int(os.getenv("PREFETCH_DEPTH", "0"))
+    base_url = os.getenv("BASE_URL")
+    if depth <= 0 or not base_url:
+        return None
+
+    if _invoice_prefetcher is None:
+        try:
+            _invoice_prefetcher = InvoicePrefetcher(
+                base_url=base_url,
+                depth=depth,
+                max_bytes=int(os.getenv("PREFETCH_MAX_MB", "200")) * 1024 * 1024,
+                workers=int(os.getenv("PREFETCH_WORKERS", "2")),
+                staging_dir=os.getenv("PREFETCH_DIR"),
+            )
+        except OSError as e:
+            print(f"⚠️ Warning: invoice prefetch disabled: {e}")
+            return None
+    return _invoice_prefetcher
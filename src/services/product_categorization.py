@@ -5,14 +5,13 @@ from src.repositories.category_dictionary import get_all_active_dictionary_rules
 from src.repositories.product_category import bulk_save_product_categories
 from src.schemas.product_category import ProductCategory
 from src.services.categorization import (
-    prepare_frequency_map,
     get_scored_keywords,
-    prepare_category_rules_map,
     calculate_category_scores,
     select_top_categories
 )
+from src.services.categorization_engine import CategorizationEngine
 from src.constants.enums import KeywordSource
-from src.utils.text_helpers import normalize_product_name
+from src.utils.text_helpers import get_product_normalized_name
 
 def categorize_single_product(
     product,
@@ -24,7 +23,7 @@ def categorize_single_product(
     """
     scored_keywords = get_scored_keywords(
         product_id=product.id,
-        normalized_name=normalize_product_name(product.name),
+        normalized_name=get_product_normalized_name(product),
         frequency_map=frequency_map,
         source=KeywordSource.DATABASE
     )
@@ -43,19 +42,17 @@ def categorize_single_product(
 async def run_master_categorization(dictionary_rules: List):
     """
     Run categorization for all products in the master product database
+    (the dictionary compiled once, products scored in sparse-matrix batches)
     """
-    freq_map = prepare_frequency_map(dictionary_rules)
-    rules_map = prepare_category_rules_map(dictionary_rules)
+    engine = CategorizationEngine(dictionary_rules)
 
     all_products = get_all_products()
-    final_results = []
-    
-    for index, product in enumerate(all_products):
-        result = categorize_single_product(product, freq_map, rules_map)
-        if result:
-            final_results.append(result)
+    results = engine.categorize(
+        [product.id for product in all_products],
+        [get_product_normalized_name(product) for product in all_products],
+    )
 
-    return final_results
+    return [result for result in results if result]
 
 async def main():
     # Get active category dictionary rules
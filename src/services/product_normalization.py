@@ -0,0 +1,77 @@
+import asyncio
+from typing import List
+from src.repositories.product import (
+    get_all_products,
+    get_products_to_normalize,
+    bulk_save_product_normalized_names
+)
+from src.schemas.product import ProductBase, ProductNormalizedName
+from src.constants.normalization import NORMALIZER_VERSION
+from src.utils.text_helpers import normalize_product_name, parse_pack_size
+
+def build_product_normalized_names(products: List[ProductBase]) -> List[ProductNormalizedName]:
+    """
+    Normalized names and pack sizes of the products whose stored values are missing,
+    from an older NORMALIZER_VERSION, or out of date with their name.
+    """
+    results = []
+    for product in products:
+        normalized_name = normalize_product_name(product.name)
+        pack_size = parse_pack_size(product.name)
+        result = ProductNormalizedName(
+            product_id=product.id,
+            normalized_name=normalized_name,
+            normalizer_version=NORMALIZER_VERSION,
+            pack_count=pack_size.count if pack_size else None,
+            pack_size=pack_size.size if pack_size else None,
+            pack_unit=pack_size.unit if pack_size else None,
+        )
+        stored = (
+            product.normalizer_version, product.normalized_name,
+            product.pack_count, product.pack_size, product.pack_unit,
+        )
+        if stored == (
+            result.normalizer_version, result.normalized_name,
+            result.pack_count, result.pack_size, result.pack_unit,
+        ):
+            continue
+        results.append(result)
+    return results
+
+def refresh_product_normalized_names() -> int:
+    """
+    Normalize the products created or renamed since the last run (their stored values are reset
+    by the product_normalized_name_reset trigger). Returns the number of products saved.
+    """
+    results = build_product_normalized_names(get_products_to_normalize(NORMALIZER_VERSION))
+    if not results:
+        return 0
+    if not bulk_save_product_normalized_names(results):
+        print(f"⚠️ Warning: could not save normalized names of {len(results)} products")
+        return 0
+    return len(results)
+
+async def main():
+    """
+    Backfill the catalog's normalized names: run once after the migration
+    (src/db/migrations/001_product_normalized_name.sql) or when NORMALIZER_VERSION changes.
+    New and renamed products are then picked up by the worker (refresh_product_normalized_names).
+    """
+    all_products = get_all_products()
+    if not all_products:
+        print("No products found.")
+        return
+
+    results = build_product_normalized_names(all_products)
+    if not results:
+        print(f"[FINISH] All {len(all_products)} products are normalized (version {NORMALIZER_VERSION}).")
+        return
+
+    print(f"[INFO] Saving normalized names of {len(results)}/{len(all_products)} products...")
+    if bulk_save_product_normalized_names(results):
+        print("[FINISH] Normalized product names are up to date.")
+    else:
+        print("[FAIL] Data saving failed.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
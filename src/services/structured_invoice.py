@@ -0,0 +1,208 @@
+"""
+Structured e-invoice ingestion: CSV exports, XLSX sheets and UBL / Peppol XML.
+Line items are read straight into ProductExtract rows (no PDF text, OCR or regex),
+streaming row by row so large files are never loaded whole.
+"""
+import os
+import csv
+import tempfile
+import xml.etree.ElementTree as ET
+import openpyxl
+from typing import Iterable, Iterator
+from uuid import UUID
+from src.constants.enums import FileType
+from src.schemas.product_extract import ProductExtract
+from src.services.downloader import download_file
+
+DEFAULT_CURRENCY = "AUD"
+
+# Accepted column headers per field (compared lower-case, without surrounding spaces)
+COLUMN_ALIASES = {
+    "code": ("product code", "item code", "code", "sku", "article number"),
+    "desc": ("description", "item description", "product name", "product", "name"),
+    "qty": ("quantity", "qty", "shipped qty", "invoiced quantity"),
+    "price": ("unit price", "price", "net price", "cost price"),
+    "currency": ("currency", "currency code"),
+}
+
+# file_type values (extensions and MIME types) -> FileType
+FILE_TYPE_ALIASES = {
+    "pdf": FileType.PDF,
+    "application/pdf": FileType.PDF,
+    "csv": FileType.CSV,
+    "text/csv": FileType.CSV,
+    "xlsx": FileType.XLSX,
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": FileType.XLSX,
+    "xml": FileType.XML,
+    "application/xml": FileType.XML,
+    "text/xml": FileType.XML,
+}
+
+def get_file_type(file_type: str | None, file_name: str | None = None) -> FileType:
+    """
+    Resolve an invoice's file type from its file_type value, else from the file name extension.
+    Unknown types are treated as PDF (the historical default).
+    """
+    value = (file_type or "").strip().lower().lstrip(".")
+    if value in FILE_TYPE_ALIASES:
+        return FILE_TYPE_ALIASES[value]
+
+    extension = os.path.splitext(file_name or "")[1].lower().lstrip(".")
+    return FILE_TYPE_ALIASES.get(extension, FileType.PDF)
+
+def is_structured_file_type(file_type: FileType) -> bool:
+    return file_type in STRUCTURED_PARSERS
+
+# --- Tabular files (CSV / XLSX) ---
+
+def _map_columns(headers: Iterable) -> dict[str, int]:
+    """
+    Map field names to column indexes using COLUMN_ALIASES.
+    """
+    columns: dict[str, int] = {}
+    for index, header in enumerate(headers):
+        name = str(header or "").strip().lower()
+        for field, aliases in COLUMN_ALIASES.items():
+            if name in aliases and field not in columns:
+                columns[field] = index
+    if "desc" not in columns or "qty" not in columns:
+        raise ValueError("Missing description or quantity column")
+    return columns
+
+def _to_float(value) -> float:
+    if value is None or value == "":
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(str(value).replace(",", "").replace("$", "").strip())
+
+def _rows_to_products(rows: Iterator[tuple], invoice_id: UUID) -> Iterator[ProductExtract]:
+    """
+    First row: headers. Rows without a description or a quantity (blank lines, totals) are skipped.
+    """
+    columns = _map_columns(next(rows, ()))
+
+    def cell(row, field):
+        index = columns.get(field)
+        return row[index] if index is not None and index < len(row) else None
+
+    for row in rows:
+        raw_name = str(cell(row, "desc") or "").strip()
+        if not raw_name or cell(row, "qty") in (None, ""):
+            continue
+        try:
+            code = cell(row, "code")
+            yield ProductExtract(
+                invoice_id=invoice_id,
+                raw_product_name=raw_name,
+                product_code=str(code).strip() if code not in (None, "") else None,
+                quantity=_to_float(cell(row, "qty")),
+                cost_price=_to_float(cell(row, "price")),
+                currency=str(cell(row, "currency") or DEFAULT_CURRENCY).strip(),
+            )
+        except ValueError as e:
+            print(f"❌ Error extracting products: {e}")
+            continue
+
+def parse_csv_invoice(file_path: str, invoice_id: UUID) -> Iterator[ProductExtract]:
+    with open(file_path, newline="", encoding="utf-8-sig") as f:
+        yield from _rows_to_products(csv.reader(f), invoice_id)
+
+def parse_xlsx_invoice(file_path: str, invoice_id: UUID) -> Iterator[ProductExtract]:
+    """
+    First worksheet, read-only mode (rows streamed from the zip, not loaded in memory).
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        yield from _rows_to_products(workbook.worksheets[0].iter_rows(values_only=True), invoice_id)
+    finally:
+        workbook.close()
+
+# --- UBL / Peppol XML ---
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+def _find_path(element: ET.Element, *names: str) -> ET.Element | None:
+    """
+    Follow child elements by local name (UBL namespaces and prefixes vary between senders).
+    """
+    for name in names:
+        element = next((child for child in element if _local_name(child.tag) == name), None)
+        if element is None:
+            return None
+    return element
+
+def _text(element: ET.Element | None) -> str:
+    return (element.text or "").strip() if element is not None else ""
+
+def parse_ubl_invoice(file_path: str, invoice_id: UUID) -> Iterator[ProductExtract]:
+    """
+    Stream InvoiceLine / CreditNoteLine elements with iterparse; each line is removed from
+    its parent once read (ElementTree has no getparent, so open elements are tracked),
+    so memory stays flat for large invoices.
+    """
+    open_elements: list[ET.Element] = []
+    for event, element in ET.iterparse(file_path, events=("start", "end")):
+        if event == "start":
+            open_elements.append(element)
+            continue
+        open_elements.pop()
+        if _local_name(element.tag) not in ("InvoiceLine", "CreditNoteLine"):
+            continue
+
+        quantity = _find_path(element, "InvoicedQuantity")
+        if quantity is None:
+            quantity = _find_path(element, "CreditedQuantity")
+        price = _find_path(element, "Price", "PriceAmount")
+        code = (
+            _text(_find_path(element, "Item", "SellersItemIdentification", "ID"))
+            or _text(_find_path(element, "Item", "StandardItemIdentification", "ID"))
+        )
+        raw_name = _text(_find_path(element, "Item", "Name")) or _text(_find_path(element, "Item", "Description"))
+        try:
+            if raw_name:
+                yield ProductExtract(
+                    invoice_id=invoice_id,
+                    raw_product_name=raw_name,
+                    product_code=code or None,
+                    quantity=_to_float(_text(quantity)),
+                    cost_price=_to_float(_text(price)),
+                    currency=price.get("currencyID", DEFAULT_CURRENCY) if price is not None else DEFAULT_CURRENCY,
+                )
+        except ValueError as e:
+            print(f"❌ Error extracting products: {e}")
+        finally:
+            element.clear()
+            if open_elements:
+                open_elements[-1].remove(element)
+
+STRUCTURED_PARSERS = {
+    FileType.CSV: parse_csv_invoice,
+    FileType.XLSX: parse_xlsx_invoice,
+    FileType.XML: parse_ubl_invoice,
+}
+
+def read_structured_invoice(file_path: str, file_type: FileType, invoice_id: UUID) -> list[ProductExtract]:
+    """
+    Read the line items of a structured invoice (local path or URL).
+    URLs are streamed to a temporary file first. Raises on download or parse errors.
+    """
+    parser = STRUCTURED_PARSERS.get(file_type)
+    if parser is None:
+        raise ValueError(f"Unsupported structured file type: {file_type}")
+
+    temp_file = None
+    try:
+        if file_path.startswith(("http://", "https://")):
+            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_type.value}")
+            temp_file.close()
+            download_file(file_path, temp_file.name)
+            file_path = temp_file.name
+        elif not os.path.isfile(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        return list(parser(file_path, invoice_id))
+    finally:
+        if temp_file and os.path.exists(temp_file.name):
+            os.remove(temp_file.name)
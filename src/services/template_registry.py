@@ -0,0 +1,212 @@
+"""
+Supplier template registry.
+Templates come from TEMPLATE_CONFIGS (built in), optionally extended or overridden by a JSON file
+(INVOICE_TEMPLATES_FILE) and the invoice_template table (INVOICE_TEMPLATES_DB=true), and are
+reloaded when the file changes or every INVOICE_TEMPLATES_RELOAD_SECONDS for the table.
+Detection runs every keyword and header of every template through one Aho-Corasick automaton,
+so page 1 is scanned once whatever the number of templates.
+"""
+import os
+import re
+import json
+import time
+from collections import deque
+from src.constants.invoice_template import InvoiceTemplate, TEMPLATE_CONFIGS
+from src.repositories.invoice_template import get_active_invoice_templates
+from src.services.line_item_parser import LineItemParser
+
+# Detection thresholds (a template config may override them)
+MIN_KEYWORD_MATCHES = 2
+MIN_HEADER_MATCHES = 3
+
+_template_registry: "TemplateRegistry | None" = None
+# (templates file, its mtime, time of the last DB load) the registry was built from
+_template_registry_source: tuple | None = None
+
+class AhoCorasick:
+    """
+    Multi-pattern substring matcher: reports which patterns occur in a text in one pass.
+    """
+
+    def __init__(self, patterns: list[str]):
+        # Trie: goto transitions, failure links and the pattern ids ending at each node
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[list[int]] = [[]]
+
+        for pattern_id, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = next_node
+            self._output[node].append(pattern_id)
+
+        # Breadth-first: a node's failure link is the longest proper suffix that is also in the trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find_all(self, text: str) -> set[int]:
+        """
+        Ids of the patterns that occur in text.
+        """
+        found: set[int] = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+def template_name(template: InvoiceTemplate | str) -> str:
+    return template.value if isinstance(template, InvoiceTemplate) else str(template)
+
+def to_template(name: str) -> InvoiceTemplate | str:
+    """
+    Built-in templates as InvoiceTemplate members, registry-only templates as plain names.
+    """
+    try:
+        return InvoiceTemplate(name)
+    except ValueError:
+        return name
+
+class TemplateRegistry:
+    """
+    Template configs by name, with a compiled detector.
+    """
+
+    def __init__(self, configs: dict[str, dict]):
+        self.configs = {template_name(name): config for name, config in configs.items()}
+        self._order = {name: index for index, name in enumerate(self.configs)}
+        patterns: dict[str, int] = {}
+        # pattern id -> [(template name, "keywords" / "table_headers")]
+        self._owners: list[list[tuple[str, str]]] = []
+        for name, config in self.configs.items():
+            for kind in ("keywords", "table_headers"):
+                for pattern in {p.lower() for p in config.get(kind, [])}:
+                    if pattern not in patterns:
+                        patterns[pattern] = len(patterns)
+                        self._owners.append([])
+                    self._owners[patterns[pattern]].append((name, kind))
+        self._matcher = AhoCorasick(list(patterns))
+        # Line-item patterns, compiled once per registry load
+        self._line_patterns = {
+            name: re.compile(config["pattern"], flags=re.MULTILINE)
+            for name, config in self.configs.items()
+            if config.get("pattern")
+        }
+        self._line_parsers: dict[str, LineItemParser] = {}
+        for name, config in self.configs.items():
+            if config.get("columns"):
+                try:
+                    self._line_parsers[name] = LineItemParser(config["columns"])
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"⚠️ Warning: invalid line-item columns for template {name} (using its pattern): {e}")
+
+    def get(self, template) -> dict | None:
+        if not template:
+            return None
+        return self.configs.get(template_name(template))
+
+    def line_pattern(self, template) -> re.Pattern | None:
+        if not template:
+            return None
+        return self._line_patterns.get(template_name(template))
+
+    def line_parser(self, template) -> LineItemParser | re.Pattern | None:
+        """
+        Line-item parser of a template: its column parser, else its regex pattern.
+        Both provide finditer(text, pos) with groupdict() / end() matches.
+        """
+        if not template:
+            return None
+        return self._line_parsers.get(template_name(template)) or self.line_pattern(template)
+
+    def detect(self, text_content: str) -> InvoiceTemplate | str:
+        """
+        First template (registry order) with at least MIN_KEYWORD_MATCHES keywords
+        and MIN_HEADER_MATCHES table headers in the text (case-insensitive).
+        """
+        if not text_content:
+            return InvoiceTemplate.UNKNOWN
+
+        counts: dict[tuple[str, str], int] = {}
+        for pattern_id in self._matcher.find_all(text_content.lower()):
+            for owner in self._owners[pattern_id]:
+                counts[owner] = counts.get(owner, 0) + 1
+
+        # Only templates with at least one match are checked, in registry order
+        candidates = sorted({name for name, _ in counts}, key=self._order.__getitem__)
+        for name in candidates:
+            config = self.configs[name]
+            if (
+                counts.get((name, "keywords"), 0) >= config.get("min_keyword_matches", MIN_KEYWORD_MATCHES)
+                and counts.get((name, "table_headers"), 0) >= config.get("min_header_matches", MIN_HEADER_MATCHES)
+            ):
+                return to_template(name)
+        return InvoiceTemplate.UNKNOWN
+
+def load_template_configs(templates_file: str | None, use_db: bool) -> dict[str, dict]:
+    """
+    Built-in templates, then the JSON file ({name: config}), then the DB table; later sources win.
+    """
+    configs: dict[str, dict] = {template_name(template): config for template, config in TEMPLATE_CONFIGS.items()}
+    if templates_file:
+        try:
+            with open(templates_file, encoding="utf-8") as f:
+                configs.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Warning: cannot load invoice templates from {templates_file}: {e}")
+    if use_db:
+        configs.update(get_active_invoice_templates())
+    return configs
+
+def get_template_registry() -> TemplateRegistry:
+    """
+    Get the template registry, rebuilt when INVOICE_TEMPLATES_FILE changes (mtime) or, with
+    INVOICE_TEMPLATES_DB=true, every INVOICE_TEMPLATES_RELOAD_SECONDS (default 60).
+    """
+    global _template_registry, _template_registry_source
+
+    templates_file = os.getenv("INVOICE_TEMPLATES_FILE")
+    use_db = os.getenv("INVOICE_TEMPLATES_DB", "false").lower() == "true"
+    try:
+        file_mtime = os.path.getmtime(templates_file) if templates_file else None
+    except OSError:
+        file_mtime = None
+
+    db_loaded_at = _template_registry_source[2] if _template_registry_source else None
+    if use_db:
+        reload_seconds = float(os.getenv("INVOICE_TEMPLATES_RELOAD_SECONDS", "60"))
+        if db_loaded_at is None or time.monotonic() - db_loaded_at >= reload_seconds:
+            db_loaded_at = time.monotonic()
+    else:
+        db_loaded_at = None
+
+    source = (templates_file, file_mtime, db_loaded_at)
+    if _template_registry is None or source != _template_registry_source:
+        _template_registry = TemplateRegistry(load_template_configs(templates_file, use_db))
+        _template_registry_source = source
+    return _template_registry
+
+def get_template_config(template) -> dict | None:
+    """
+    Config of a template (InvoiceTemplate or registry name), None if unknown.
+    """
+    return get_template_registry().get(template)
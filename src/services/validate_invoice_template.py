@@ -1,27 +1,13 @@
-from src.constants.invoice_template import TEMPLATE_CONFIGS, InvoiceTemplate
+from src.constants.invoice_template import InvoiceTemplate
+from src.services.template_registry import get_template_registry
 from typing import Optional
 
-def validate_invoice_template(text_content: str) -> Optional[InvoiceTemplate]:
+def validate_invoice_template(text_content: str) -> Optional[InvoiceTemplate | str]:
     """
     Check the text content of the PDF page to determine the type of template.
+    A template matches with at least 2 keywords and 3 table headers, all templates
+    of the registry being searched in a single pass (see template_registry).
     Returns:
-        str: GULLI / MAYERS / UNKNOWN
+        str: GULLI / MAYERS / registry template name / UNKNOWN
     """
-    if not text_content:
-        return InvoiceTemplate.UNKNOWN
-
-    content_lower = text_content.lower()
-
-    for template_name, config in TEMPLATE_CONFIGS.items():
-        keywords = [kw.lower() for kw in config["keywords"]]
-        matched_keywords = [kw for kw in keywords if kw in content_lower]
-        
-        # Set a threshold (match at least 2 keywords).
-        if len(matched_keywords) >= 2:
-            headers = [h.lower() for h in config["table_headers"]]
-            matched_headers = [h for h in headers if h in content_lower]
-            # Set a threshold (match at least 3 col).
-            if len(matched_headers) >= 3:
-                return InvoiceTemplate(template_name)
-                
-    return InvoiceTemplate.UNKNOWN
\ No newline at end of file
+    return get_template_registry().detect(text_content)
\ No newline at end of file
@@ -14,7 +14,9 @@ def create_success_response(
     page_count: int, 
     # first_line: Optional[str] = None,
     full_text: Optional[str] = None,
-    invoice_template: Optional[InvoiceTemplate] = InvoiceTemplate.UNKNOWN
+    invoice_template: Optional[InvoiceTemplate | str] = InvoiceTemplate.UNKNOWN,
+    ocr_escalations: Optional[int] = None,
+    skipped_pages: Optional[int] = None,
 ) -> FileReadResponse:
     return FileReadResponse(
         file_path=str(file_path),
@@ -22,5 +24,7 @@ def create_success_response(
         page_count=page_count,
         # first_line=first_line,
         full_text=full_text,
-        invoice_template=invoice_template
+        invoice_template=invoice_template,
+        ocr_escalations=ocr_escalations,
+        skipped_pages=skipped_pages,
     )
\ No newline at end of file
@@ -1,17 +1,121 @@
 import re
-from src.constants.normalization import UNIT_MAPPING, NON_MEANINGFUL_WORDS, SPECIAL_CHARS_PATTERN
+from functools import lru_cache
+from src.constants.normalization import (
+    NORMALIZER_VERSION,
+    UNIT_MAPPING,
+    NON_MEANINGFUL_WORDS,
+    SPECIAL_CHARS_PATTERN,
+    PACK_SIZE_UNITS,
+    PACK_SIZE_TOLERANCE,
+)
+from src.schemas.product import PackSize
 
+# Distinct names kept by the normalize_product_name memo (invoice lines and catalog names repeat)
+NORMALIZE_CACHE_SIZE = 50_000
+
+# Rewrites in the order they apply: unit mappings, non-meaningful words, special characters
+_REWRITES = [
+    *((re.compile(pattern), replacement) for pattern, replacement in UNIT_MAPPING.items()),
+    *((re.compile(word_pattern), '') for word_pattern in NON_MEANINGFUL_WORDS),
+    (re.compile(SPECIAL_CHARS_PATTERN), ' '),
+]
+
+def _compile_rewrites() -> re.Pattern:
+    """
+    One alternation of every rewrite pattern, so a name is scanned once.
+    Whole-word patterns (\\b...\\b) share a single pair of word boundaries.
+    This gives the same result as applying the rewrites one after another because word
+    patterns only match whole words and no replacement creates a match for a later pattern.
+    """
+    words, others = [], []
+    for pattern, _ in _REWRITES:
+        source = pattern.pattern
+        if source.startswith(r"\b") and source.endswith(r"\b") and len(source) > 4:
+            words.append(f"(?:{source[2:-2]})")
+        else:
+            others.append(f"(?:{source})")
+    alternatives = ([rf"\b(?:{'|'.join(words)})\b"] if words else []) + others
+    return re.compile("|".join(alternatives))
+
+_REWRITE_PATTERN = _compile_rewrites()
+
+@lru_cache(maxsize=1024)
+def _rewrite(matched: str) -> str:
+    """
+    Replacement of a matched word / character: that of the first rewrite matching it.
+    """
+    return next(replacement for pattern, replacement in _REWRITES if pattern.fullmatch(matched))
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
 def normalize_product_name(text: str) -> str:
     if not text: return ""
     
     text = text.lower().strip()
+    text = _REWRITE_PATTERN.sub(lambda m: _rewrite(m.group()), text)
     
-    for pattern, replacement in UNIT_MAPPING.items():
-        text = re.sub(pattern, replacement, text)
-    
-    for word_pattern in NON_MEANINGFUL_WORDS:
-        text = re.sub(word_pattern, '', text)
-        
-    text = re.sub(SPECIAL_CHARS_PATTERN, ' ', text)
-    
-    return " ".join(text.split())
\ No newline at end of file
+    return " ".join(text.split())
+
+def get_product_normalized_name(product) -> str:
+    """
+    Normalized name of a catalog product: the stored one if it was computed by the current
+    NORMALIZER_VERSION, else normalized now.
+    """
+    if product.normalized_name is not None and product.normalizer_version == NORMALIZER_VERSION:
+        return product.normalized_name
+    return normalize_product_name(product.name)
+
+# --- Pack size ---
+
+# "[<count> x ]<size> <unit>[ x <count>]", e.g. "12 x 500ml", "10X150G", "1.5kg", "250g x 12"
+_PACK_SIZE_PATTERN = re.compile(
+    r"(?:(?<![\d.])(?P<count>\d+)\s*x\s*|(?<![\d.]))(?P<size>\d+(?:\.\d+)?)\s*(?P<unit>[a-z]+)\b"
+    r"(?:\s*x\s*(?P<count_after>\d+)\b)?"
+)
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def parse_pack_size(text: str) -> PackSize | None:
+    """
+    First pack size in a product name (unit words as in UNIT_MAPPING), None if there is none.
+    """
+    if not text: return None
+
+    for match in _PACK_SIZE_PATTERN.finditer(text.lower()):
+        unit = next(
+            (replacement for pattern, replacement in _REWRITES[:len(UNIT_MAPPING)] if pattern.fullmatch(match["unit"])),
+            None,
+        )
+        if unit not in PACK_SIZE_UNITS:
+            continue
+        base_unit, factor = PACK_SIZE_UNITS[unit]
+        size = float(match["size"]) * factor
+        count = int(match["count"] or match["count_after"] or 1)
+        if size > 0 and count > 0:
+            return PackSize(count=count, size=size, unit=base_unit)
+    return None
+
+def get_product_pack_size(product) -> PackSize | None:
+    """
+    Pack size of a catalog product: the stored one if computed by the current
+    NORMALIZER_VERSION, else parsed now.
+    """
+    if product.normalizer_version != NORMALIZER_VERSION:
+        return parse_pack_size(product.name)
+    if not product.pack_unit or not product.pack_size:
+        return None
+    return PackSize(count=product.pack_count or 1, size=product.pack_size, unit=product.pack_unit)
+
+def is_pack_size_compatible(a: PackSize | None, b: PackSize | None) -> bool:
+    """
+    Blocking rule for matching: same base unit and the same size per item or in total
+    (a 12 x 275g case vs a 275g item), within PACK_SIZE_TOLERANCE.
+    Names without a pack size are compatible with anything.
+    """
+    if a is None or b is None:
+        return True
+    if a.unit != b.unit:
+        return False
+
+    def close(x: float, y: float) -> bool:
+        return abs(x - y) <= PACK_SIZE_TOLERANCE * max(x, y)
+
+    return close(a.size, b.size) or close(a.count * a.size, b.count * b.size)
@@ -0,0 +1,86 @@
+import uuid
+from src.constants.enums import KeywordType
+from src.schemas.category_dictionary import CategoryDictionary
+from src.services.categorization import (
+    prepare_frequency_map,
+    get_scored_keywords,
+    prepare_category_rules_map,
+    calculate_category_scores,
+    select_top_categories
+)
+from src.services.categorization_engine import CategorizationEngine
+
+RULES = [
+    ("cheese", "CAT_CHEESE", 1.0),
+    ("cheese", "CAT_PIZZA", 0.5),
+    ("mozzarella", "CAT_CHEESE", 1.0),
+    ("mozzarella", "CAT_PIZZA", 0.8),
+    ("salami", "CAT_MEAT", 1.0),
+    ("salami", "CAT_PIZZA", 0.5),
+    ("devon", "CAT_MEAT", 0.5),
+    ("devon", "CAT_DELI", 1.0),
+    ("primo", "CAT_DELI", 0.8),
+    ("primo", "CAT_MEAT", 0.3),
+    ("olive", "CAT_DELI", 0.3),
+    ("olive", "CAT_OIL", 0.3),
+    ("oil", "CAT_OIL", 1.0),
+    ("oil", "CAT_OIL", 0.5),
+]
+
+def make_rules() -> list[CategoryDictionary]:
+    return [
+        CategoryDictionary(
+            id=uuid.uuid4(), category_code=code, category_name=code, keyword=keyword,
+            weight=weight, keyword_type=KeywordType.PRIMARY, is_active=True,
+        )
+        for keyword, code, weight in RULES
+    ]
+
+def legacy_categorize(product_id, name, rules):
+    scored_keywords = get_scored_keywords(product_id, name, prepare_frequency_map(rules))
+    return select_top_categories(product_id, calculate_category_scores(scored_keywords, prepare_category_rules_map(rules)))
+
+# 1. Same top categories and ratios as the per-product pipeline: ties in first-met order,
+#    repeated keywords and rules, positions past the scored ones, no keyword -> None
+def test_categorize_matches_select_top_categories():
+    rules = make_rules()
+    names = [
+        "mozzarella cheese 2 kg",
+        "primo devon 3 kg",
+        "olive oil 4 l",
+        "salami salami mild",
+        "extra virgin olive oil spanish cold pressed tin pack of 4 oil",
+        "bread rolls",
+        "",
+        "a b c d e f g h i j k l cheese",
+    ]
+    ids = [uuid.uuid4() for _ in names]
+
+    results = CategorizationEngine(rules).categorize(ids, names, batch_size=3)
+
+    for product_id, name, result in zip(ids, names, results):
+        expected = legacy_categorize(product_id, name, rules)
+        if expected is None:
+            assert result is None
+        else:
+            assert result.model_dump(exclude={"id"}) == expected.model_dump(exclude={"id"})
+    assert results[5] is None and results[6] is None
+
+# 2. Per-step rounding: round(0.26 + 0.225, 2) is 0.48 (not 0.26 + round(0.225, 2))
+def test_categorize_rounds_each_addition():
+    rules = [
+        CategoryDictionary(
+            id=uuid.uuid4(), category_code=code, category_name=code, keyword=keyword,
+            weight=weight, keyword_type=KeywordType.PRIMARY, is_active=True,
+        )
+        for keyword, code, weight in [
+            ("primo", "CAT_A", 0.3), ("primo", "CAT_B", 0.8), ("primo", "CAT_C", 0.8),
+            ("devon", "CAT_B", 0.5), ("devon", "CAT_D", 1.0),
+        ]
+    ]
+    product_id = uuid.uuid4()
+
+    [result] = CategorizationEngine(rules).categorize([product_id], ["primo devon 3kg"])
+
+    expected = legacy_categorize(product_id, "primo devon 3kg", rules)
+    assert result.model_dump(exclude={"id"}) == expected.model_dump(exclude={"id"})
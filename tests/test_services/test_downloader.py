@@ -0,0 +1,150 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import pytest
+import requests
+from src.services.downloader import download_file
+
+PAYLOAD = bytes(range(256)) * 1024
+ETAG = '"invoice-v1"'
+# Version 2 of the same object, served after the object changes
+PAYLOAD_V2 = bytes(reversed(range(256))) * 1024
+ETAG_V2 = '"invoice-v2"'
+
+class InvoiceHandler(BaseHTTPRequestHandler):
+    drop_first_response = False
+    # Object replaced by version 2 once the first (dropped) response is sent
+    change_after_drop = False
+    changed = False
+    # Requests for /flaky.pdf answered 503 before the body is sent, and requests seen there
+    unavailable_responses = 0
+    flaky_requests = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/missing.pdf":
+            self.send_error(404)
+            return
+        if self.path == "/flaky.pdf":
+            type(self).flaky_requests += 1
+            if type(self).unavailable_responses:
+                type(self).unavailable_responses -= 1
+                self.send_error(503)
+                return
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        payload, etag = (PAYLOAD_V2, ETAG_V2) if type(self).changed else (PAYLOAD, ETAG)
+        start = 0
+        range_header = self.headers.get("Range")
+        # If-Range: the range only applies to the same version, otherwise the whole object is sent
+        if range_header and self.headers.get("If-Range") in (None, etag):
+            start = int(range_header.split("=")[1].rstrip("-"))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(payload) - 1}/{len(payload)}")
+        else:
+            self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(payload) - start))
+        self.end_headers()
+
+        if type(self).drop_first_response:
+            # Send half of the body, then drop the connection
+            type(self).drop_first_response = False
+            type(self).changed = type(self).change_after_drop
+            self.wfile.write(payload[start:len(payload) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(payload[start:])
+
+@pytest.fixture
+def server_url():
+    InvoiceHandler.change_after_drop = False
+    InvoiceHandler.changed = False
+    InvoiceHandler.unavailable_responses = 0
+    InvoiceHandler.flaky_requests = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), InvoiceHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+# 1. Body is streamed to disk
+def test_download_file(server_url: str, tmp_path: Path):
+    dest = tmp_path / "invoice.pdf"
+
+    result = download_file(f"{server_url}/invoice.pdf", str(dest))
+
+    assert dest.read_bytes() == PAYLOAD
+    assert result.size == len(PAYLOAD)
+    assert result.etag == ETAG
+    assert result.not_modified is False
+
+# 2. Conditional request returns not_modified and keeps the existing local copy
+def test_download_file_not_modified(server_url: str, tmp_path: Path):
+    dest = tmp_path / "invoice.pdf"
+    dest.write_bytes(b"cached copy")
+
+    result = download_file(f"{server_url}/invoice.pdf", str(dest), etag=ETAG)
+
+    assert result.not_modified is True
+    assert dest.read_bytes() == b"cached copy"
+    assert list(tmp_path.iterdir()) == [dest]
+
+# 3. Interrupted body is resumed with a Range request
+def test_download_file_resumes(server_url: str, tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("DOWNLOAD_BACKOFF_SECONDS", "0")
+    InvoiceHandler.drop_first_response = True
+    dest = tmp_path / "invoice.pdf"
+
+    result = download_file(f"{server_url}/invoice.pdf", str(dest))
+
+    assert dest.read_bytes() == PAYLOAD
+    assert result.resumed is True
+
+# 4. HTTP errors are raised to the caller, an existing local copy is left untouched
+def test_download_file_http_error(server_url: str, tmp_path: Path):
+    dest = tmp_path / "missing.pdf"
+    dest.write_bytes(b"cached copy")
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        download_file(f"{server_url}/missing.pdf", str(dest))
+
+    assert dest.read_bytes() == b"cached copy"
+    assert list(tmp_path.iterdir()) == [dest]
+
+# 5. The object changes between attempts: If-Range gets the new version whole, not appended
+def test_download_file_restarts_when_object_changes(server_url: str, tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("DOWNLOAD_BACKOFF_SECONDS", "0")
+    InvoiceHandler.drop_first_response = True
+    InvoiceHandler.change_after_drop = True
+    dest = tmp_path / "invoice.pdf"
+
+    result = download_file(f"{server_url}/invoice.pdf", str(dest))
+
+    assert dest.read_bytes() == PAYLOAD_V2
+    assert result.etag == ETAG_V2
+    assert result.resumed is False
+
+# 6. 5xx responses share the single retry budget (DOWNLOAD_MAX_RETRIES attempts after the first)
+def test_download_file_retries_unavailable(server_url: str, tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("DOWNLOAD_BACKOFF_SECONDS", "0")
+    monkeypatch.setenv("DOWNLOAD_MAX_RETRIES", "2")
+    dest = tmp_path / "invoice.pdf"
+
+    InvoiceHandler.unavailable_responses = 2
+    download_file(f"{server_url}/flaky.pdf", str(dest))
+    assert dest.read_bytes() == PAYLOAD
+    assert InvoiceHandler.flaky_requests == 3
+
+    InvoiceHandler.unavailable_responses = 10
+    InvoiceHandler.flaky_requests = 0
+    with pytest.raises(requests.exceptions.HTTPError):
+        download_file(f"{server_url}/flaky.pdf", str(dest))
+    assert InvoiceHandler.flaky_requests == 3
@@ -0,0 +1,61 @@
+import numpy as np
+from PIL import Image, ImageDraw
+from src.services.image_preprocessing import (
+    PREPROCESS_STEPS,
+    binarize,
+    downscale,
+    estimate_skew,
+    get_preprocess_steps,
+    otsu_threshold,
+    preprocess_image,
+)
+
+def ruled_page(width=1200, height=900) -> Image.Image:
+    # White page with evenly spaced black bars standing in for text lines
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+    for top in range(100, height - 100, 40):
+        draw.rectangle([100, top, width - 100, top + 8], fill="black")
+    return img
+
+# 1. Steps come from OCR_PREPROCESS in pipeline order, unknown steps dropped
+def test_preprocess_steps_from_env(monkeypatch):
+    monkeypatch.setenv("OCR_PREPROCESS", "binarize, grayscale, sharpen")
+    assert get_preprocess_steps() == ("grayscale", "binarize")
+    assert get_preprocess_steps("all") == PREPROCESS_STEPS
+    assert get_preprocess_steps("") == ()
+
+# 2. Otsu binarization keeps the dark band, downscale only shrinks oversized pages
+def test_binarize_and_downscale():
+    gray = np.full((100, 100), 200, dtype=np.uint8)
+    gray[40:60] = 30
+    binary = binarize(gray)
+    assert set(np.unique(binary)) == {0, 255}
+    assert (binary[40:60] == 0).all()
+
+    assert downscale(np.zeros((7000, 5000), dtype=np.uint8), max_side=3508).shape == (3500, 2500)
+    assert downscale(gray, max_side=3508) is gray
+
+# 3. Deskew finds the rotation of the text lines and straightens them
+def test_deskew_straightens_rotated_lines():
+    rotated = np.asarray(ruled_page().convert("L").rotate(2, fillcolor=255))
+    assert estimate_skew(rotated) == -2.0
+
+    img, timings = preprocess_image(Image.fromarray(rotated), ("binarize", "deskew"))
+    assert estimate_skew(np.asarray(img)) == 0.0
+    assert list(timings) == ["binarize", "deskew"]
+
+# 4. No steps: the image is returned untouched
+def test_no_steps_returns_image_untouched():
+    img = ruled_page()
+    assert preprocess_image(img, ()) == (img, {})
+
+# 5. Uniform image (blank page): no threshold, left as is, no skew
+def test_uniform_image_is_not_thresholded():
+    blank = np.full((50, 50), 255, dtype=np.uint8)
+
+    assert otsu_threshold(blank) is None
+    assert binarize(blank) is blank
+    assert estimate_skew(blank) == 0.0
+    img, _ = preprocess_image(Image.fromarray(blank), PREPROCESS_STEPS)
+    assert np.asarray(img.convert("L")).min() == 255
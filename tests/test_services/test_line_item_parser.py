@@ -0,0 +1,57 @@
+import re
+import pytest
+from pypdf import PdfReader
+from pathlib import Path
+from src.constants.invoice_template import InvoiceTemplate, TEMPLATE_CONFIGS
+from src.services.line_item_parser import LineItemParser
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+# 1. Same records as the template regexes on the sample invoices
+@pytest.mark.parametrize("template, relative_path, expected_count", [
+    (InvoiceTemplate.GULLI, "data/invoices/gulli/CI-255579.pdf", 114),
+    (InvoiceTemplate.GULLI, "data/invoices/gulli/CI-265481.pdf", 111),
+    (InvoiceTemplate.MAYERS, "data/invoices/mayers/TAX INVOICE - 5552306.pdf", 5),
+])
+def test_columns_match_template_pattern(template, relative_path, expected_count):
+    config = TEMPLATE_CONFIGS[template]
+    pages = PdfReader(str(PROJECT_ROOT / relative_path)).pages
+    text = "\n".join(page.extract_text() or "" for page in pages)
+
+    found = [m.groupdict() for m in LineItemParser(config["columns"]).finditer(text)]
+
+    assert len(found) == expected_count
+    assert found == [m.groupdict() for m in re.finditer(config["pattern"], text, flags=re.MULTILINE)]
+
+# 2. Records over several lines, line_end columns, records start on a line and resume at pos
+def test_parser_columns_and_positions():
+    gulli = LineItemParser(TEMPLATE_CONFIGS[InvoiceTemplate.GULLI]["columns"])
+    text = "HEADER\nABC-1\nSalami  Mild 1kg\n2.500\n \nkg\n30.10\nXYZ-2 Ham 1.000 Box 12.50"
+    items = list(gulli.finditer(text))
+    assert [m.groupdict() for m in items] == [
+        {"code": "ABC-1", "desc": "Salami  Mild 1kg", "qty": "2.500", "uom": "kg", "price": "30.10"},
+        {"code": "XYZ-2", "desc": "Ham", "qty": "1.000", "uom": "Box", "price": "12.50"},
+    ]
+    assert [m.end() for m in items] == [m.end() for m in re.finditer(
+        TEMPLATE_CONFIGS[InvoiceTemplate.GULLI]["pattern"], text, flags=re.MULTILINE
+    )]
+    # Resuming mid-line: the rest of that line is not a record start
+    assert [m.groupdict()["code"] for m in gulli.finditer(text, items[0].end())] == ["XYZ-2"]
+    assert [m.groupdict()["code"] for m in gulli.finditer(text, text.index("-2 Ham"))] == []
+
+    mayers = LineItemParser(TEMPLATE_CONFIGS[InvoiceTemplate.MAYERS]["columns"])
+    line = "1 1CTN DN015 FONTINA 1X5KG 5.05 KG 26.66 15.00% 0.00 22.66 114.44"
+    assert [m.groupdict()["amount"] for m in mayers.finditer(line)] == ["114.44"]
+    # No line total at the end of the line: not a record
+    assert list(mayers.finditer(line + " SMUDGE")) == []
+
+# 3. Invalid column specs are rejected
+@pytest.mark.parametrize("columns", [
+    [],
+    [{"name": "code", "type": "regex"}],
+    [{"name": "code", "type": "token"}, {"name": "desc", "type": "text"}],
+    [{"name": "a", "type": "text"}, {"name": "b", "type": "text"}, {"name": "c", "type": "token"}],
+])
+def test_parser_rejects_invalid_columns(columns):
+    with pytest.raises(ValueError):
+        LineItemParser(columns)
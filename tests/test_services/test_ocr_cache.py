@@ -0,0 +1,72 @@
+import os
+import pathlib
+from pathlib import Path
+import pytest
+from src.schemas.file import CachedReadResult
+from src.services import pdf_reader
+from src.services.ocr_cache import OcrResultCache
+
+@pytest.fixture
+def project_root() -> Path:
+    return pathlib.Path(__file__).parent.parent.parent
+
+# 1. Entries round-trip and the least recently used entry is evicted first
+def test_cache_lru_eviction(tmp_path: Path):
+    entry = CachedReadResult(page_count=1, full_text="x" * 1000)
+    entry_size = len(entry.model_dump_json())
+    cache = OcrResultCache(str(tmp_path), max_bytes=entry_size * 2)
+
+    cache.put("a", entry)
+    cache.put("b", entry)
+    os.utime(tmp_path / "a.json", (1, 1))
+    os.utime(tmp_path / "b.json", (2, 2))
+    assert cache.get("a") == entry  # refreshes "a"
+
+    cache.put("c", entry)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == entry
+    assert cache.get("c") == entry
+
+# 2. A cache hit skips reading the PDF entirely
+def test_read_pdf_uses_cache(project_root: Path, tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("OCR_CACHE_DIR", str(tmp_path))
+    gulli_path = str(project_root / "data/invoices/gulli/CI-255579.pdf")
+
+    first = pdf_reader.read_pdf_file(gulli_path, is_extract_all=True, is_check_invoice_template=True)
+    assert first.success is True
+
+    def fail(*args, **kwargs):
+        raise AssertionError("PDF should not be read on a cache hit")
+
+    monkeypatch.setattr(pdf_reader, "PdfReader", fail)
+    second = pdf_reader.read_pdf_file(gulli_path, is_extract_all=True, is_check_invoice_template=True)
+
+    assert second.success is True
+    assert second.full_text == first.full_text
+    assert second.page_count == first.page_count
+    assert second.invoice_template == "GULLI"
+
+# 3. The memory ceiling and the templates' OCR profile DPI are part of the settings
+def test_cache_settings_include_effective_dpi_inputs(monkeypatch):
+    monkeypatch.delenv("OCR_PROFILE", raising=False)
+    default = pdf_reader.get_ocr_cache_settings(True, max_memory_mb=256)
+    lowered = pdf_reader.get_ocr_cache_settings(True, max_memory_mb=16)
+    monkeypatch.setenv("OCR_PROFILE", "speed")
+    speed = pdf_reader.get_ocr_cache_settings(True, max_memory_mb=256)
+
+    assert default["template_dpi"]["GULLI"] == 300
+    assert speed["template_dpi"]["GULLI"] == 200
+    assert len({OcrResultCache.make_key("pdf", s) for s in (default, lowered, speed)}) == 3
+
+# 4. A failed write leaves no temporary file behind
+def test_cache_put_failure_removes_temp_file(tmp_path: Path, monkeypatch):
+    cache = OcrResultCache(str(tmp_path), max_bytes=1024 * 1024)
+
+    def fail_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail_replace)
+    cache.put("a", CachedReadResult(page_count=1, full_text="x"))
+
+    assert list(tmp_path.iterdir()) == []
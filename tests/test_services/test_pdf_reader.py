@@ -1,7 +1,24 @@
+import os
+import time
+import uuid
 import pathlib
 from pathlib import Path
 import pytest
-from src.services.pdf_reader import read_pdf_file
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from pypdf import PdfReader, PageObject
+from src.services import pdf_reader
+from src.constants.invoice_template import InvoiceTemplate, TEMPLATE_CONFIGS
+from src.services.ocr_engine import parse_tesseract_config
+from src.services.extract_product import extract_products_from_pages, extract_products_from_text
+from src.services.pdf_reader import (
+    read_pdf_file,
+    get_ocr_workers,
+    plan_page_rendering,
+    estimate_page_image_bytes,
+    parse_tesseract_tsv,
+    assemble_lines,
+)
 
 @pytest.fixture
 def project_root() -> Path:
@@ -62,4 +79,523 @@ def test_read_pdf_verify_template_name(project_root: Path):
     res_mayers = read_pdf_file(file_path=str(mayers_path), is_check_invoice_template=True)
     
     assert res_gulli.invoice_template == "GULLI"
-    assert res_mayers.invoice_template == "MAYERS"
\ No newline at end of file
+    assert res_mayers.invoice_template == "MAYERS"
+
+# 7. OCR worker count falls back to OCR_WORKERS and is capped by the CPU count
+def test_get_ocr_workers(monkeypatch):
+    monkeypatch.setenv("OCR_WORKERS", "4")
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+
+    assert get_ocr_workers() == 2
+    assert get_ocr_workers(1) == 1
+    assert get_ocr_workers(0) == 1
+
+# 8. Rasterization plan keeps page images under the memory ceiling
+def test_plan_page_rendering_respects_memory_limit(project_root: Path):
+    reader = PdfReader(project_root / "data/invoices/gulli/CI-255579.pdf")
+    page_numbers = list(range(1, len(reader.pages) + 1))
+    memory_limit = 128 * 1024 * 1024
+
+    dpi, window = plan_page_rendering(reader.pages, page_numbers, 300, memory_limit)
+
+    assert dpi == 300
+    assert 1 <= window < len(page_numbers)
+    assert window * estimate_page_image_bytes(reader.pages[0], dpi) <= memory_limit
+
+    # A single page that does not fit lowers the DPI instead
+    low_dpi, low_window = plan_page_rendering(reader.pages, [1], 300, 20 * 1024 * 1024)
+    assert low_dpi < 300
+    assert low_window == 1
+
+# 9. In-memory mode (memory-mapped local file) gives the same result as the path mode
+def test_read_pdf_in_memory(project_root: Path):
+    mayers_path = str(project_root / "data/invoices/mayers/TAX INVOICE - 5552306.pdf")
+
+    from_path = read_pdf_file(mayers_path, is_extract_all=True, is_check_invoice_template=True)
+    from_memory = read_pdf_file(
+        mayers_path, is_extract_all=True, is_check_invoice_template=True, in_memory=True
+    )
+
+    assert from_memory.success is True
+    assert from_memory.full_text == from_path.full_text
+    assert from_memory.invoice_template == "MAYERS"
+
+# 10. Only pages without a text layer are OCR'd, and their text is kept in page order
+def test_read_pdf_ocr_only_scanned_pages(project_root: Path, monkeypatch):
+    gulli_path = str(project_root / "data/invoices/gulli/CI-265481.pdf")
+    original_extract_text = PageObject.extract_text
+
+    def extract_text(page, *args, **kwargs):
+        # Pretend page 3 is a scanned image
+        if page.page_number == 2:
+            return ""
+        return original_extract_text(page, *args, **kwargs)
+
+    def fake_page_images(pdf_source, page_numbers, convert_kwargs, window=1):
+        for page_number in page_numbers:
+            yield page_number, f"image-{page_number}"
+
+    monkeypatch.setattr(PageObject, "extract_text", extract_text)
+    monkeypatch.setattr(pdf_reader, "iter_page_images", fake_page_images)
+    monkeypatch.setattr(pdf_reader, "extract_text_with_confidence", lambda img, config="": (f"OCR {img}", 95.0))
+
+    # Fake page images are placeholders, so there is nothing to triage
+    result = read_pdf_file(
+        gulli_path, is_extract_all=True, is_check_invoice_template=True, page_triage=False
+    )
+
+    assert result.success is True
+    assert result.invoice_template == "GULLI"
+    assert "OCR image-3" in result.full_text
+    assert "OCR image-1" not in result.full_text
+    assert result.full_text.index("OCR image-3") > result.full_text.index("Gulli Food")
+
+# 11. OCR TSV is rebuilt into lines: (block, line) order, words left to right, empty rows dropped
+def test_assemble_lines_from_tsv():
+    tsv = "\n".join([
+        "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext",
+        "1\t1\t0\t0\t0\t0\t0\t0\t2480\t3508\t-1\t",
+        "5\t1\t2\t1\t1\t1\t300\t900\t80\t26\t91.5\tTotal:",
+        "5\t1\t1\t1\t2\t2\t500\t200\t80\t26\t88.0\t25.00",
+        "5\t1\t1\t1\t1\t1\t40\t100\t80\t26\t95.1\tInvoice",
+        "5\t1\t1\t1\t2\t1\t40\t200\t80\t26\t90.2\tAU036",
+        "5\t1\t1\t1\t1\t2\t200\t100\t80\t26\t-1\t ",
+        "5\t1\t2\t1\t1\t2\t500\t900\t80\t26\t93.0\t542.50",
+    ])
+
+    words = parse_tesseract_tsv(tsv)
+
+    assert len(words) == 5
+    assert assemble_lines(words) == "Invoice\nAU036 25.00\nTotal: 542.50"
+
+# 12. Adaptive DPI: only low-confidence pages are re-rendered at full DPI
+def test_adaptive_dpi_escalates_low_confidence_pages(monkeypatch):
+    rendered = []
+    confidences = {1: 92.0, 2: 41.0}
+
+    def fake_render_pages(pdf_source, first_page, last_page, convert_kwargs):
+        rendered.append((first_page, convert_kwargs["dpi"]))
+        return [Image.new("L", (1, 1), color=first_page)]
+
+    def fake_confidence_ocr(img, config=""):
+        page_number = img.getpixel((0, 0))
+        return f"page {page_number}", confidences[page_number]
+
+    monkeypatch.setattr(pdf_reader, "render_pages", fake_render_pages)
+    monkeypatch.setattr(pdf_reader, "extract_text_with_confidence", fake_confidence_ocr)
+    monkeypatch.setattr(pdf_reader, "extract_text_with_layout", lambda img, config="": "page 2 (300 DPI)")
+    options = pdf_reader.OcrOptions(convert_kwargs={"dpi": 300}, low_dpi=150, min_confidence=80)
+
+    results = list(pdf_reader.ocr_pages("invoice.pdf", [1, 2], options))
+
+    assert [r.text for r in results] == ["page 1", "page 2 (300 DPI)"]
+    assert [r.escalated for r in results] == [False, True]
+    assert rendered == [(1, 150), (2, 150), (2, 300)]
+
+# 13. Table region: from the template's header line down to its first footer line
+def test_locate_table_region(monkeypatch):
+    header = "Ordere Picked Item Code Item Description Shipped Qty Unit Price".split()
+    rows = ["level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"]
+    lines = [(1, 20, ["TAX", "INVOICE"]), (2, 100, header), (3, 120, ["10", "AU036", "HAPPY", "COW"]), (4, 200, ["Ex", "Tax:", "542.50"])]
+    for block_num, top, words in lines:
+        for word_num, text in enumerate(words, 1):
+            rows.append(f"5\t1\t{block_num}\t1\t1\t{word_num}\t{word_num * 10}\t{top}\t8\t6\t90\t{text}")
+    monkeypatch.setattr(pdf_reader.get_ocr_backend(), "image_to_tsv", lambda *args, **kwargs: "\n".join(rows))
+
+    region = pdf_reader.locate_table_region(Image.new("L", (300, 900)), InvoiceTemplate.MAYERS)
+
+    assert region is not None
+    assert region[0] == pytest.approx(100 / 300 - pdf_reader.TABLE_REGION_MARGIN)
+    assert region[1] == pytest.approx(200 / 300 + pdf_reader.TABLE_REGION_MARGIN)
+    assert pdf_reader.crop_to_region(Image.new("L", (300, 900)), region).height < 900
+
+# 14. Scanned PDF with an unknown template is rejected by the pre-check, before full OCR
+def test_read_pdf_unknown_template_fails_fast(project_root: Path, monkeypatch):
+    gulli_path = str(project_root / "data/invoices/gulli/CI-265481.pdf")
+
+    def full_ocr(*args, **kwargs):
+        raise AssertionError("Full OCR should not run for an unknown template")
+
+    monkeypatch.setattr(PageObject, "extract_text", lambda page, *args, **kwargs: "")
+    monkeypatch.setattr(pdf_reader, "precheck_invoice_template", lambda *args: InvoiceTemplate.UNKNOWN)
+    monkeypatch.setattr(pdf_reader, "ocr_pages", full_ocr)
+
+    result = read_pdf_file(gulli_path, is_extract_all=True, is_check_invoice_template=True)
+
+    assert result.success is False
+    assert result.error_message == "Unknown Invoice Template"
+
+# 15. Tesseract CLI options are translated for the persistent (in-process) OCR backend
+def test_parse_tesseract_config():
+    options = parse_tesseract_config("--psm 6 --oem 1 -c tessedit_char_whitelist=0123456789.")
+
+    assert options["psm"] == 6
+    assert options["oem"] == 1
+    assert options["variables"] == {"tessedit_char_whitelist": "0123456789."}
+
+# 16. OCR profile: template settings on top of its preset, whitelist only for table crops
+def test_ocr_profile_merges_preset_and_template_settings(monkeypatch):
+    monkeypatch.delenv("OCR_PROFILE", raising=False)
+    monkeypatch.setenv("TESSDATA_FAST_DIR", "/usr/share/tessdata_fast")
+
+    # Full accuracy by default
+    profile = pdf_reader.get_ocr_profile(InvoiceTemplate.MAYERS)
+    assert profile["dpi"] == 300
+    assert pdf_reader.build_tesseract_config(profile) == "--oem 1 --psm 3"
+    assert "tessedit_char_whitelist=" in pdf_reader.build_tesseract_config(profile, for_table=True)
+    assert pdf_reader.get_ocr_profile(None) == {}
+
+    # OCR_PROFILE opts into the speed preset, template settings still apply on top
+    monkeypatch.setenv("OCR_PROFILE", "speed")
+    profile = pdf_reader.get_ocr_profile(InvoiceTemplate.MAYERS)
+    assert profile["dpi"] == 200
+    assert pdf_reader.build_tesseract_config(profile) == (
+        "--oem 1 --psm 6 --tessdata-dir /usr/share/tessdata_fast"
+    )
+    assert "tessedit_char_whitelist=" in pdf_reader.build_tesseract_config(profile, for_table=True)
+
+# 17. Pages after the end-of-items marker are neither extracted nor kept
+def test_read_pdf_stops_at_end_of_items_marker(project_root: Path, monkeypatch):
+    gulli_path = str(project_root / "data/invoices/gulli/CI-265481.pdf")
+    original_extract_text = PageObject.extract_text
+    extracted_pages = []
+
+    def extract_text(page, *args, **kwargs):
+        extracted_pages.append(page.page_number + 1)
+        text = original_extract_text(page, *args, **kwargs)
+        # Pretend the totals are on page 3 (pages 4-5 are remittance copies), in upper case
+        if page.page_number == 2:
+            text += "\nUNTAXED AMOUNT $ 1,000.00"
+        return text
+
+    monkeypatch.setattr(PageObject, "extract_text", extract_text)
+
+    result = read_pdf_file(
+        gulli_path, is_extract_all=True, is_check_invoice_template=True, stop_at_end_of_items=True
+    )
+
+    assert result.success is True
+    assert result.skipped_pages == 2
+    assert result.page_count == 5
+    assert extracted_pages == [1, 2, 3]
+    assert result.full_text.endswith("UNTAXED AMOUNT $ 1,000.00")
+
+    # Early stop is off by default: every page is read
+    monkeypatch.delenv("STOP_AT_END_OF_ITEMS", raising=False)
+    extracted_pages.clear()
+    result = read_pdf_file(gulli_path, is_extract_all=True)
+    assert result.skipped_pages == 0
+    assert extracted_pages == [1, 2, 3, 4, 5]
+
+# 18. Page triage: blank (also noisy) pages are skipped, a few text lines are sparse (one cheaper
+#     pass), item tables are dense; a single thin text line is never taken for a blank page
+def test_page_triage_classifies_pages(monkeypatch):
+    font = ImageFont.load_default(size=36)
+    blank = Image.new("RGB", (2480, 3508), "white")
+    rng = np.random.default_rng(0)
+    scan = np.clip(rng.normal(238, 6, (3508, 2480)), 0, 255)
+    for y, x, size in zip(rng.integers(0, 3500, 400), rng.integers(0, 2470, 400), rng.integers(1, 4, 400)):
+        scan[y:y + size, x:x + size] = 60
+    noisy_blank = Image.fromarray(scan.astype(np.uint8))
+    one_line = blank.copy()
+    ImageDraw.Draw(one_line).text((200, 3200), "Untaxed Amount $ 1,000.00", fill="black", font=font)
+    items = blank.copy()
+    for index in range(10):
+        ImageDraw.Draw(items).text(
+            (200, 300 + index * 60), f"AU03{index} HAPPY COW BRIE 1.00 kg 9.50", fill="black", font=font
+        )
+
+    assert pdf_reader.triage_page(blank) == "blank"
+    assert pdf_reader.triage_page(noisy_blank) == "blank"
+    assert pdf_reader.triage_page(one_line) == "sparse"
+    assert pdf_reader.triage_page(items) == "dense"
+
+    pages = {1: items, 2: noisy_blank, 3: one_line}
+    ocr_calls = []
+
+    def fake_page_images(pdf_source, page_numbers, convert_kwargs, window=1):
+        for page_number in page_numbers:
+            yield page_number, pages[page_number]
+
+    def fake_confidence_ocr(img, config=""):
+        ocr_calls.append(config)
+        return "text", 50.0
+
+    monkeypatch.setattr(pdf_reader, "iter_page_images", fake_page_images)
+    monkeypatch.setattr(pdf_reader, "extract_text_with_confidence", fake_confidence_ocr)
+    monkeypatch.setattr(pdf_reader, "render_pages", lambda pdf_source, first, last, kwargs: [pages[first].copy()])
+    monkeypatch.setattr(pdf_reader, "extract_text_with_layout", lambda img, config="": "full resolution text")
+    options = pdf_reader.OcrOptions(
+        convert_kwargs={"dpi": 300}, low_dpi=150, min_confidence=80,
+        triage=True, ocr_config="--psm 4", sparse_ocr_config="--oem 1 --psm 4",
+    )
+
+    results = list(pdf_reader.ocr_pages("invoice.pdf", [1, 2, 3], options))
+
+    assert [r.page_class for r in results] == ["dense", "blank", "sparse"]
+    assert [r.text for r in results] == ["full resolution text", "", "text"]
+    # Only the dense page is escalated; the sparse page gets one pass with the cheaper config
+    assert [r.escalated for r in results] == [True, False, False]
+    assert ocr_calls == ["--psm 4", "--oem 1 --psm 4"]
+    # On unless OCR_PAGE_TRIAGE=false
+    monkeypatch.delenv("OCR_PAGE_TRIAGE", raising=False)
+    assert pdf_reader.get_page_triage_mode() is True
+    monkeypatch.setenv("OCR_PAGE_TRIAGE", "false")
+    assert pdf_reader.get_page_triage_mode() is False
+
+# 19. Text layer backend: per template or forced by TEXT_LAYER_BACKEND, pypdf when unavailable
+def test_text_layer_backend_selection(monkeypatch):
+    monkeypatch.delenv("TEXT_LAYER_BACKEND", raising=False)
+    monkeypatch.setitem(
+        TEMPLATE_CONFIGS[InvoiceTemplate.MAYERS], "text_backend", "pdftotext"
+    )
+    monkeypatch.setattr(pdf_reader.shutil, "which", lambda command: command)
+
+    assert pdf_reader.get_text_layer_backend(None).name == "pypdf"
+    assert pdf_reader.get_text_layer_backend(InvoiceTemplate.GULLI).name == "pypdf"
+    assert pdf_reader.get_text_layer_backend(InvoiceTemplate.MAYERS).name == "pdftotext"
+
+    monkeypatch.setenv("TEXT_LAYER_BACKEND", "pdftotext")
+    assert pdf_reader.get_text_layer_backend(None).name == "pdftotext"
+
+    # Poppler missing: back to pypdf
+    monkeypatch.setattr(pdf_reader.shutil, "which", lambda command: None)
+    assert pdf_reader.get_text_layer_backend(None).name == "pypdf"
+
+# 20. Streaming: pages arrive in order and give the same products as the full text
+@pytest.mark.parametrize("relative_path", [
+    "data/invoices/gulli/CI-255579.pdf",
+    "data/invoices/mayers/TAX INVOICE - 5552306.pdf",
+])
+def test_page_stream_matches_full_text(project_root: Path, relative_path: str):
+    invoice_id = uuid.uuid4()
+    file_path = str(project_root / relative_path)
+    full = read_pdf_file(file_path, is_extract_all=True, is_check_invoice_template=True)
+
+    stream = pdf_reader.PdfPageStream(file_path, is_extract_all=True, is_check_invoice_template=True)
+    pages = list(stream)
+
+    assert [page.page_number for page in pages] == list(range(1, len(pages) + 1))
+    assert stream.response.success is True
+    assert pages[0].invoice_template == full.invoice_template
+    streamed = [
+        product
+        for page_products in extract_products_from_pages(
+            [page.text for page in pages], pages[0].invoice_template, invoice_id
+        )
+        for product in page_products
+    ]
+    assert streamed == extract_products_from_text(full.full_text, full.invoice_template, invoice_id)
+
+# 21. Streaming extraction: a record split across a page break is matched whole
+def test_extract_products_record_across_pages(project_root: Path):
+    invoice_id = uuid.uuid4()
+    file_path = str(project_root / "data/invoices/gulli/CI-255579.pdf")
+    full_text = read_pdf_file(file_path, is_extract_all=True).full_text
+    expected = extract_products_from_text(full_text, InvoiceTemplate.GULLI, invoice_id)
+
+    # Break the text into "pages" every 7 lines, cutting records in the middle
+    lines = full_text.split("\n")
+    page_texts = ["\n".join(lines[i:i + 7]) for i in range(0, len(lines), 7)]
+    batches = list(extract_products_from_pages(page_texts, InvoiceTemplate.GULLI, invoice_id))
+
+    assert [product for batch in batches for product in batch] == expected
+    assert sum(1 for batch in batches if batch) > 1
+
+# 22. Pool mode: in-memory PDF bytes reach the workers once, in shared memory, not in every task
+def test_ocr_pages_parallel_hands_bytes_once(monkeypatch):
+    pdf_bytes = bytearray(b"%PDF-1.4 fake")
+    seen = []
+    handles = set()
+
+    class FakePool:
+        def map(self, function, tasks):
+            for task in tasks:
+                handles.add(task[0])
+                yield function(task)
+
+    def fake_render(pdf_source, first_page, last_page, convert_kwargs):
+        seen.append((first_page, bytes(pdf_source)))
+        return [Image.new("L", (10, 10))]
+
+    monkeypatch.setattr(pdf_reader, "_get_ocr_pool", lambda workers: FakePool())
+    monkeypatch.setattr(pdf_reader, "render_pages", fake_render)
+    monkeypatch.setattr(
+        pdf_reader, "_ocr_rendered_page",
+        lambda pdf_source, page_number, image, options: pdf_reader.PageOcrResult(page_number, f"page {page_number}"),
+    )
+    options = pdf_reader.OcrOptions(convert_kwargs={"dpi": 300})
+
+    results = list(pdf_reader.ocr_pages(memoryview(pdf_bytes), [1, 2, 3], options, workers=2, batch_size=2))
+
+    assert [r.text for r in results] == ["page 1", "page 2", "page 3"]
+    assert seen == [(1, pdf_bytes), (2, pdf_bytes), (3, pdf_bytes)]
+    # One shared block for the document, unlinked once the pages are done
+    assert len(handles) == 1
+    handle = handles.pop()
+    assert isinstance(handle, pdf_reader.SharedPdf)
+    with pytest.raises(FileNotFoundError):
+        pdf_reader.shared_memory.SharedMemory(name=handle.name)
+
+# 23. Table region + early stop: the marker on the footer line (outside the crop) stops reading
+def test_table_region_footer_marker_stops_reading(project_root: Path, monkeypatch):
+    gulli_path = str(project_root / "data/invoices/gulli/CI-265481.pdf")
+    header = "PRODUCT CODE DESCRIPTION QUANTITY UNIT PRICE".split()
+    ocr_pages = []
+
+    def page_tsv(img, lang, config=""):
+        # The page number is the image's gray level (kept by the reduced copy)
+        page_number = img.getpixel((0, 0))
+        lines = [(1, 20, ["TAX", "INVOICE"]), (2, 100, header), (3, 120, ["AU036", "BRIE", "1.00", "kg", "9.50"])]
+        if page_number == 3:
+            lines.append((4, 200, ["Untaxed", "Amount", "$", "1,000.00"]))
+        rows = ["level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"]
+        for block_num, top, words in lines:
+            for word_num, text in enumerate(words, 1):
+                rows.append(f"5\t1\t{block_num}\t1\t1\t{word_num}\t{word_num * 10}\t{top}\t8\t6\t90\t{text}")
+        return "\n".join(rows)
+
+    def fake_page_images(pdf_source, page_numbers, convert_kwargs, window=1):
+        for page_number in page_numbers:
+            yield page_number, Image.new("L", (300, 900), color=page_number)
+
+    def fake_ocr(img, config=""):
+        page_number = img.getpixel((0, 0))
+        ocr_pages.append(page_number)
+        # Table crop only: the footer line is cut off
+        assert img.height < 900
+        return f"AU036 BRIE 1.00 kg 9.50 (page {page_number})", 95.0
+
+    monkeypatch.setattr(PageObject, "extract_text", lambda page, *args, **kwargs: "")
+    monkeypatch.setattr(pdf_reader, "precheck_invoice_template", lambda *args, **kwargs: InvoiceTemplate.GULLI)
+    monkeypatch.setattr(pdf_reader.get_ocr_backend(), "image_to_tsv", page_tsv)
+    monkeypatch.setattr(pdf_reader, "iter_page_images", fake_page_images)
+    monkeypatch.setattr(pdf_reader, "extract_text_with_confidence", fake_ocr)
+
+    result = read_pdf_file(
+        gulli_path, is_extract_all=True, is_check_invoice_template=True,
+        table_region_only=True, page_triage=False, stop_at_end_of_items=True,
+    )
+
+    assert result.success is True
+    assert ocr_pages == [1, 2, 3]
+    assert result.skipped_pages == 2
+    assert "Untaxed Amount" not in result.full_text
+
+# 24. Pool mode: the shared PDF block is unlinked when a page fails
+def test_ocr_pages_parallel_releases_bytes_on_error(monkeypatch):
+    handles = []
+
+    class FakePool:
+        def map(self, function, tasks):
+            for task in tasks:
+                handles.append(task[0])
+                yield function(task)
+
+    def failing_render(pdf_source, first_page, last_page, convert_kwargs):
+        raise RuntimeError("pdftoppm failed")
+
+    monkeypatch.setattr(pdf_reader, "_get_ocr_pool", lambda workers: FakePool())
+    monkeypatch.setattr(pdf_reader, "render_pages", failing_render)
+    options = pdf_reader.OcrOptions(convert_kwargs={"dpi": 300})
+
+    with pytest.raises(RuntimeError):
+        list(pdf_reader.ocr_pages(b"%PDF-1.4 fake", [1, 2], options, workers=2))
+
+    assert handles
+    with pytest.raises(FileNotFoundError):
+        pdf_reader.shared_memory.SharedMemory(name=handles[0].name)
+
+# 25. Adaptive DPI: no second pass when the full resolution is not above the first pass DPI
+def test_adaptive_dpi_skipped_at_low_full_dpi(monkeypatch):
+    rendered = []
+
+    def fake_render_pages(pdf_source, first_page, last_page, convert_kwargs):
+        rendered.append((first_page, convert_kwargs["dpi"]))
+        return [Image.new("L", (1, 1), color=first_page)]
+
+    monkeypatch.setattr(pdf_reader, "render_pages", fake_render_pages)
+    monkeypatch.setattr(pdf_reader, "extract_text_with_confidence", lambda img, config="": ("page", 10.0))
+    # e.g. a 200 DPI OCR profile with OCR_LOW_DPI=200, or the memory ceiling lowering the DPI
+    for full_dpi in (200, 150):
+        rendered.clear()
+        options = pdf_reader.OcrOptions(convert_kwargs={"dpi": full_dpi}, low_dpi=200, min_confidence=80)
+
+        results = list(pdf_reader.ocr_pages("invoice.pdf", [1, 2], options))
+
+        assert [r.escalated for r in results] == [False, False]
+        assert rendered == [(1, full_dpi), (2, full_dpi)]
+
+# 26. Template pre-check: a first page unreadable at low DPI is detected at full resolution
+def test_precheck_falls_back_to_full_resolution(monkeypatch):
+    rendered = []
+
+    def fake_render_pages(pdf_source, first_page, last_page, convert_kwargs):
+        rendered.append(convert_kwargs["dpi"])
+        return [Image.new("L", (1, 1), color=convert_kwargs["dpi"] // 2)]
+
+    def fake_layout_ocr(img, config=""):
+        return "full resolution text" if img.getpixel((0, 0)) == 150 else "blurry text"
+
+    def fake_detect(text):
+        return InvoiceTemplate.GULLI if text == "full resolution text" else InvoiceTemplate.UNKNOWN
+
+    monkeypatch.setattr(pdf_reader, "render_pages", fake_render_pages)
+    monkeypatch.setattr(pdf_reader, "extract_text_with_layout", fake_layout_ocr)
+    monkeypatch.setattr(pdf_reader, "validate_invoice_template", fake_detect)
+    monkeypatch.setenv("TEMPLATE_PRECHECK_DPI", "150")
+
+    assert pdf_reader.precheck_invoice_template("invoice.pdf", full_dpi=300) == InvoiceTemplate.GULLI
+    assert rendered == [150, 300]
+
+    # Nothing to fall back to when the pre-check already runs at full resolution
+    rendered.clear()
+    assert pdf_reader.precheck_invoice_template("invoice.pdf", full_dpi=150) == InvoiceTemplate.UNKNOWN
+    assert rendered == [150]
+
+# 27. Text layer: page 1 is read again with the template's backend once the template is known
+def test_first_page_reread_with_template_backend(project_root: Path, monkeypatch):
+    gulli_path = str(project_root / "data/invoices/gulli/CI-265481.pdf")
+    pypdf_backend = pdf_reader.PypdfTextBackend()
+    calls = []
+
+    class LayoutBackend(pdf_reader.TextLayerBackend):
+        name = "layout"
+
+        def extract_pages(self, pdf_source, pages, first_page, last_page):
+            calls.append((first_page, last_page))
+            texts = pypdf_backend.extract_pages(pdf_source, pages, first_page, last_page)
+            return [f"layout {text}" for text in texts]
+
+    monkeypatch.setattr(
+        pdf_reader, "get_text_layer_backend",
+        lambda template=None, poppler_path=None: LayoutBackend() if template else pypdf_backend,
+    )
+
+    result = read_pdf_file(gulli_path, is_extract_all=True, is_check_invoice_template=True)
+
+    assert result.success is True
+    assert result.invoice_template == "GULLI"
+    assert calls[0] == (1, 1)
+    assert result.full_text.startswith("layout ")
+
+# 28. Streaming: closing the stream early stops the background read
+def test_page_stream_close_stops_reading(monkeypatch):
+    produced = []
+
+    def slow_read(file_path, on_page, **read_options):
+        for page_number in range(1, 101):
+            on_page(pdf_reader.PageText(page_number, f"page {page_number}", InvoiceTemplate.GULLI))
+            produced.append(page_number)
+            time.sleep(0.01)
+        return pdf_reader.create_success_response(file_path=file_path, page_count=100, full_text="")
+
+    monkeypatch.setattr(pdf_reader, "read_pdf_file", slow_read)
+
+    with pdf_reader.PdfPageStream("invoice.pdf") as stream:
+        pages = iter(stream)
+        assert next(pages).page_number == 1
+
+    assert not stream._thread.is_alive()
+    assert len(produced) < 100
+    assert stream.response.success is False
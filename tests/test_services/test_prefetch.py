@@ -0,0 +1,121 @@
+import os
+import threading
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import pytest
+from src.schemas.invoice import InvoiceBase
+from src.services import prefetch
+from src.services.prefetch import InvoicePrefetcher
+
+class InvoiceFileHandler(BaseHTTPRequestHandler):
+    requested: list[str] = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        type(self).requested.append(self.path)
+        if self.path.startswith("/missing"):
+            self.send_error(404)
+            return
+        body = self.path.encode() * 100
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def server_url():
+    InvoiceFileHandler.requested = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), InvoiceFileHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+class FakeConnection:
+    opened = 0
+
+    def __init__(self):
+        type(self).opened += 1
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+def make_invoice(name: str, file_size: int = 1000) -> InvoiceBase:
+    now = datetime.now()
+    return InvoiceBase(
+        invoice_id=uuid.uuid4(),
+        original_file_name=name,
+        file_type="pdf",
+        file_size=file_size,
+        invoice_url=f"/{name}",
+        created_at=now,
+        updated_at=now,
+    )
+
+# 1. The next pending invoices are downloaded ahead and handed over as local files
+def test_prefetch_next_pending_invoices(server_url: str, tmp_path: Path, monkeypatch):
+    invoices = [make_invoice(f"invoice-{i}.pdf") for i in range(4)]
+    monkeypatch.setattr(prefetch, "get_db_connection", lambda autocommit=False: FakeConnection())
+    monkeypatch.setattr(prefetch, "get_next_pending_invoices", lambda limit, conn=None: invoices[:limit])
+    prefetcher = InvoicePrefetcher(server_url, depth=2, max_bytes=10_000, staging_dir=str(tmp_path))
+
+    prefetcher.refresh()
+    path = prefetcher.take(invoices[0])
+
+    assert path is not None
+    assert Path(path).read_bytes() == b"/invoice-0.pdf" * 100
+    # Only `depth` invoices are looked ahead
+    assert prefetcher.take(invoices[2]) is None
+
+    prefetcher.release(invoices[0].invoice_id)
+    assert not os.path.exists(path)
+    prefetcher.close()
+    assert sorted(InvoiceFileHandler.requested) == ["/invoice-0.pdf", "/invoice-1.pdf"]
+    assert list(tmp_path.iterdir()) == []
+
+# 2. The staging area is bounded by size, failed downloads fall back to the caller
+def test_prefetch_respects_size_limit_and_failures(server_url: str, tmp_path: Path):
+    big = make_invoice("big.pdf", file_size=6_000)
+    bigger = make_invoice("bigger.pdf", file_size=6_000)
+    missing = make_invoice("missing.pdf")
+    prefetcher = InvoicePrefetcher(server_url, depth=3, max_bytes=10_000, staging_dir=str(tmp_path))
+
+    prefetcher.schedule([missing, big, bigger])
+
+    assert prefetcher.take(missing) is None
+    assert prefetcher.take(big) is not None
+    assert prefetcher.take(bigger) is None
+    prefetcher.close()
+
+# 3. Off unless PREFETCH_DEPTH is set; the look-ahead query reuses one connection
+def test_prefetch_default_and_connection_reuse(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("BASE_URL", "http://127.0.0.1")
+    monkeypatch.delenv("PREFETCH_DEPTH", raising=False)
+    assert prefetch.get_invoice_prefetcher() is None
+
+    connections = []
+    monkeypatch.setattr(FakeConnection, "opened", 0)
+    monkeypatch.setattr(prefetch, "get_db_connection", lambda autocommit=False: FakeConnection())
+    monkeypatch.setattr(
+        prefetch, "get_next_pending_invoices", lambda limit, conn=None: connections.append(conn) or []
+    )
+    prefetcher = InvoicePrefetcher("http://127.0.0.1", depth=2, max_bytes=10_000, staging_dir=str(tmp_path))
+
+    for _ in range(3):
+        prefetcher.refresh()
+    assert FakeConnection.opened == 1
+    assert len(set(map(id, connections))) == 1
+
+    # A lost connection is reopened
+    connections[0].closed = True
+    prefetcher.refresh()
+    assert FakeConnection.opened == 2
+
+    prefetcher.close()
+    assert connections[-1].closed
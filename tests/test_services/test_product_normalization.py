@@ -0,0 +1,163 @@
+import uuid
+from datetime import datetime
+from src.constants.normalization import NORMALIZER_VERSION
+from src.schemas.category_dictionary import CategoryDictionary
+from src.schemas.product import ProductBase, ProductFuzzyCandidate
+from src.schemas.product_extract import ProductExtract
+from src.constants.enums import KeywordType
+from psycopg import errors
+from src.repositories import product as product_repository
+from src.services import matching, product_normalization
+from src.services.product_normalization import build_product_normalized_names
+from src.utils.text_helpers import get_product_normalized_name
+
+def make_product(name: str, **stored) -> ProductBase:
+    now = datetime.now()
+    return ProductBase(id=uuid.uuid4(), name=name, created_at=now, updated_at=now, **stored)
+
+# 1. Only missing, outdated or stale normalized names are (re)computed
+def test_build_product_normalized_names():
+    up_to_date = make_product(
+        "Salami Mild 1 KGS",
+        normalized_name="salami mild 1 kg",
+        normalizer_version=NORMALIZER_VERSION,
+        pack_count=1,
+        pack_size=1000.0,
+        pack_unit="g",
+    )
+    missing = make_product("Butter Salted 20X250G")
+    old_version = make_product(
+        "Brie 200 grams",
+        normalized_name="brie 200 grams",
+        normalizer_version=NORMALIZER_VERSION - 1,
+    )
+    renamed = make_product(
+        "Feta 1 KG",
+        normalized_name="fetta 1 kg",
+        normalizer_version=NORMALIZER_VERSION,
+    )
+
+    results = build_product_normalized_names([up_to_date, missing, old_version, renamed])
+
+    assert [r.product_id for r in results] == [missing.id, old_version.id, renamed.id]
+    assert results[1].normalized_name == "brie 200 g"
+    assert (results[1].pack_count, results[1].pack_size, results[1].pack_unit) == (1, 200.0, "g")
+    assert all(r.normalizer_version == NORMALIZER_VERSION for r in results)
+
+# 2. Matching uses the stored name only when it comes from the current normalizer version
+def test_get_product_normalized_name():
+    stored = ProductFuzzyCandidate(
+        id=uuid.uuid4(), name="Brie 200 grams",
+        normalized_name="stored name", normalizer_version=NORMALIZER_VERSION,
+    )
+    outdated = stored.model_copy(update={"normalizer_version": NORMALIZER_VERSION - 1})
+    missing = ProductFuzzyCandidate(id=uuid.uuid4(), name="Brie 200 grams")
+
+    assert get_product_normalized_name(stored) == "stored name"
+    assert get_product_normalized_name(outdated) == "brie 200 g"
+    assert get_product_normalized_name(missing) == "brie 200 g"
+
+# 3. Fuzzy matching only scores candidates with a compatible pack size
+def test_matching_pack_size_blocking(monkeypatch):
+    candidates = [
+        ProductFuzzyCandidate(id=uuid.uuid4(), name="Salami Calabrese 10kg"),
+        ProductFuzzyCandidate(id=uuid.uuid4(), name="Salami Calabrese 1kg"),
+    ]
+    monkeypatch.setattr(matching, "get_products_by_identifiers", lambda *args: [])
+    monkeypatch.setattr(matching, "get_products_by_categories", lambda categories: candidates)
+    rules = [CategoryDictionary(
+        id=uuid.uuid4(), category_code="CAT_SALAMI", category_name="Salami",
+        keyword="salami", weight=1.0, keyword_type=KeywordType.PRIMARY, is_active=True,
+    )]
+    item = ProductExtract(id=uuid.uuid4(), invoice_id=uuid.uuid4(), raw_product_name="Salami Calabrese 1 kg")
+
+    _, match_candidates, _ = matching.run_matching_process([item], rules)
+    assert [c.product_id for c in match_candidates] == [candidates[1].id]
+
+    monkeypatch.setenv("MATCH_PACK_SIZE_BLOCKING", "false")
+    _, match_candidates, _ = matching.run_matching_process([item], rules)
+    assert {c.product_id for c in match_candidates} == {p.id for p in candidates}
+
+# 4. Without the normalization columns, candidates are read with the old column list
+def test_products_by_categories_without_normalization_columns(monkeypatch):
+    product_id = uuid.uuid4()
+    queries = []
+
+    class FakeCursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def execute(self, query, params):
+            queries.append(query)
+            if "normalized_name" in query:
+                raise errors.UndefinedColumn("column p.normalized_name does not exist")
+
+        def fetchall(self):
+            return [{"id": product_id, "name": "Brie 200 grams"}]
+
+    class FakeConnection:
+        def cursor(self):
+            return FakeCursor()
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(product_repository, "get_db_connection", lambda: FakeConnection())
+
+    candidates = product_repository.get_products_by_categories(["CAT_CHEESE"])
+
+    assert [(c.id, c.name, c.normalized_name) for c in candidates] == [(product_id, "Brie 200 grams", None)]
+    assert len(queries) == 2
+    assert get_product_normalized_name(candidates[0]) == "brie 200 g"
+
+# 5. New and renamed products are normalized and saved at the start of a worker batch
+def test_refresh_product_normalized_names(monkeypatch):
+    new_product = make_product("Butter Salted 20X250G")
+    saved = []
+    monkeypatch.setattr(product_normalization, "get_products_to_normalize", lambda version: [new_product])
+    monkeypatch.setattr(
+        product_normalization, "bulk_save_product_normalized_names", lambda results: saved.extend(results) or True
+    )
+
+    assert product_normalization.refresh_product_normalized_names() == 1
+    assert saved[0].product_id == new_product.id
+    assert saved[0].normalizer_version == NORMALIZER_VERSION
+    assert (saved[0].pack_count, saved[0].pack_size, saved[0].pack_unit) == (20, 250.0, "g")
+
+# 6. Products to normalize are selected with index-friendly conditions
+def test_products_to_normalize_query(monkeypatch):
+    executed = []
+
+    class FakeCursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def execute(self, query, params):
+            executed.append((query, params))
+
+        def fetchall(self):
+            return []
+
+    class FakeConnection:
+        def cursor(self):
+            return FakeCursor()
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(product_repository, "get_db_connection", lambda: FakeConnection())
+
+    assert product_repository.get_products_to_normalize(NORMALIZER_VERSION) == []
+    query, params = executed[0]
+    assert "normalizer_version < %s OR normalizer_version IS NULL" in query
+    assert "IS DISTINCT FROM" not in query
+    assert params == (NORMALIZER_VERSION,)
@@ -0,0 +1,93 @@
+import uuid
+import xml.etree.ElementTree as ET
+from pathlib import Path
+import openpyxl
+from src.constants.enums import FileType
+from src.services.structured_invoice import get_file_type, read_structured_invoice
+
+UBL_INVOICE = """<?xml version="1.0" encoding="UTF-8"?>
+<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"
+         xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"
+         xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">
+  <cbc:ID>5552306</cbc:ID>
+  <cac:InvoiceLine>
+    <cbc:ID>1</cbc:ID>
+    <cbc:InvoicedQuantity unitCode="CT">10</cbc:InvoicedQuantity>
+    <cac:Item>
+      <cbc:Name>HAPPY COW 12X140G</cbc:Name>
+      <cac:SellersItemIdentification><cbc:ID>AU036</cbc:ID></cac:SellersItemIdentification>
+    </cac:Item>
+    <cac:Price><cbc:PriceAmount currencyID="AUD">25.00</cbc:PriceAmount></cac:Price>
+  </cac:InvoiceLine>
+  <cac:InvoiceLine>
+    <cbc:ID>2</cbc:ID>
+    <cbc:InvoicedQuantity unitCode="KGM">5.05</cbc:InvoicedQuantity>
+    <cac:Item><cbc:Name>FONTINA 1X5KG CASTELLO</cbc:Name></cac:Item>
+    <cac:Price><cbc:PriceAmount currencyID="NZD">26.66</cbc:PriceAmount></cac:Price>
+  </cac:InvoiceLine>
+</Invoice>
+"""
+
+# 1. file_type accepts extensions and MIME types, falls back to the file name, then to PDF
+def test_get_file_type():
+    assert get_file_type("csv") == FileType.CSV
+    assert get_file_type("application/xml") == FileType.XML
+    assert get_file_type("", "invoice.XLSX") == FileType.XLSX
+    assert get_file_type("application/octet-stream", "invoice.pdf") == FileType.PDF
+    assert get_file_type(None) == FileType.PDF
+
+# 2. CSV export: header aliases, totals / blank rows skipped
+def test_read_csv_invoice(tmp_path: Path):
+    csv_path = tmp_path / "invoice.csv"
+    csv_path.write_text(
+        "Item Code,Item Description,Shipped Qty,Unit Price\n"
+        "AU036,HAPPY COW 12X140G,10,25.00\n"
+        "DN015,\"FONTINA 1X5KG, CASTELLO\",5.05,\"1,026.66\"\n"
+        ",,,\n"
+        ",Total,,1051.66\n",
+        encoding="utf-8",
+    )
+    invoice_id = uuid.uuid4()
+
+    products = read_structured_invoice(str(csv_path), FileType.CSV, invoice_id)
+
+    assert [p.product_code for p in products] == ["AU036", "DN015"]
+    assert products[1].raw_product_name == "FONTINA 1X5KG, CASTELLO"
+    assert products[1].cost_price == 1026.66
+    assert products[0].invoice_id == invoice_id
+    assert products[0].currency == "AUD"
+
+# 3. UBL XML: line items streamed with namespaces, currency from the price
+#    Read lines are removed from the document tree, only the header is left
+def test_read_ubl_invoice(tmp_path: Path, monkeypatch):
+    xml_path = tmp_path / "invoice.xml"
+    xml_path.write_text(UBL_INVOICE, encoding="utf-8")
+    parsers = []
+    iterparse = ET.iterparse
+
+    def tracked_iterparse(*args, **kwargs):
+        parsers.append(iterparse(*args, **kwargs))
+        return parsers[-1]
+
+    monkeypatch.setattr(ET, "iterparse", tracked_iterparse)
+
+    products = read_structured_invoice(str(xml_path), FileType.XML, uuid.uuid4())
+
+    assert [(p.product_code, p.raw_product_name, p.quantity, p.cost_price, p.currency) for p in products] == [
+        ("AU036", "HAPPY COW 12X140G", 10.0, 25.0, "AUD"),
+        (None, "FONTINA 1X5KG CASTELLO", 5.05, 26.66, "NZD"),
+    ]
+    assert [child.tag.split("}")[1] for child in parsers[0].root] == ["ID"]
+
+# 4. XLSX: first worksheet, same header aliases as CSV
+def test_read_xlsx_invoice(tmp_path: Path):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["Product Code", "Description", "Quantity", "Unit Price"])
+    sheet.append(["AU036", "HAPPY COW 12X140G", 10, 25.0])
+    xlsx_path = tmp_path / "invoice.xlsx"
+    workbook.save(xlsx_path)
+
+    products = read_structured_invoice(str(xlsx_path), FileType.XLSX, uuid.uuid4())
+
+    assert [(p.product_code, p.quantity, p.cost_price) for p in products] == [("AU036", 10.0, 25.0)]
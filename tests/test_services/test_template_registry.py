@@ -0,0 +1,63 @@
+import json
+import os
+import random
+import uuid
+from pathlib import Path
+from src.constants.invoice_template import InvoiceTemplate
+from src.services.extract_product import extract_products_from_text
+from src.services.template_registry import AhoCorasick, TemplateRegistry, get_template_registry
+from src.services.validate_invoice_template import validate_invoice_template
+
+ACME_TEMPLATE = {
+    "ACME": {
+        "keywords": ["Acme Produce Co", "ABN 11 222 333 444"],
+        "table_headers": ["SKU", "ITEM", "QTY", "PRICE"],
+        "currency": "AUD",
+        "pattern": r"^(?P<code>[A-Z]\d+)\s+(?P<desc>.+?)\s+(?P<qty>[\d.]+)\s+(?P<price>[\d.]+)$",
+    }
+}
+
+ACME_PAGE = """Acme Produce Co - ABN 11 222 333 444
+SKU ITEM QTY PRICE
+A100 Royal Gala Apples 12.00 3.50
+A200 Navel Oranges 4.00 2.10
+"""
+
+# 1. The automaton reports exactly the patterns a substring search finds
+def test_aho_corasick_matches_substring_search():
+    patterns = ["he", "she", "his", "hers", "product code", "code", "disc.%", "e"]
+    matcher = AhoCorasick(patterns)
+    rng = random.Random(7)
+
+    for _ in range(500):
+        text = "".join(rng.choice("hers pcodutis.%") for _ in range(rng.randint(0, 40)))
+        assert matcher.find_all(text) == {i for i, p in enumerate(patterns) if p in text}
+
+# 2. Detection thresholds: 2 keywords and 3 table headers, first template in order wins
+def test_registry_detect_thresholds():
+    registry = TemplateRegistry(ACME_TEMPLATE)
+
+    assert registry.detect(ACME_PAGE) == "ACME"
+    assert registry.detect("Acme Produce Co\nSKU ITEM QTY") == InvoiceTemplate.UNKNOWN
+    assert registry.detect("") == InvoiceTemplate.UNKNOWN
+
+# 3. Templates from a JSON file are used for detection and extraction, and reloaded on change
+def test_templates_file_is_loaded_and_reloaded(tmp_path: Path, monkeypatch):
+    templates_file = tmp_path / "templates.json"
+    templates_file.write_text(json.dumps(ACME_TEMPLATE), encoding="utf-8")
+    monkeypatch.setenv("INVOICE_TEMPLATES_FILE", str(templates_file))
+
+    assert validate_invoice_template(ACME_PAGE) == "ACME"
+    products = extract_products_from_text(ACME_PAGE, "ACME", uuid.uuid4())
+    assert [(p.product_code, p.quantity) for p in products] == [("A100", 12.0), ("A200", 4.0)]
+    # Built-in templates are still there
+    assert get_template_registry().get(InvoiceTemplate.GULLI) is not None
+
+    # Edit the file: the next lookup sees the new keywords without a restart
+    renamed = {"ACME": {**ACME_TEMPLATE["ACME"], "keywords": ["Acme Fresh", "ABN 11 222 333 444"]}}
+    templates_file.write_text(json.dumps(renamed), encoding="utf-8")
+    stat = templates_file.stat()
+    os.utime(templates_file, (stat.st_atime, stat.st_mtime + 10))
+
+    assert validate_invoice_template(ACME_PAGE) == InvoiceTemplate.UNKNOWN
+    assert validate_invoice_template(ACME_PAGE.replace("Acme Produce Co", "Acme Fresh")) == "ACME"
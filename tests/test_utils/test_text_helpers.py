@@ -0,0 +1,75 @@
+import random
+import re
+from src.constants.normalization import UNIT_MAPPING, NON_MEANINGFUL_WORDS, SPECIAL_CHARS_PATTERN
+import pytest
+from src.schemas.product import PackSize
+from src.utils.text_helpers import normalize_product_name, parse_pack_size, is_pack_size_compatible
+
+def sequential_normalize(text: str) -> str:
+    # Reference: one re.sub per rewrite, in order
+    if not text: return ""
+    text = text.lower().strip()
+    for pattern, replacement in UNIT_MAPPING.items():
+        text = re.sub(pattern, replacement, text)
+    for word_pattern in NON_MEANINGFUL_WORDS:
+        text = re.sub(word_pattern, '', text)
+    text = re.sub(SPECIAL_CHARS_PATTERN, ' ', text)
+    return " ".join(text.split())
+
+# 1. The single pass gives exactly the sequential result
+def test_normalize_matches_sequential_rewrites():
+    names = [
+        "Borgo- Salami P/Free Fr/Range 400g",
+        "BLUE CASTELLO 70+ (10X150G)",
+        "Olive Oil 2 Litres Bottle - PROMOTION free gift",
+        "Cheese_KG pack_of 6 pcs [Type: Tasty] & Milk 1 L",
+        "",
+    ]
+    tokens = [
+        "kg", "Kgs", "kilograms", "g", "grams", "pc", "pieces", "ml", "l", "litre", "btls",
+        "pk", "packs", "model", "size", "promo", "promotion", "with", "and", "for", "salami",
+        "275g", "1.5kg", "r/w", "_", "-", "(", ")", "&", "^", "é",
+    ]
+    rng = random.Random(7)
+    for _ in range(5000):
+        names.append("".join(
+            rng.choice(tokens) + rng.choice(["", " ", "-", "_", "/", "."])
+            for _ in range(rng.randint(1, 8))
+        ))
+
+    for name in names:
+        assert normalize_product_name(name) == sequential_normalize(name), name
+
+# 2. Repeated names come from the memo
+def test_normalize_is_memoized():
+    normalize_product_name.cache_clear()
+    for _ in range(3):
+        assert normalize_product_name("Butter Salted 20X250G Lurpak") == "butter salted 20x250g lurpak"
+
+    info = normalize_product_name.cache_info()
+    assert (info.hits, info.misses) == (2, 1)
+
+# 3. Pack sizes: count, size per item in g / ml
+@pytest.mark.parametrize("name, expected", [
+    ("Borgo- Cacciatori Twins Mild 12 x 275g", PackSize(count=12, size=275, unit="g")),
+    ("FONTINA 1X5KG CASTELLO", PackSize(count=1, size=5000, unit="g")),
+    ("Salami Calabrese r/w 1.5kg", PackSize(count=1, size=1500, unit="g")),
+    ("Paesanella- Bocconcini 210g x 9", PackSize(count=9, size=210, unit="g")),
+    ("Olive Oil 2 Litres", PackSize(count=1, size=2000, unit="ml")),
+    ("Milk 12 x 500ml", PackSize(count=12, size=500, unit="ml")),
+    ("BLUE CASTELLO 70+ (10X150G)", PackSize(count=10, size=150, unit="g")),
+    ("Deli Paper 37 x 50*", None),
+    ("", None),
+])
+def test_parse_pack_size(name, expected):
+    assert parse_pack_size(name) == expected
+
+# 4. Compatible: same unit and same size per item or in total
+def test_pack_size_compatibility():
+    one_kg = parse_pack_size("Ham 1kg")
+    assert is_pack_size_compatible(one_kg, parse_pack_size("Ham 1000 grams"))
+    assert not is_pack_size_compatible(one_kg, parse_pack_size("Ham 10kg"))
+    assert not is_pack_size_compatible(one_kg, parse_pack_size("Juice 1 L"))
+    assert is_pack_size_compatible(parse_pack_size("12 x 275g"), parse_pack_size("275g"))
+    assert is_pack_size_compatible(parse_pack_size("2 x 500g"), one_kg)
+    assert is_pack_size_compatible(one_kg, None)